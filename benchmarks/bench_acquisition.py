@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+from benchmark_util import *
+
+_CORRUPTION_INTERVAL = 1000
+# pseudo terminals are slower than the in-memory transport, larger sizes take too long
+_MAX_PTY_SIZE = 1000000
+
+
+def _bench_record_samples(sensor_module, simulator, size: int) -> dict:
+    def record():
+        sensor = sensor_module.HEXSensor(None, transport=simulator.SimulatedSerial(paced=False, num_frames=size))
+        sensor.connect()
+        if sensor.record_samples(size).get_data_point_count() != size:
+            raise Exception("record_samples returned too few samples")
+        sensor.disconnect()
+
+    return create_result('acquisition.record_samples.memory', size, measure(record, get_repeat(size)))
+
+
+def _bench_record_corrupted_samples(sensor_module, simulator, size: int) -> dict:
+    statistics = {}
+
+    def record():
+        transport = simulator.SimulatedSerial(paced=False, corruption_interval=_CORRUPTION_INTERVAL)
+        sensor = sensor_module.HEXSensor(None, transport=transport)
+        sensor.connect()
+        sensor.record_samples(size)
+        statistics.update(sensor.get_frame_statistics())
+        sensor.disconnect()
+
+    measurements = measure(record, get_repeat(size))
+    return create_result('acquisition.record_samples.corrupted', size, measurements,
+                         corrupted_frames=statistics['corrupted_frames'], resyncs=statistics['resyncs'])
+
+
+def _bench_record_samples_pty(sensor_module, simulator, size: int) -> dict:
+    def record():
+        with simulator.PtySimulator(num_frames=size, paced=False) as pty:
+            sensor = sensor_module.HEXSensor(pty.get_port())
+            sensor.connect()
+            pty.start()
+            if sensor.record_samples(size).get_data_point_count() != size:
+                raise Exception("record_samples returned too few samples")
+            sensor.disconnect()
+
+    return create_result('acquisition.record_samples.pty', size, measure(record, get_repeat(size), memory=False))
+
+
+def _bench_streaming(name: str, sensor_module, simulator, sample_rate: float, duration: float, pty: bool) -> dict:
+    """
+    Streams at the sample rate for the specified duration and reports whether the sensor kept up: the number of
+    sent, received and dropped (by the full receive buffer) frames as well as the CPU load, i.e. the CPU time spent
+    per second of streaming.
+    """
+    if pty:
+        source = simulator.PtySimulator(sample_rate)
+        source.open()
+        sensor = sensor_module.HEXSensor(source.get_port(), sample_rate=sample_rate)
+        sensor.connect()
+        source.start()
+    else:
+        source = simulator.SimulatedSerial(sample_rate)
+        sensor = sensor_module.HEXSensor(None, sample_rate=sample_rate, transport=source)
+        sensor.connect()
+    start_cpu_time = time.process_time()
+    sensor.start_streaming(buffer_size=int(sample_rate * duration) + 1)
+    time.sleep(duration)
+    sensor.stop_streaming()
+    cpu_seconds = time.process_time() - start_cpu_time
+    received = sensor.get_frame_statistics()['frames']
+    sent = source.get_sent_frame_count()
+    dropped = source.get_dropped_frame_count()
+    sensor.disconnect()
+    if pty:
+        source.stop()
+    timing = sensor.get_timing_statistics()
+    return create_result(name, cpu_load=cpu_seconds / duration, sample_rate=sample_rate, duration=duration,
+                         sent_frames=sent, received_frames=received, dropped_frames=dropped,
+                         received_rate=received / duration, jitter_std_us=timing['jitter_std_us'])
+
+
+def _bench_async_replay(async_sensor, simulator, size: int) -> dict:
+    data = simulator.create_frames(size)
+
+    def record():
+        sensor = async_sensor.AsyncHEXSensor(transport=async_sensor.ReplayTransport(data, chunk_size=1 << 16))
+
+        async def main():
+            await sensor.connect()
+            recording = await sensor.record_samples(size)
+            await sensor.disconnect()
+            return recording
+
+        if asyncio.run(main()).get_data_point_count() != size:
+            raise Exception("record_samples returned too few samples")
+
+    return create_result('acquisition.async.replay', size, measure(record, get_repeat(size)))
+
+
+def run(sizes: list, sample_rate: float, duration: float) -> list:
+    """
+    Measures the acquisition throughput of HEXSensor using the sensor simulator: reading and decoding as fast as
+    possible from the in-memory transport and from a pseudo terminal (POSIX only), reading a stream containing
+    corrupted frames, the asyncio interface, and streaming at a fixed sample rate.
+    :param sizes: The numbers of samples to record
+    :param sample_rate: The sample rate of the streaming benchmarks
+    :param duration: The duration of the streaming benchmarks in seconds
+    :return: List of results
+    """
+    sensor_module = get_submodule('sensor')
+    async_sensor = get_submodule('async_sensor')
+    simulator = get_submodule('simulator')
+    pty = os.name == 'posix'
+    results = []
+    for size in sizes:
+        log('acquisition: ' + str(size) + ' samples')
+        results.append(_bench_record_samples(sensor_module, simulator, size))
+        results.append(_bench_record_corrupted_samples(sensor_module, simulator, size))
+        results.append(_bench_async_replay(async_sensor, simulator, size))
+        if pty and size <= _MAX_PTY_SIZE:
+            results.append(_bench_record_samples_pty(sensor_module, simulator, size))
+    log('acquisition: streaming at ' + str(sample_rate) + ' Hz')
+    results.append(_bench_streaming('acquisition.streaming.memory', sensor_module, simulator, sample_rate, duration,
+                                    False))
+    if pty:
+        results.append(_bench_streaming('acquisition.streaming.pty', sensor_module, simulator, sample_rate, duration,
+                                        True))
+    return results
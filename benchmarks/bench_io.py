@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+from benchmark_util import *
+
+_FORMATS = ('csv', 'json', 'pkl', 'bin', 'rsr')
+# text formats are slow, larger sizes are skipped unless requested explicitly by max_text_size
+_DEFAULT_MAX_TEXT_SIZE = 1000000
+_TEXT_FORMATS = ('csv', 'json')
+
+
+def _bench_format(package, recording, file_extension: str, directory: str) -> list:
+    size = recording.get_data_point_count()
+    file_path = os.path.join(directory, 'recording_' + str(size) + '.' + file_extension)
+
+    def export():
+        package.export_recording_to_file(recording, file_path)
+
+    def load():
+        imported = package.import_recording_from_file(file_path)
+        if imported.get_data_point_count() != size:
+            raise Exception("imported recording has a wrong number of data points")
+
+    repeat = get_repeat(size)
+    results = [create_result('io.export.' + file_extension, size, measure(export, repeat))]
+    file_size = os.path.getsize(file_path)
+    results.append(create_result('io.import.' + file_extension, size, measure(load, repeat), file_bytes=file_size))
+    if file_extension == 'bin':
+        def map_file():
+            package.import_recording_from_file(file_path, memory_map=True).get_ft_matrix()
+
+        results.append(create_result('io.import.bin_memory_map', size, measure(map_file, repeat)))
+    if file_extension == 'rsr':
+        compressed_path = file_path + '.zlib'
+
+        def save_compressed():
+            recording.save(compressed_path, compression='zlib')
+
+        def load_compressed():
+            package.load_recording(compressed_path)
+
+        results.append(create_result('io.export.rsr_zlib', size, measure(save_compressed, repeat)))
+        results.append(create_result('io.import.rsr_zlib', size, measure(load_compressed, repeat),
+                                     file_bytes=os.path.getsize(compressed_path)))
+    return results
+
+
+def run(sizes: list, formats: list = _FORMATS, max_text_size: int = _DEFAULT_MAX_TEXT_SIZE) -> list:
+    """
+    Measures the duration and peak memory of exporting and importing recordings of the specified sizes for every
+    file format. The files are written to a temporary directory, which is removed afterwards.
+    :param sizes: The numbers of samples
+    :param formats: The file extensions to measure. Default csv, json, pkl, bin and rsr
+    :param max_text_size: The largest size measured for csv and json. Default 1000000
+    :return: List of results
+    """
+    package = get_package()
+    directory = tempfile.mkdtemp(prefix='resense_benchmark_')
+    results = []
+    try:
+        for size in sizes:
+            recording = create_recording(size)
+            for file_extension in formats:
+                if file_extension in _TEXT_FORMATS and size > max_text_size:
+                    continue
+                log('io: ' + file_extension + ', ' + str(size) + ' samples')
+                results.extend(_bench_format(package, recording, file_extension, directory))
+                for file_name in os.listdir(directory):
+                    os.remove(os.path.join(directory, file_name))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
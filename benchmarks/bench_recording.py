@@ -0,0 +1,118 @@
+import numpy as np
+from benchmark_util import *
+
+# number of calls of operations whose cost does not depend on the size of the recording
+_CALLS = 1000
+# number of DataSets created when iterating over data points
+_ITERATED_DATA_POINTS = 10000
+_APPEND_BLOCK_SIZE = 1000
+_CONCATENATED_PARTS = 10
+
+
+def _bench_columns(package, recording, size: int) -> list:
+    timestamps = recording.timestamps
+    values = recording.values
+
+    def create():
+        return package.BufferedRecording(timestamps=timestamps, values=values)
+
+    # the accessors cache derived arrays, so each run uses a new recording to measure the first (uncached) access
+    accessors = {
+        'timestamps': lambda: create().get_array_of_timestamps(),
+        'timestamps_absolute_us': lambda: create().get_array_of_timestamps(relative=False, seconds=False),
+        'values': lambda: create().get_array_of_values(package.Variable.FORCE, package.Direction.Z),
+        'vectors': lambda: create().get_array_of_vectors(package.Variable.TORQUE),
+        'ft_matrix': lambda: create().get_ft_matrix(),
+        'time_duration': lambda: create().get_time_duration(),
+    }
+    repeat = get_repeat(size)
+    return [create_result('recording.' + name, size, measure(function, repeat))
+            for name, function in accessors.items()]
+
+
+def _bench_calls(package, recording, size: int) -> list:
+    indices = np.random.default_rng(0).integers(0, size, _CALLS)
+    duration = recording.get_time_duration()
+    start_times = np.linspace(0.0, duration * 0.9, _CALLS)
+    recording.get_array_of_timestamps()
+
+    def get_data_points():
+        for index in indices:
+            recording.get_data_point(int(index))
+
+    def find_time_frames():
+        for start_time in start_times:
+            recording.get_data_point_indices_for_time_frame(start_time, start_time + duration * 0.01)
+
+    def slice_time():
+        for start_time in start_times:
+            recording.slice_time(start_time, start_time + duration * 0.01)
+
+    def get_sub_recordings():
+        for index in indices:
+            recording.get_sub_recording(int(index) // 2, int(index))
+
+    calls = {
+        'get_data_point': get_data_points,
+        'get_data_point_indices_for_time_frame': find_time_frames,
+        'slice_time': slice_time,
+        'get_sub_recording': get_sub_recordings,
+    }
+    results = []
+    for name, function in calls.items():
+        measurements = measure(function, 3, memory=False)
+        results.append(create_result('recording.' + name, size, measurements, calls=_CALLS,
+                                     seconds_per_call=measurements['seconds'] / _CALLS))
+    return results
+
+
+def _bench_iteration(recording, size: int) -> dict:
+    count = min(size, _ITERATED_DATA_POINTS)
+
+    def iterate():
+        for data_point in recording.get_data_points(0, count):
+            data_point.get_time_stamp()
+
+    measurements = measure(iterate, 3)
+    return create_result('recording.iterate_data_points', size, measurements, calls=count,
+                         seconds_per_call=measurements['seconds'] / count)
+
+
+def _bench_combining(package, recording, size: int) -> list:
+    parts = [recording.get_sub_recording(start, start + size // _CONCATENATED_PARTS)
+             for start in range(0, size, size // _CONCATENATED_PARTS)]
+
+    def concatenate():
+        package.concatenate_recordings(*parts)
+
+    def append_blocks():
+        appended = package.BufferedRecording(timestamps=recording.timestamps[0:1], values=recording.values[0:1])
+        for start in range(1, size, _APPEND_BLOCK_SIZE):
+            appended.append_block(recording.timestamps[start:start + _APPEND_BLOCK_SIZE],
+                                  recording.values[start:start + _APPEND_BLOCK_SIZE])
+
+    repeat = get_repeat(size)
+    return [
+        create_result('recording.concatenate', size, measure(concatenate, repeat), parts=len(parts)),
+        create_result('recording.append_block', size, measure(append_blocks, repeat),
+                      block_size=_APPEND_BLOCK_SIZE),
+    ]
+
+
+def run(sizes: list) -> list:
+    """
+    Measures the cost of the BufferedRecording accessors: the first access of the derived columns, random access
+    to single data points, time lookup and slicing, iterating over DataSets, concatenating and appending.
+    :param sizes: The numbers of samples
+    :return: List of results
+    """
+    package = get_package()
+    results = []
+    for size in sizes:
+        log('recording: ' + str(size) + ' samples')
+        recording = create_recording(size)
+        results.extend(_bench_columns(package, recording, size))
+        results.extend(_bench_calls(package, recording, size))
+        results.append(_bench_iteration(recording, size))
+        results.extend(_bench_combining(package, recording, size))
+    return results
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+from benchmark_util import *
+
+# modules which take long to import and should only be loaded by the parts of the package which need them
+_HEAVY_MODULES = ('numpy', 'scipy', 'serial', 'matplotlib', 'asyncio', 'concurrent.futures')
+_DEFAULT_REPEAT = 10
+# statements measured in a new interpreter each, {package} is replaced by the name of the package
+_STATEMENTS = {
+    'startup.import_package': 'import {package}',
+    'startup.first_access': 'import {package}; {package}.BufferedRecording',
+    'startup.import_all': 'from {package} import *',
+    'startup.import_sensor': 'import {package}.sensor',
+    'startup.import_statistics': 'import {package}.statistics',
+    'startup.import_sensor_group': 'import {package}.sensor_group',
+    'startup.import_visualizer': 'import {package}.visualizer',
+}
+_CHILD_CODE = '''
+import sys
+import time
+sys.path.insert(0, {path!r})
+start_time = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start_time
+import json
+print(json.dumps({{'seconds': seconds, 'modules': [name for name in {heavy_modules!r} if name in sys.modules]}}))
+'''
+
+
+def _run_child(code: str) -> tuple:
+    start_time = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.PIPE).stdout
+    return time.perf_counter() - start_time, json.loads(output.decode('utf-8'))
+
+
+def run(repeat: int = _DEFAULT_REPEAT) -> list:
+    """
+    Measures the import time of the package and some of its submodules. Every statement is run repeat times in a
+    new interpreter, since imported modules are cached. The duration of the statement is measured in the
+    interpreter, the duration of the whole process is measured from outside. Additionally, the heavy dependencies
+    loaded by the statement (NumPy, SciPy, pyserial, matplotlib, asyncio, concurrent.futures) are reported.
+    :param repeat: The number of runs per statement. Default 10
+    :return: List of results
+    """
+    package = get_package()
+    path = os.path.dirname(os.path.dirname(os.path.abspath(package.__file__)))
+    baseline = min(_run_child(_CHILD_CODE.format(path=path, statement='pass', heavy_modules=_HEAVY_MODULES))[0]
+                   for _ in range(repeat))
+    results = []
+    for name, statement in _STATEMENTS.items():
+        log(name)
+        code = _CHILD_CODE.format(path=path, statement=statement.format(package=package.__name__),
+                                  heavy_modules=_HEAVY_MODULES)
+        runs = [_run_child(code) for _ in range(repeat)]
+        durations = [child['seconds'] for _, child in runs]
+        modules = runs[0][1]['modules']
+        results.append(create_result(name, seconds=min(durations), mean_seconds=sum(durations) / repeat,
+                                     process_seconds=min(process_seconds for process_seconds, _ in runs),
+                                     interpreter_seconds=baseline, repeat=repeat, heavy_modules=modules,
+                                     heavy_module_count=len(modules)))
+    return results
@@ -0,0 +1,179 @@
+import gc
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+_SOURCE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+# the package is called resense in the source tree and resensepy when installed
+_PACKAGE_NAMES = ('resense', 'resensepy')
+# total number of samples processed per measurement, small sizes are repeated more often
+_SAMPLES_PER_MEASUREMENT = 1000000
+_MAX_REPEAT = 5
+
+
+def get_package():
+    """
+    Imports the package from the source tree next to the benchmarks, or the installed package if the benchmarks
+    are run outside of the repository.
+    :return: The package module
+    """
+    if os.path.isdir(_SOURCE_DIRECTORY) and _SOURCE_DIRECTORY not in sys.path:
+        sys.path.insert(0, _SOURCE_DIRECTORY)
+    for name in _PACKAGE_NAMES:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            pass
+    raise Exception("resense is neither found in " + _SOURCE_DIRECTORY + " nor installed")
+
+
+def get_submodule(name: str):
+    """
+    :param name: The name of the submodule, e.g. 'sensor'
+    :return: The submodule of the package
+    """
+    return importlib.import_module(get_package().__name__ + '.' + name)
+
+
+def get_repeat(size: int) -> int:
+    """
+    :param size: The number of samples processed by one run
+    :return: The number of runs used to measure the duration, 1 to 5
+    """
+    return max(1, min(_MAX_REPEAT, _SAMPLES_PER_MEASUREMENT // max(size, 1)))
+
+
+def measure(function, repeat: int = 1, memory: bool = True) -> dict:
+    """
+    Runs function repeat times and returns the shortest and mean duration. If memory is True, function is run once
+    more while tracing allocations to determine the peak memory allocated by it (NumPy arrays are included). The
+    traced run is not timed, since tracing slows down allocations.
+    :param function: The function to measure, called without arguments
+    :param repeat: The number of timed runs. Default 1
+    :param memory: Whether to measure the peak memory. Default True
+    :return: Dictionary of measurements
+    """
+    durations = []
+    cpu_durations = []
+    for _ in range(repeat):
+        gc.collect()
+        start_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        function()
+        cpu_durations.append(time.process_time() - start_cpu_time)
+        durations.append(time.perf_counter() - start_time)
+    result = {
+        'seconds': min(durations),
+        'mean_seconds': sum(durations) / len(durations),
+        'cpu_seconds': min(cpu_durations),
+        'repeat': repeat,
+    }
+    if memory:
+        result['peak_memory_bytes'] = measure_peak_memory(function)
+    return result
+
+
+def measure_peak_memory(function) -> int:
+    """
+    :param function: The function to measure, called without arguments
+    :return: The peak memory in bytes allocated while function is running
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def create_result(name: str, size: int = None, measurements: dict = None, **values) -> dict:
+    """
+    Creates one benchmark result. If size and seconds are given, the throughput in samples per second is added.
+    :param name: The name of the benchmark, e.g. 'io.export.csv'
+    :param size: The number of samples. Default None
+    :param measurements: The dictionary returned by measure(). Default None
+    :param values: Further values to store
+    :return: Dictionary of the result
+    """
+    result = {'name': name, 'size': size}
+    result.update(measurements or {})
+    result.update(values)
+    if size is not None and result.get('seconds'):
+        result['samples_per_second'] = size / result['seconds']
+    return result
+
+
+def create_recording(size: int, with_temperature: bool = False):
+    """
+    Creates a recording of size samples at 1 kHz containing the signal of the sensor simulator.
+    :param size: The number of samples
+    :param with_temperature: Whether to add a temperature column. Default False
+    :return: BufferedRecording
+    """
+    import numpy as np
+    package = get_package()
+    data = get_submodule('simulator').create_frames(size)
+    frames = np.frombuffer(data, dtype=get_submodule('framing')._FRAME_DTYPE)
+    timestamps = np.arange(size, dtype=np.int64) * 1000 + 1600000000000000
+    temperatures = np.full((size,), 25.0, dtype=np.float32) if with_temperature else None
+    return package.BufferedRecording(timestamps=timestamps, values=frames['values'].astype(np.float64),
+                                     temperatures=temperatures)
+
+
+def get_environment() -> dict:
+    """
+    :return: Dictionary describing the machine and the versions of Python, NumPy and the package
+    """
+    import numpy as np
+    package = get_package()
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+        'package': package.__name__,
+        'package_path': os.path.dirname(os.path.abspath(package.__file__)),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def write_results(file_path: str, results: list, arguments: dict = None):
+    """
+    Writes benchmark results and a description of the environment to a JSON file, or to stdout if file_path is
+    None or '-'.
+    :param file_path: The file to write to
+    :param results: List of results created by create_result()
+    :param arguments: The arguments of the benchmark run. Default None
+    """
+    document = {'environment': get_environment(), 'arguments': arguments or {}, 'results': results}
+    text = json.dumps(document, indent=2)
+    if file_path is None or file_path == '-':
+        print(text)
+    else:
+        with open(file_path, 'w') as file_output:
+            file_output.write(text + '\n')
+
+
+def read_results(file_path: str) -> dict:
+    """
+    :param file_path: A file written by write_results()
+    :return: The JSON document
+    """
+    with open(file_path, 'r') as file_input:
+        return json.load(file_input)
+
+
+def log(message: str):
+    """
+    Prints progress messages to stderr, so that stdout can be used for the results.
+    :param message: The message
+    """
+    print(message, file=sys.stderr, flush=True)
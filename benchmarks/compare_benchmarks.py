@@ -0,0 +1,72 @@
+"""
+Compares two result files written by run_benchmarks.py, e.g. of the previous and the current release:
+
+    python benchmarks/compare_benchmarks.py baseline.json results.json --threshold 0.2
+
+Prints the relative change of every compared value and exits with status 1 if any value got worse by more than the
+threshold, so that it can be used to catch regressions in CI.
+"""
+import argparse
+import sys
+from benchmark_util import *
+
+# values which are compared, lower is better for all of them
+_COMPARED_VALUES = ('seconds', 'cpu_seconds', 'cpu_load', 'peak_memory_bytes', 'dropped_frames',
+                    'heavy_module_count')
+_DEFAULT_THRESHOLD = 0.25
+# differences below these absolute values are treated as noise
+_MIN_DIFFERENCES = {'seconds': 0.001, 'cpu_seconds': 0.01, 'cpu_load': 0.05, 'peak_memory_bytes': 65536,
+                    'dropped_frames': 0, 'heavy_module_count': 0}
+
+
+def _get_key(result: dict) -> tuple:
+    return result['name'], result.get('size')
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = _DEFAULT_THRESHOLD) -> list:
+    """
+    Compares the results of two benchmark runs which are contained in both runs.
+    :param baseline: The document of the baseline run, see read_results()
+    :param current: The document of the current run
+    :param threshold: The relative change which is treated as a regression. Default 0.25 (25%)
+    :return: List of tuples (name, size, value name, baseline value, current value, relative change, regression)
+    """
+    baseline_results = {_get_key(result): result for result in baseline['results']}
+    comparisons = []
+    for result in current['results']:
+        reference = baseline_results.get(_get_key(result))
+        if reference is None:
+            continue
+        for value_name in _COMPARED_VALUES:
+            old_value = reference.get(value_name)
+            new_value = result.get(value_name)
+            if old_value is None or new_value is None:
+                continue
+            difference = new_value - old_value
+            change = difference / old_value if old_value != 0 else (0.0 if difference == 0 else float('inf'))
+            regression = change > threshold and difference > _MIN_DIFFERENCES[value_name]
+            comparisons.append((result['name'], result.get('size'), value_name, old_value, new_value, change,
+                                regression))
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares two result files written by run_benchmarks.py')
+    parser.add_argument('baseline', help='results of the baseline run')
+    parser.add_argument('current', help='results of the current run')
+    parser.add_argument('--threshold', type=float, default=_DEFAULT_THRESHOLD,
+                        help='relative change treated as regression, default: 0.25')
+    arguments = parser.parse_args()
+    comparisons = compare_results(read_results(arguments.baseline), read_results(arguments.current),
+                                  arguments.threshold)
+    regressions = 0
+    for name, size, value_name, old_value, new_value, change, regression in comparisons:
+        regressions += regression
+        print('{:<7} {:<50} {:>10} {:<18} {:>14.6g} {:>14.6g} {:>+8.1%}'.format(
+            'WORSE' if regression else '', name, str(size), value_name, old_value, new_value, change))
+    print(str(regressions) + ' regression(s) in ' + str(len(comparisons)) + ' compared values')
+    sys.exit(1 if regressions > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Runs the benchmarks of Resense.py and writes the results as JSON, e.g.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --suites io --sizes 10000,10000000 --max-text-size 10000000
+
+Compare the results of two runs (e.g. of two releases) using compare_benchmarks.py.
+"""
+import argparse
+import bench_acquisition
+import bench_io
+import bench_recording
+import bench_startup
+from benchmark_util import *
+
+_SUITES = ('startup', 'acquisition', 'io', 'recording')
+_DEFAULT_SIZES = (10000, 100000, 1000000)
+_DEFAULT_SAMPLE_RATE = 10000.0
+_DEFAULT_DURATION = 2.0
+
+
+def _parse_sizes(text: str) -> list:
+    return [int(float(size)) for size in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the benchmarks of Resense.py and writes the results as JSON')
+    parser.add_argument('--output', default='-', help="file to write the results to, '-' for stdout (default)")
+    parser.add_argument('--suites', default=','.join(_SUITES), help='comma separated suites, default: all')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in _DEFAULT_SIZES),
+                        help='comma separated numbers of samples, default: 10000,100000,1000000')
+    parser.add_argument('--quick', action='store_true', help='only measure 10000 samples and stream for 0.5 s')
+    parser.add_argument('--max-text-size', type=int, default=bench_io._DEFAULT_MAX_TEXT_SIZE,
+                        help='largest size measured for csv and json, default: 1000000')
+    parser.add_argument('--sample-rate', type=float, default=_DEFAULT_SAMPLE_RATE,
+                        help='sample rate of the streaming benchmarks, default: 10000')
+    parser.add_argument('--duration', type=float, default=_DEFAULT_DURATION,
+                        help='duration of the streaming benchmarks in seconds, default: 2')
+    arguments = parser.parse_args()
+    suites = arguments.suites.split(',')
+    for suite in suites:
+        if suite not in _SUITES:
+            parser.error('unknown suite: ' + suite)
+    sizes = [_DEFAULT_SIZES[0]] if arguments.quick else _parse_sizes(arguments.sizes)
+    duration = 0.5 if arguments.quick else arguments.duration
+
+    results = []
+    if 'startup' in suites:
+        results.extend(bench_startup.run())
+    if 'acquisition' in suites:
+        results.extend(bench_acquisition.run(sizes, arguments.sample_rate, duration))
+    if 'io' in suites:
+        results.extend(bench_io.run(sizes, max_text_size=arguments.max_text_size))
+    if 'recording' in suites:
+        results.extend(bench_recording.run(sizes))
+    write_results(arguments.output, results, {'suites': suites, 'sizes': sizes, 'sample_rate': arguments.sample_rate,
+                                              'duration': duration})
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,43 @@
+# The submodules are loaded on first use (PEP 562), so importing the package does not import NumPy. Accessing a
+# name of the default submodules (e.g. resensepy.BufferedRecording) loads them like the star imports of previous
+# versions; other submodules (e.g. resensepy.sensor) are loaded when they are imported or accessed.
+import sys
 
-from .recording import *
-from .importer import *
-from .exporter import *
-# from .visualizer import *
-# from .sensor import *
+# submodules whose public names are available from the package, later ones take precedence
+_DEFAULT_SUBMODULES = ('recording', 'importer', 'exporter')
+_SUBMODULES = _DEFAULT_SUBMODULES + ('async_sensor', 'framing', 'metrics', 'native_format', 'processing', 'recorder',
+                                     'ring_buffer', 'sensor', 'sensor_group', 'simulator', 'statistics', 'timing',
+                                     'visualizer')
+_default_names = None
+
+
+def _import_submodule(name: str):
+    # __import__ instead of importlib.import_module, since importing importlib takes longer than this package
+    __import__(__name__ + '.' + name)
+    return sys.modules[__name__ + '.' + name]
+
+
+def _load_default_submodules() -> list:
+    global _default_names
+    if _default_names is None:
+        names = {}
+        for submodule in _DEFAULT_SUBMODULES:
+            module = _import_submodule(submodule)
+            names.update((name, value) for name, value in vars(module).items() if not name.startswith('_'))
+        globals().update(names)
+        _default_names = list(names)
+    return _default_names
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return _import_submodule(name)
+    if name == '__all__':
+        return _load_default_submodules()
+    if not name.startswith('_') and name in _load_default_submodules():
+        return globals()[name]
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_SUBMODULES))
@@ -0,0 +1,295 @@
+from .recording import *
+from .sensor import CalibrationMatrix, _BAUD_RATE
+from .framing import FrameSynchronizer, _FRAME_SIZE
+from .timing import SampleClock
+import asyncio
+import time
+
+_POLL_INTERVAL = 0.001
+
+
+class AsyncSerialTransport:
+
+    def __init__(self, com_port, baudrate: int = _BAUD_RATE):
+        """
+        Creates a non-blocking transport for a serial port. The port is opened with a read timeout of 0. On
+        platforms whose event loop supports waiting for file descriptors, reads wait for the port to become
+        readable without a thread. Otherwise, the port is polled every millisecond.
+        :param com_port: The com port or pyserial URL to use
+        :param baudrate: The baud rate. Default 2000000
+        """
+        self._com_port = com_port
+        self._baudrate = baudrate
+        self._serial_interface = None
+        self._fd = None
+
+    async def open(self):
+        """
+        Opens the serial port.
+        """
+        import serial
+        self._serial_interface = serial.serial_for_url(self._com_port, baudrate=self._baudrate, timeout=0)
+        try:
+            self._fd = self._serial_interface.fileno()
+        except (AttributeError, NotImplementedError, serial.SerialException):
+            self._fd = None
+
+    def is_open(self) -> bool:
+        """
+        :return: True if the port is open
+        """
+        return self._serial_interface is not None and self._serial_interface.isOpen()
+
+    def close(self):
+        """
+        Closes the serial port.
+        """
+        if self.is_open():
+            self._serial_interface.close()
+
+    async def _wait_readable(self):
+        if self._fd is not None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            try:
+                loop.add_reader(self._fd, lambda: future.done() or future.set_result(None))
+            except NotImplementedError:
+                self._fd = None
+            else:
+                try:
+                    await future
+                finally:
+                    loop.remove_reader(self._fd)
+                return
+        await asyncio.sleep(_POLL_INTERVAL)
+
+    async def read(self) -> bytes:
+        """
+        Waits until data is available and returns all available bytes. Returns an empty bytes object if the port
+        was closed.
+        :return: The received bytes
+        """
+        while self.is_open():
+            data = self._serial_interface.read(max(self._serial_interface.in_waiting, 1))
+            if len(data) > 0:
+                return data
+            await self._wait_readable()
+        return b''
+
+
+class ReplayTransport:
+
+    def __init__(self, data: bytes, chunk_size: int = 4096, sample_rate: float = None):
+        """
+        Creates a fake transport which replays a recorded byte stream, e.g. for tests. The data is returned in
+        chunks of the specified size. If sample_rate is specified, reads are delayed so that frames are replayed
+        at that rate. After all data was replayed, read() returns an empty bytes object.
+        :param data: The byte stream to replay
+        :param chunk_size: The number of bytes returned per read. Default 4096
+        :param sample_rate: The rate in frames per second at which data is replayed. Default None (no delay)
+        """
+        self._data = bytes(data)
+        self._chunk_size = chunk_size
+        self._sample_rate = sample_rate
+        self._position = 0
+        self._open = False
+        self._start_time = None
+
+    async def open(self):
+        """
+        Opens the transport and starts the replay from the beginning.
+        """
+        self._position = 0
+        self._open = True
+        self._start_time = time.monotonic()
+
+    def is_open(self) -> bool:
+        """
+        :return: True if the transport is open
+        """
+        return self._open
+
+    def close(self):
+        """
+        Closes the transport.
+        """
+        self._open = False
+
+    async def read(self) -> bytes:
+        """
+        Returns the next chunk of the replayed data.
+        :return: The next chunk, an empty bytes object after all data was replayed
+        """
+        if not self._open or self._position >= len(self._data):
+            return b''
+        end = min(self._position + self._chunk_size, len(self._data))
+        if self._sample_rate is not None:
+            due_time = self._start_time + end / (_FRAME_SIZE * self._sample_rate)
+            delay = due_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        chunk = self._data[self._position:end]
+        self._position = end
+        return chunk
+
+
+class AsyncHEXSensor:
+
+    def __init__(self, com_port=None, transport=None, frame_trailer: bytes = None, sample_rate: float = None):
+        """
+        Creates a new HEX sensor object for use with asyncio. Reads are performed by a non-blocking transport, so
+        several sensors can be served by one event loop without a thread per device. If transport is None, an
+        AsyncSerialTransport for the specified com port is used. Any object providing the coroutines open() and
+        read() as well as is_open() and close(), e.g. a ReplayTransport, can be used as transport.
+        :param com_port: The com port to use
+        :param transport: The transport to read from. Default None
+        :param frame_trailer: The expected trailing bytes of every frame. Default None (learned from the stream)
+        :param sample_rate: The sample rate set on the electronics interface. Default None
+        """
+        if com_port is None and transport is None:
+            raise Exception('specify either com_port or transport')
+        self._transport = AsyncSerialTransport(com_port) if transport is None else transport
+        self._calibration_matrix = CalibrationMatrix()
+        self._synchronizer = FrameSynchronizer(frame_trailer)
+        self._clock = SampleClock(sample_rate)
+        self._backlog = None
+
+    def is_connected(self) -> bool:
+        """
+        :return: Connection status (True/False)
+        """
+        return self._transport.is_open()
+
+    async def connect(self) -> bool:
+        """
+        Attempts to connect to the sensor electronics interface.
+        :return: True if connection successful, False otherwise
+        """
+        if self.is_connected():
+            return True
+        self._synchronizer.reset()
+        self._clock.reset(time.time_ns() // 1000)
+        self._backlog = None
+        await self._transport.open()
+        return self.is_connected()
+
+    async def disconnect(self):
+        """
+        Disconnects the sensor electronics interface.
+        """
+        self._transport.close()
+
+    def set_calibration_matrix(self, matrix: CalibrationMatrix):
+        """
+        Sets the calibration matrix to use for recording samples, see HEXSensor.set_calibration_matrix().
+        :param matrix: The new configuration matrix
+        """
+        self._calibration_matrix = matrix
+
+    def set_sample_rate(self, sample_rate: float):
+        """
+        Sets the sample rate used for time stamping and resets the time stamping clock.
+        :param sample_rate: The sample rate in Hz
+        """
+        self._clock.set_sample_rate(sample_rate)
+
+    def get_frame_statistics(self) -> dict:
+        """
+        :return: The counters of the framing layer, see FrameSynchronizer.get_statistics()
+        """
+        return self._synchronizer.get_statistics()
+
+    def get_timing_statistics(self) -> dict:
+        """
+        :return: Statistics of the time stamping clock, see SampleClock.get_statistics()
+        """
+        return self._clock.get_statistics()
+
+    async def _read_block(self) -> tuple:
+        """
+        Reads the next chunk from the transport and returns the time stamps and raw values of the contained frames.
+        Returns None if the transport reached its end.
+        """
+        if self._backlog is not None:
+            block = self._backlog
+            self._backlog = None
+            return block
+        data = await self._transport.read()
+        if len(data) == 0:
+            return None
+        read_time = time.time_ns() // 1000
+        frames = self._synchronizer.feed(data)
+        # corrupted frames were sampled nevertheless, keep the time base in step
+        return self._clock.timestamp_block(len(frames), read_time, gaps=self._synchronizer.get_gaps()), frames
+
+    def _create_recording(self, blocks: list):
+        timestamps = np.concatenate([block[0] for block in blocks])
+        raw_values = np.concatenate([block[1] for block in blocks])
+        if len(timestamps) == 0:
+            return None
+        recording = BufferedRecording(timestamps=timestamps, values=self._calibration_matrix.process_block(raw_values))
+        recording.set_sample_rate(self._clock.get_nominal_sample_rate())
+        recording.set_calibration_matrix(self._calibration_matrix.matrix)
+        return recording
+
+    async def stream(self, min_samples: int = 1):
+        """
+        Asynchronously iterates over blocks of samples as they arrive, e.g. using
+        'async for block in sensor.stream()'. Each block is a BufferedRecording containing at least min_samples
+        samples (the last block may be smaller). The iteration ends when the connection is closed.
+        :param min_samples: The minimum number of samples per block. Default 1
+        :return: Asynchronous generator of BufferedRecordings
+        """
+        blocks = []
+        count = 0
+        while True:
+            block = await self._read_block()
+            if block is None:
+                break
+            blocks.append(block)
+            count += len(block[0])
+            if count >= min_samples:
+                yield self._create_recording(blocks)
+                blocks = []
+                count = 0
+        if count > 0:
+            yield self._create_recording(blocks)
+
+    async def record_samples(self, num_samples: int):
+        """
+        Reads the specified number of samples without blocking the event loop.
+        :param num_samples: The number of samples to read
+        :return: BufferedRecording if read was successful, None otherwise
+        """
+        if not self.is_connected() or num_samples <= 0:
+            return None
+        blocks = []
+        count = 0
+        while count < num_samples:
+            block = await self._read_block()
+            if block is None:
+                break
+            remaining = num_samples - count
+            if len(block[0]) > remaining:
+                self._backlog = (block[0][remaining:], block[1][remaining:])
+                block = (block[0][0:remaining], block[1][0:remaining])
+            blocks.append(block)
+            count += len(block[0])
+        if count == 0:
+            return None
+        return self._create_recording(blocks)
+
+    async def record_duration(self, duration: float, sample_rate: int):
+        """
+        Reads the number of samples in the specified time frame without blocking the event loop. The specified
+        sample rate has to be equal to the sample rate configured on the electronics interface using the DIP
+        switches.
+        :param duration: The duration in seconds
+        :param sample_rate: The sample rate set on the electronics interface
+        :return: BufferedRecording if read was successful, None otherwise
+        """
+        if self._clock.get_nominal_sample_rate() != sample_rate:
+            self.set_sample_rate(sample_rate)
+        return await self.record_samples(int(sample_rate * duration))
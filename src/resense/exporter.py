@@ -1,47 +1,134 @@
 from .recording import *
-from .io_util import _validate_name_and_extension
+from .recording import _NATIVE_EXTENSION
+from .io_util import _validate_name_and_extension, _get_bin_dtype, _encode_bin_header
+from . import metrics
+import numpy as np
 import pickle
-import json
-import struct
+
+_CHUNK_SIZE = 100000
+_EXPORT_SECONDS = metrics.histogram('resense_export_seconds', 'Duration of exporting a recording', ('format',))
+_EXPORTED_DATA_POINTS = metrics.counter('resense_export_data_points_total', 'Exported data points', ('format',))
+_CSV_HEADER = 'Timestamp,Fx,Fy,Fz,Mx,My,Mz\n'
+_CSV_ROW_FORMAT = '%d,%r,%r,%r,%r,%r,%r\n'
+_JSON_ROW_FORMAT = '[%d,%r,%r,%r,%r,%r,%r],'
+_JSON_TEMPERATURE_ROW_FORMAT = '[%d,%r,%r,%r,%r,%r,%r,%r],'
+
+
+def _get_columns(recording, start: int, end: int, with_temperature: bool = False) -> list:
+    columns = [recording.timestamps[start:end]] + [recording.values[start:end, column] for column in range(0, 6)]
+    if with_temperature:
+        columns.append(recording.temperatures[start:end])
+    return columns
+
+
+def _format_rows(columns: list, row_format: str) -> str:
+    """
+    Formats all rows with a single string formatting operation. row_format receives the values of all columns of
+    a row.
+    """
+    count = len(columns[0])
+    flat_values = [None] * (count * len(columns))
+    for index, column in enumerate(columns):
+        flat_values[index::len(columns)] = column.tolist()
+    return (row_format * count) % tuple(flat_values)
+
+
+def _write_csv_rows(file_output, recording):
+    for start in range(0, recording.get_data_point_count(), _CHUNK_SIZE):
+        file_output.write(_format_rows(_get_columns(recording, start, start + _CHUNK_SIZE), _CSV_ROW_FORMAT))
 
 
 def _export_recording_to_csv(recording, file_path):
     with open(file_path, 'w') as file_output:
-        file_output.writelines('Timestamp,Fx,Fy,Fz,Mx,My,Mz\n')
-        for data_set in recording.get_data_points():
-            f = data_set.force
-            t = data_set.torque
-            file_output.writelines("{},{},{},{},{},{},{}\n".format(
-                data_set.time_offset,
-                f.x, f.y, f.z,
-                t.x, t.y, t.z
-            ))
+        file_output.write(_CSV_HEADER)
+        _write_csv_rows(file_output, recording)
+
+
+def export_recording_chunks_to_csv(recordings, file_path: str):
+    """
+    Exports an iterable of recordings, e.g. the chunks yielded by iter_recording_chunks_from_csv() or
+    HEXSensor.iter_blocks(), to a single CSV file. Each recording is written as soon as it is received, so the
+    data never has to be held in memory at once.
+    :param recordings: An iterable of BufferedRecordings
+    :param file_path: The file to write to
+    """
+    with open(file_path, 'w') as file_output:
+        file_output.write(_CSV_HEADER)
+        for recording in recordings:
+            _write_csv_rows(file_output, recording)
+
+
+def _format_json_rows(columns: list) -> str:
+    row_format = _JSON_ROW_FORMAT if len(columns) == 7 else _JSON_TEMPERATURE_ROW_FORMAT
+    text = _format_rows(columns, row_format)
+    if not all(np.all(np.isfinite(column)) for column in columns[1:]):
+        # repr() writes nan and inf, JSON parsers expect NaN and Infinity
+        text = text.replace('nan', 'NaN').replace('inf', 'Infinity')
+    return text
 
 
 def _export_recording_to_json(recording, file_path):
-    raise Exception('export to json is not supported')
+    # each row contains the time stamp, six F/T values and the temperature if available
+    with_temperature = recording.temperatures is not None
+    count = recording.get_data_point_count()
+    with open(file_path, 'w') as file_output:
+        file_output.write('{"data": [')
+        for start in range(0, count, _CHUNK_SIZE):
+            text = _format_json_rows(_get_columns(recording, start, start + _CHUNK_SIZE, with_temperature))
+            # the last row must not be followed by a comma
+            file_output.write(text if start + _CHUNK_SIZE < count else text[0:-1])
+        file_output.write(']}')
 
 
 def _export_recording_to_pkl(recording, file_path):
-    raise Exception('export to pkl is not supported')
+    # rows are stored as lists of Python numbers like in pickle files written by FTE
+    with_temperature = recording.temperatures is not None
+    rows = np.empty((recording.get_data_point_count(), 8 if with_temperature else 7), dtype=object)
+    rows[:, 0] = recording.timestamps
+    rows[:, 1:7] = recording.values
+    if with_temperature:
+        rows[:, 7] = recording.temperatures
+    with open(file_path, 'wb') as file_output:
+        pickle.dump({'data': rows.tolist()}, file_output)
 
 
 def _export_recording_to_bin(recording, file_path):
-    raise Exception('export to bin is not supported')
+    with_temperature = recording.temperatures is not None
+    dtype = _get_bin_dtype(with_temperature)
+    count = recording.get_data_point_count()
+    with open(file_path, 'wb') as file_output:
+        file_output.write(_encode_bin_header(count, with_temperature))
+        for start in range(0, count, _CHUNK_SIZE):
+            end = start + _CHUNK_SIZE
+            data_sets = np.empty((min(end, count) - start,), dtype=dtype)
+            data_sets['timestamp'] = recording.timestamps[start:end]
+            data_sets['values'] = recording.values[start:end]
+            if with_temperature:
+                data_sets['temperature'] = recording.temperatures[start:end]
+            file_output.write(data_sets.tobytes())
 
 
 def export_recording_to_file(recording: BufferedRecording, file_path: str, file_extension: str = None):
     """
     Exports the recording to the specified file path. If file_extension is None, the file type will be detected
     from the file path. If file_extension is specified, it will determine the type of file written. If the
-    file type is not supported, an Exception will be raised. Recordings exported from this function can be
-    imported by FTE. Note that only export to CSV is supported in this version of Resense.py!
+    file type is not supported, an Exception will be raised. Supported file types are bin, dat (binary), json, csv,
+    pkl (pickle) and rsr (native format, see BufferedRecording.save()). Recordings exported to all file types
+    except rsr can be imported by FTE. Temperature values are written to all file types except csv if the recording
+    contains them.
     :param recording: The recording to write
     :param file_path: The file to write to
     :param file_extension: The file type. Default is None
     """
     file_extension = _validate_name_and_extension(file_path, file_extension)
+    start_time = metrics.start_timer()
+    _export_recording(recording, file_path, file_extension)
+    if start_time is not None:
+        _EXPORT_SECONDS.observe_since(start_time, (file_extension,))
+        _EXPORTED_DATA_POINTS.inc(recording.get_data_point_count(), (file_extension,))
+
 
+def _export_recording(recording: BufferedRecording, file_path: str, file_extension: str):
     if file_extension == 'csv':
         _export_recording_to_csv(recording, file_path)
     elif file_extension == 'json':
@@ -50,5 +137,7 @@ def export_recording_to_file(recording: BufferedRecording, file_path: str, file_
         _export_recording_to_pkl(recording, file_path)
     elif file_extension == 'bin' or file_extension == 'dat':
         _export_recording_to_bin(recording, file_path)
+    elif file_extension == _NATIVE_EXTENSION:
+        recording.save(file_path)
     else:
         raise Exception("extension not supported: ." + file_extension)
@@ -0,0 +1,179 @@
+import numpy as np
+
+# every frame consists of six little endian float32 values followed by four trailing bytes
+_FRAME_SIZE = 28
+_FRAME_DTYPE = np.dtype([('values', '<f4', (6,)), ('trailer', '<u4')])
+_TRAILER_OFFSET = 24
+# number of consecutive valid frames required to (re)synchronize
+_SYNC_FRAMES = 4
+
+
+def _decode_frames(buffer) -> np.ndarray:
+    """
+    Decodes all complete frames in the buffer at once without validating them. Trailing bytes which do not form a
+    complete frame are ignored.
+    :param buffer: The bytes read from the serial interface
+    :return: Array of shape (N, 6) containing the raw float32 values of each frame
+    """
+    frames = np.frombuffer(buffer, dtype=_FRAME_DTYPE, count=len(buffer) // _FRAME_SIZE)
+    return frames['values']
+
+
+class FrameSynchronizer:
+
+    def __init__(self, trailer: bytes = None):
+        """
+        Creates a framing layer for the 28 byte frames sent by the sensor electronics interface. Bytes are fed in
+        arbitrary chunks; complete frames are located by validating their trailing four bytes, which are constant
+        for all frames of a stream. If trailer is None, the trailing bytes are learned from the first frames of the
+        stream: the synchronizer searches for the alignment at which several consecutive frames end with identical
+        trailing bytes. Frames whose trailing bytes do not match are counted as corrupted and the synchronizer
+        searches for the next valid frame boundary. Note that only the trailing bytes are validated, corrupted values
+        in a frame with intact trailing bytes cannot be detected.
+        :param trailer: The expected four trailing bytes of every frame. Default None (learned)
+        """
+        if trailer is not None and len(trailer) != 4:
+            raise Exception("trailer has to consist of 4 bytes")
+        self._fixed_trailer = None if trailer is None else bytes(trailer)
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all buffered bytes and statistics. The next fed bytes are synchronized from scratch.
+        """
+        self._set_trailer(self._fixed_trailer)
+        self._pending = b''
+        self._synchronized = False
+        self._frame_count = 0
+        self._corrupted_frame_count = 0
+        self._discarded_byte_count = 0
+        self._resync_count = 0
+        self._gaps = []
+        # bytes discarded since a corrupted frame was detected, None if the stream is not being resynchronized
+        self._resync_byte_count = None
+
+    def is_synchronized(self) -> bool:
+        """
+        :return: True if the frame boundary is known
+        """
+        return self._synchronized
+
+    def get_pending_byte_count(self) -> int:
+        """
+        :return: The number of buffered bytes which do not form a complete frame yet
+        """
+        return len(self._pending)
+
+    def get_statistics(self) -> dict:
+        """
+        Returns the counters of this synchronizer: the number of decoded frames, the number of frames dropped due to
+        corruption, the number of bytes discarded while searching for frame boundaries and the number of times the
+        stream had to be resynchronized after the initial synchronization.
+        :return: Dictionary of counters
+        """
+        return {
+            'frames': self._frame_count,
+            'corrupted_frames': self._corrupted_frame_count,
+            'discarded_bytes': self._discarded_byte_count,
+            'resyncs': self._resync_count,
+        }
+
+    def get_gaps(self) -> list:
+        """
+        Returns the positions of the corrupted frames dropped by the last call of feed(): a list of tuples of the
+        number of valid frames returned before the gap and the number of dropped frames, e.g. to keep the sample
+        index of the following frames in step, see SampleClock.timestamp_block().
+        :return: List of tuples (position, count)
+        """
+        return self._gaps
+
+    def _set_trailer(self, trailer):
+        self._trailer = None if trailer is None else bytes(trailer)
+        self._trailer_word = None if trailer is None else np.frombuffer(self._trailer, dtype='<u4')[0]
+
+    def _trailers_match(self, buffer, position: int) -> bool:
+        trailers = np.frombuffer(buffer, dtype=_FRAME_DTYPE, count=_SYNC_FRAMES, offset=position)['trailer']
+        expected = trailers[0] if self._trailer is None else self._trailer_word
+        return bool(np.all(trailers == expected))
+
+    def _find_frame_boundary(self, buffer, position: int) -> tuple:
+        """
+        Searches for the first position at or after the specified position at which _SYNC_FRAMES consecutive valid
+        frames start. Returns a tuple of the found position (or None) and the position up to which bytes can be
+        discarded because no frame can start before it.
+        """
+        required = _SYNC_FRAMES * _FRAME_SIZE
+        if self._trailer is None:
+            # learn the trailer: try every alignment within one frame
+            for candidate in range(position, min(position + _FRAME_SIZE, len(buffer) - required + 1)):
+                if self._trailers_match(buffer, candidate):
+                    self._set_trailer(buffer[candidate + _TRAILER_OFFSET:candidate + _FRAME_SIZE])
+                    return candidate, candidate
+            return None, max(position, min(position + _FRAME_SIZE, len(buffer) - required + 1))
+        # the trailer is known: let bytes.find locate candidates instead of testing every byte
+        search = position + _TRAILER_OFFSET
+        while True:
+            index = buffer.find(self._trailer, search)
+            if index == -1:
+                return None, max(position, len(buffer) - _FRAME_SIZE + 1)
+            candidate = index - _TRAILER_OFFSET
+            if candidate + required > len(buffer):
+                return None, candidate
+            if self._trailers_match(buffer, candidate):
+                return candidate, candidate
+            search = index + 1
+
+    def feed(self, data) -> np.ndarray:
+        """
+        Feeds a chunk of received bytes into the synchronizer and returns the raw values of all complete and valid
+        frames. Incomplete frames are kept until the next call. Where corrupted frames were dropped is returned by
+        get_gaps().
+        :param data: The received bytes
+        :return: Array of shape (N, 6) containing the raw float32 values of each valid frame
+        """
+        buffer = self._pending + bytes(data)
+        blocks = []
+        self._gaps = []
+        valid_frames = 0
+        position = 0
+        while True:
+            if not self._synchronized:
+                sync_position, discard_position = self._find_frame_boundary(buffer, position)
+                self._discarded_byte_count += discard_position - position
+                if self._resync_byte_count is not None:
+                    self._resync_byte_count += discard_position - position
+                position = discard_position
+                if sync_position is None:
+                    break
+                self._synchronized = True
+                if self._resync_byte_count is not None:
+                    # the next frame boundary was found, possibly several chunks after the corrupted frame
+                    corrupted_count = max(1, (self._resync_byte_count + _FRAME_SIZE // 2) // _FRAME_SIZE)
+                    self._corrupted_frame_count += corrupted_count
+                    self._gaps.append((valid_frames, corrupted_count))
+                    self._resync_byte_count = None
+            count = (len(buffer) - position) // _FRAME_SIZE
+            if count == 0:
+                break
+            frames = np.frombuffer(buffer, dtype=_FRAME_DTYPE, count=count, offset=position)
+            invalid = np.flatnonzero(frames['trailer'] != self._trailer_word)
+            valid_count = count if len(invalid) == 0 else int(invalid[0])
+            blocks.append(frames['values'][0:valid_count])
+            self._frame_count += valid_count
+            valid_frames += valid_count
+            position += valid_count * _FRAME_SIZE
+            if valid_count == count:
+                break
+            # corrupted frame: skip at least one byte and search for the next frame boundary, which may only be
+            # found in one of the next chunks
+            self._synchronized = False
+            self._resync_count += 1
+            self._resync_byte_count = 1
+            self._discarded_byte_count += 1
+            position += 1
+        self._pending = buffer[position:]
+        if len(blocks) == 1:
+            return blocks[0]
+        if len(blocks) == 0:
+            return np.empty((0, 6), dtype=np.float32)
+        return np.concatenate(blocks)
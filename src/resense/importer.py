@@ -1,87 +1,249 @@
 from .recording import *
-from .io_util import _validate_name_and_extension
+from .recording import _NATIVE_EXTENSION
+from .io_util import _validate_name_and_extension, _BIN_HEADER_SIZE, _decode_bin_header, _get_bin_dtype, \
+    _map_bin_file
+from . import metrics
 import numpy as np
 import pickle
-import csv
-import json
-import struct
+import io
+import itertools
+import os
+import re
+
+_CSV_CHUNK_SIZE = 100000
+_CSV_DTYPE = np.dtype([('timestamp', '<i8'), ('values', '<f8', (6,))])
+_JSON_DTYPE = np.dtype([('timestamp', '<i8'), ('values', '<f8', (6,)), ('temperature', '<f8')])
+_JSON_BLOCK_SIZE = 1 << 23
+_IMPORT_SECONDS = metrics.histogram('resense_import_seconds', 'Duration of importing a recording', ('format',))
+_IMPORTED_DATA_POINTS = metrics.counter('resense_import_data_points_total', 'Imported data points', ('format',))
+_JSON_DATA_KEY = re.compile(r'"data"\s*:\s*\[')
+_WHITESPACE = {ord(character): None for character in ' \t\r\n'}
+# classes which may be loaded by the restricted unpickler: NumPy arrays and scalars (no code is executed by them)
+_SAFE_PICKLE_CLASSES = {
+    ('numpy.core.multiarray', '_reconstruct'), ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy.core.multiarray', 'scalar'), ('numpy._core.multiarray', 'scalar'),
+    ('numpy', 'ndarray'), ('numpy', 'dtype'),
+}
+
+
+def _get_csv_dialect(first_line: str) -> tuple:
+    # FTE writes either ',' separated cells with '.' as decimal separator or ';' separated cells with ','
+    csv_format = first_line.count(",") > first_line.count(";")
+    cell_separator = ',' if csv_format else ';'
+    dec_separator = '.' if csv_format else ','
+    return cell_separator, dec_separator
+
+
+def _parse_csv_lines(lines: list, cell_separator: str, dec_separator: str) -> np.ndarray:
+    text = ''.join(lines)
+    if dec_separator != '.':
+        text = text.replace(dec_separator, '.')
+    return np.loadtxt(io.StringIO(text), delimiter=cell_separator, usecols=range(0, 7), dtype=_CSV_DTYPE, ndmin=1)
+
+
+def iter_recording_chunks_from_csv(file_path: str, chunk_size: int = _CSV_CHUNK_SIZE):
+    """
+    Reads a CSV file in chunks of the specified number of rows and yields each chunk as a BufferedRecording. This
+    allows processing CSV files which do not fit into memory. Each chunk is parsed by a single NumPy call. Both
+    dialects written by FTE (',' separated cells with '.' as decimal separator and ';' separated cells with ','
+    as decimal separator) are detected from the header line.
+    :param file_path: The file to read from
+    :param chunk_size: The maximum number of data points per chunk. Default 100000
+    :return: Generator of BufferedRecordings
+    """
+    with open(file_path) as file_input:
+        cell_separator, dec_separator = _get_csv_dialect(file_input.readline())
+        while True:
+            lines = list(itertools.islice(file_input, chunk_size))
+            if len(lines) == 0:
+                break
+            data = _parse_csv_lines(lines, cell_separator, dec_separator)
+            if len(data) > 0:
+                yield BufferedRecording(timestamps=data['timestamp'], values=data['values'])
 
 
 def _import_recording_from_csv(file_path: str) -> BufferedRecording:
+    chunks = list(iter_recording_chunks_from_csv(file_path))
+    if len(chunks) == 0:
+        raise Exception("no data points given")
+    if len(chunks) == 1:
+        return chunks[0]
+    return BufferedRecording(timestamps=np.concatenate([chunk.timestamps for chunk in chunks]),
+                             values=np.concatenate([chunk.values for chunk in chunks]))
+
+
+def _parse_json_rows(text: str) -> np.ndarray:
+    """
+    Parses a sequence of JSON arrays without whitespace (e.g. '[1,2.0,...],[2,3.0,...]') by converting them to CSV
+    lines which are parsed by a single NumPy call. Each row contains a time stamp, six F/T values and optionally a
+    temperature value.
+    """
+    text = text.strip(',')
+    if len(text) == 0:
+        return np.empty((0,), dtype=_CSV_DTYPE)
+    with_temperature = text[0:text.find(']')].count(',') >= 7
+    lines = text[1:-1].replace('],[', '\n')
+    return np.loadtxt(io.StringIO(lines), delimiter=',', usecols=range(0, 8 if with_temperature else 7),
+                      dtype=_JSON_DTYPE if with_temperature else _CSV_DTYPE, ndmin=1)
+
+
+def _iter_json_row_blocks(file_input, block_size: int):
+    """
+    Reads the rows of the 'data' array of a JSON file block by block and yields the parsed rows of each block.
+    Rows are JSON arrays of numbers, so a row ends at the first ']' and the data array ends at ']]'.
+    """
+    buffer = ''
+    while True:
+        block = file_input.read(block_size)
+        buffer += block
+        match = _JSON_DATA_KEY.search(buffer)
+        if match is not None:
+            buffer = buffer[match.end():]
+            break
+        if len(block) == 0:
+            raise Exception("invalid json file: no data array found")
+        # keep the end of the buffer in case it contains the beginning of the key
+        buffer = buffer[-64:]
+    finished = False
+    while not finished:
+        buffer = buffer.translate(_WHITESPACE)
+        end = buffer.find(']]')
+        if buffer.startswith(']'):
+            break
+        if end != -1:
+            rows = buffer[0:end + 1]
+            finished = True
+        else:
+            last = buffer.rfind(']')
+            rows = buffer[0:last + 1]
+            buffer = buffer[last + 1:]
+        yield _parse_json_rows(rows)
+        if not finished:
+            block = file_input.read(block_size)
+            if len(block) == 0:
+                raise Exception("invalid json file: unexpected end of data array")
+            buffer += block
+
+
+def _create_recording_from_rows(data: np.ndarray) -> BufferedRecording:
+    temperatures = data['temperature'] if 'temperature' in data.dtype.names else None
+    return BufferedRecording(timestamps=data['timestamp'], values=data['values'], temperatures=temperatures)
+
+
+def iter_recording_chunks_from_json(file_path: str, block_size: int = _JSON_BLOCK_SIZE):
+    """
+    Reads the 'data' array of a JSON file exported by FTE incrementally and yields the rows of every block of
+    block_size characters as a BufferedRecording, so memory usage does not depend on the file size. The rows are
+    decoded into columns by a single NumPy call per block. A temperature value following the six F/T values is
+    kept.
+    :param file_path: The file to read from
+    :param block_size: The number of characters read at once. Default 8388608
+    :return: Generator of BufferedRecordings
+    """
     with open(file_path) as file_input:
-        first_line = file_input.readline()
-        csv_format = first_line.count(",") > first_line.count(";")
-        cell_separator = ',' if csv_format else ';'
-        dec_separator = '.' if csv_format else ','
-        data_reader = csv.reader(file_input, delimiter=cell_separator)
-        data_set_array = np.array([DataSet(int(data_row[0]),
-                                           ForceValue(data_row[1], data_row[2], data_row[3], True, dec_separator),
-                                           TorqueValue(data_row[4], data_row[5], data_row[6], True, dec_separator)
-                                           ) for data_row in data_reader])
-    return BufferedRecording(data_set_array)
+        for data in _iter_json_row_blocks(file_input, block_size):
+            if len(data) > 0:
+                yield _create_recording_from_rows(data)
 
 
 def _import_recording_from_json(file_path: str) -> BufferedRecording:
-    with open(file_path) as file_input:
-        json_content = json.load(file_input)
-        json_data = json_content['data']
-    data_set_array = np.array([DataSet(data_row[0],
-                                       ForceValue(data_row[1], data_row[2], data_row[3]),
-                                       TorqueValue(data_row[4], data_row[5], data_row[6])
-                                       ) for data_row in json_data])
-    return BufferedRecording(data_set_array)
+    chunks = list(iter_recording_chunks_from_json(file_path))
+    if len(chunks) == 0:
+        raise Exception("no data points given")
+    return chunks[0] if len(chunks) == 1 else concatenate_recordings(*chunks)
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
 
+    def find_class(self, module, name):
+        # plain lists, dicts and numbers do not require any class, everything else except NumPy arrays is rejected
+        if (module, name) in _SAFE_PICKLE_CLASSES:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError("unsafe pickle file: loading " + module + "." + name + " is not allowed")
 
-def _import_recording_from_pkl(file_path: str) -> BufferedRecording:
+
+def _import_recording_from_pkl(file_path: str, safe_pickle: bool = True) -> BufferedRecording:
     with open(file_path, 'rb') as file_input:
-        pickle_data = pickle.load(file_input)['data']
-    data_set_array = np.array([DataSet(data_row[0],
-                                       ForceValue(data_row[1], data_row[2], data_row[3]),
-                                       TorqueValue(data_row[4], data_row[5], data_row[6])
-                                       ) for data_row in pickle_data])
-    return BufferedRecording(data_set_array)
+        unpickler = _RestrictedUnpickler(file_input) if safe_pickle else pickle.Unpickler(file_input)
+        rows = unpickler.load()['data']
+    if len(rows) == 0:
+        raise Exception("no data points given")
+    # the time stamps are converted separately, since float64 cannot represent all int64 values
+    timestamps = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    data = np.array(rows, dtype=np.float64)
+    temperatures = data[:, 7].copy() if data.shape[1] > 7 else None
+    return BufferedRecording(timestamps=timestamps, values=data[:, 1:7].copy(), temperatures=temperatures)
 
 
 def _import_recording_from_bin(file_path: str) -> BufferedRecording:
     with open(file_path, 'rb') as file_input:
-        dataset_count = int.from_bytes(file_input.read(4), byteorder='big', signed=True)
-        has_temperature = dataset_count < 0
-        if dataset_count < 0:
-            dataset_count = -dataset_count
-        dataset_float_count = 7 if has_temperature else 6
-        data_store_temp = []
-        floats = [0] * 8
-        for i in range(0, dataset_count):
-            time_stamp = int.from_bytes(file_input.read(8), byteorder='big', signed=True)
-            for j in range(0, dataset_float_count):
-                floats[j] = struct.unpack('<f', file_input.read(4))[0]
-            data_store_temp.append(DataSet(time_stamp,
-                                           ForceValue(floats[0], floats[1], floats[2]),
-                                           TorqueValue(floats[3], floats[4], floats[5])
-                                           ))
-    data_set_array = np.array(data_store_temp)
-    return BufferedRecording(data_set_array)
-
-
-def import_recording_from_file(file_path: str, file_extension: str = None) -> BufferedRecording:
+        dataset_count, has_temperature = _decode_bin_header(file_input.read(_BIN_HEADER_SIZE))
+        dtype = _get_bin_dtype(has_temperature)
+        # check the size first, so that invalid files do not cause huge allocations
+        found_count = (os.fstat(file_input.fileno()).st_size - _BIN_HEADER_SIZE) // dtype.itemsize
+        if found_count < dataset_count:
+            raise Exception("invalid binary file: expected {} data sets, found {}".format(dataset_count, found_count))
+        data_sets = np.fromfile(file_input, dtype=dtype, count=dataset_count)
+    # the values are stored as float32, converting them to native float32 arrays is lossless
+    temperatures = data_sets['temperature'].astype(np.float32) if has_temperature else None
+    return BufferedRecording(timestamps=data_sets['timestamp'].astype(np.int64),
+                             values=data_sets['values'].astype(np.float32),
+                             temperatures=temperatures)
+
+
+def _map_recording_from_bin(file_path: str) -> BufferedRecording:
+    data_sets = _map_bin_file(file_path)
+    if len(data_sets) == 0:
+        raise Exception("no data points given")
+    temperatures = data_sets['temperature'] if 'temperature' in data_sets.dtype.names else None
+    return BufferedRecording(timestamps=data_sets['timestamp'], values=data_sets['values'], temperatures=temperatures)
+
+
+def import_recording_from_file(file_path: str, file_extension: str = None, memory_map: bool = False,
+                               safe_pickle: bool = True) -> BufferedRecording:
     """
     Imports the recording from the specified file path. If file_extension is None, the file type will be detected
     from the file path. If file_extension is specified, it will determine the file format which will be attempted to
     read. If the file type is not supported, an Exception will be raised. Supported file types are bin, dat (binary),
-    json, csv, pkl (pickle). This function is compatible with the recording files exported from FTE.
+    json, csv, pkl (pickle) and rsr (native format, see BufferedRecording.save()). This function is compatible with the
+    recording files exported from FTE.
+
+    If memory_map is True, binary files are not loaded but memory-mapped: the columns of the returned recording are
+    read-only views into the file, and only the pages of the accessed data points are read. Use get_sub_recording()
+    or get_data_points() to work with a part of a large file. The number of data points is derived from the file
+    size. memory_map is ignored for all other file types.
+
+    Pickle files can execute arbitrary code when they are loaded. If safe_pickle is True, pkl files are loaded by a
+    restricted unpickler which only accepts plain data (lists, dictionaries, numbers and NumPy arrays) as written by
+    FTE and the exporter. Only set safe_pickle to False for files from trusted sources.
     :param file_path: The file to read from
     :param file_extension: The file type. Default is None
+    :param memory_map: Whether to memory-map binary files instead of loading them. Default False
+    :param safe_pickle: Whether to load pkl files using the restricted unpickler. Default True
     :return: A BufferedRecording
     """
     file_extension = _validate_name_and_extension(file_path, file_extension)
+    start_time = metrics.start_timer()
+    recording = _import_recording(file_path, file_extension, memory_map, safe_pickle)
+    if start_time is not None:
+        _IMPORT_SECONDS.observe_since(start_time, (file_extension,))
+        _IMPORTED_DATA_POINTS.inc(recording.get_data_point_count(), (file_extension,))
+    return recording
+
+
+def _import_recording(file_path: str, file_extension: str, memory_map: bool, safe_pickle: bool) -> BufferedRecording:
+    if memory_map and (file_extension == 'bin' or file_extension == 'dat'):
+        return _map_recording_from_bin(file_path)
 
     if file_extension == 'csv':
         return _import_recording_from_csv(file_path)
     if file_extension == 'json':
         return _import_recording_from_json(file_path)
     if file_extension == 'pkl':
-        return _import_recording_from_pkl(file_path)
+        return _import_recording_from_pkl(file_path, safe_pickle)
     if file_extension == 'bin' or file_extension == 'dat':
         return _import_recording_from_bin(file_path)
+    if file_extension == _NATIVE_EXTENSION:
+        return BufferedRecording(file=file_path)
 
     raise Exception("extension not supported: ." + file_extension)
@@ -1,3 +1,11 @@
+import numpy as np
+import os
+
+# FTE binary files start with the number of data sets as a big endian int32. A negative count indicates that
+# every data set contains a temperature value.
+_BIN_HEADER_SIZE = 4
+
+
 def _validate_name_and_extension(file_path: str, file_extension: str = None) -> str:
     if file_path is None or len(file_path) == 0:
         raise Exception("no file_path provided")
@@ -8,3 +16,40 @@ def _validate_name_and_extension(file_path: str, file_extension: str = None) ->
             raise Exception("file path without extension provided")
         file_extension = file_path[(i + 1):]
     return file_extension
+
+
+def _get_bin_dtype(has_temperature: bool) -> np.dtype:
+    """
+    Returns the structured dtype of one data set in an FTE binary file: a big endian int64 time stamp followed by
+    six little endian float32 F/T values and an optional little endian float32 temperature.
+    """
+    fields = [('timestamp', '>i8'), ('values', '<f4', (6,))]
+    if has_temperature:
+        fields.append(('temperature', '<f4'))
+    return np.dtype(fields)
+
+
+def _encode_bin_header(count: int, has_temperature: bool) -> bytes:
+    return (-count if has_temperature else count).to_bytes(_BIN_HEADER_SIZE, byteorder='big', signed=True)
+
+
+def _decode_bin_header(header: bytes) -> tuple:
+    if len(header) < _BIN_HEADER_SIZE:
+        raise Exception("invalid binary file: missing header")
+    count = int.from_bytes(header[0:_BIN_HEADER_SIZE], byteorder='big', signed=True)
+    return abs(count), count < 0
+
+
+def _map_bin_file(file_path: str) -> np.ndarray:
+    """
+    Memory-maps the data sets of an FTE binary file as a structured array. The number of data sets is derived from
+    the file size, so files whose header was not updated (e.g. after a crash during recording) can be read as well.
+    An incomplete data set at the end of the file is ignored.
+    """
+    with open(file_path, 'rb') as file_input:
+        _, has_temperature = _decode_bin_header(file_input.read(_BIN_HEADER_SIZE))
+    dtype = _get_bin_dtype(has_temperature)
+    count = (os.path.getsize(file_path) - _BIN_HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return np.empty((0,), dtype=dtype)
+    return np.memmap(file_path, dtype=dtype, mode='r', offset=_BIN_HEADER_SIZE, shape=(count,))
@@ -0,0 +1,265 @@
+import threading
+import time
+from bisect import bisect_left
+
+# upper bounds of the default histogram buckets in seconds, from 10 µs to 10 s
+_DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# metrics are disabled by default: every update returns after checking this flag
+_enabled = False
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def enable_metrics():
+    """
+    Enables collecting metrics. Instrumented code (HEXSensor, importer and exporter) only updates metrics while
+    they are enabled, otherwise every update returns immediately.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable_metrics():
+    """
+    Disables collecting metrics. Collected values are kept until reset_metrics() is called.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_metrics_enabled() -> bool:
+    """
+    :return: True if metrics are collected
+    """
+    return _enabled
+
+
+def reset_metrics():
+    """
+    Discards the values of all metrics.
+    """
+    for metric in list(_registry.values()):
+        metric.reset()
+
+
+def start_timer():
+    """
+    Starts measuring a duration for Histogram.observe_since(). Returns None if metrics are disabled, so that
+    instrumented code does not read the clock in this case.
+    :return: The start time or None
+    """
+    return time.perf_counter() if _enabled else None
+
+
+def _format_labels(label_names: tuple, labels: tuple, extra: str = None) -> str:
+    pairs = ['{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+             for name, value in zip(label_names, labels)]
+    if extra is not None:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if len(pairs) > 0 else ''
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    _type = None
+
+    def __init__(self, name: str, description: str, label_names: tuple):
+        self._name = name
+        self._description = description
+        self._label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def get_name(self) -> str:
+        """
+        :return: The name of this metric
+        """
+        return self._name
+
+    def reset(self):
+        """
+        Discards all values of this metric.
+        """
+        with self._lock:
+            self._values = {}
+
+    def _get_samples(self) -> list:
+        with self._lock:
+            return [{'labels': dict(zip(self._label_names, labels)), 'value': value}
+                    for labels, value in self._values.items()]
+
+    def _get_prometheus_lines(self) -> list:
+        with self._lock:
+            return ['{}{} {}'.format(self._name, _format_labels(self._label_names, labels), _format_value(value))
+                    for labels, value in self._values.items()]
+
+    def to_dict(self) -> dict:
+        """
+        :return: Dictionary containing the type, description and samples of this metric
+        """
+        return {'type': self._type, 'help': self._description, 'samples': self._get_samples()}
+
+    def to_prometheus(self) -> str:
+        """
+        :return: This metric in the Prometheus text exposition format
+        """
+        lines = ['# HELP {} {}'.format(self._name, self._description), '# TYPE {} {}'.format(self._name, self._type)]
+        return '\n'.join(lines + self._get_prometheus_lines()) + '\n'
+
+
+class Counter(_Metric):
+    _type = 'counter'
+
+    def inc(self, amount=1, labels: tuple = ()):
+        """
+        Increases the counter if metrics are enabled.
+        :param amount: The amount to add. Default 1
+        :param labels: The values of the labels of this metric. Default ()
+        """
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    _type = 'gauge'
+
+    def set(self, value, labels: tuple = ()):
+        """
+        Sets the gauge if metrics are enabled.
+        :param value: The current value
+        :param labels: The values of the labels of this metric. Default ()
+        """
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    _type = 'histogram'
+
+    def __init__(self, name: str, description: str, label_names: tuple, buckets: tuple = _DEFAULT_BUCKETS):
+        super().__init__(name, description, label_names)
+        self._buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()):
+        """
+        Adds an observation, e.g. a duration in seconds, if metrics are enabled.
+        :param value: The observed value
+        :param labels: The values of the labels of this metric. Default ()
+        """
+        if not _enabled:
+            return
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # counts per bucket (the last one is +Inf), sum of all observations
+                state = [[0] * (len(self._buckets) + 1), 0.0]
+                self._values[labels] = state
+            state[0][bisect_left(self._buckets, value)] += 1
+            state[1] += value
+
+    def observe_since(self, start_time, labels: tuple = ()):
+        """
+        Adds the time elapsed since start_time in seconds, see start_timer(). Does nothing if start_time is None.
+        :param start_time: The value returned by start_timer()
+        :param labels: The values of the labels of this metric. Default ()
+        """
+        if start_time is not None:
+            self.observe(time.perf_counter() - start_time, labels)
+
+    def _get_cumulative_buckets(self, counts: list) -> list:
+        cumulative = []
+        total = 0
+        for bound, count in zip(self._buckets + (float('inf'),), counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def _get_samples(self) -> list:
+        with self._lock:
+            return [{'labels': dict(zip(self._label_names, labels)), 'count': sum(counts), 'sum': total,
+                     'buckets': dict(self._get_cumulative_buckets(counts))}
+                    for labels, (counts, total) in self._values.items()]
+
+    def _get_prometheus_lines(self) -> list:
+        lines = []
+        with self._lock:
+            for labels, (counts, total) in self._values.items():
+                for bound, count in self._get_cumulative_buckets(counts):
+                    bucket_labels = _format_labels(self._label_names, labels, 'le="' + _format_value(bound) + '"')
+                    lines.append('{}_bucket{} {}'.format(self._name, bucket_labels, count))
+                label_text = _format_labels(self._label_names, labels)
+                lines.append('{}_sum{} {}'.format(self._name, label_text, repr(total)))
+                lines.append('{}_count{} {}'.format(self._name, label_text, sum(counts)))
+        return lines
+
+
+def _register(metric_type, name: str, description: str, label_names: tuple, **arguments):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = metric_type(name, description, label_names, **arguments)
+            _registry[name] = metric
+        elif not isinstance(metric, metric_type):
+            raise Exception("metric " + name + " is already registered with another type")
+        return metric
+
+
+def counter(name: str, description: str, label_names: tuple = ()) -> Counter:
+    """
+    Returns the counter with the specified name, which is created if it does not exist yet.
+    :param name: The name of the metric, e.g. 'resense_sensor_bytes_read_total'
+    :param description: The description of the metric
+    :param label_names: The names of the labels of the metric. Default ()
+    :return: A Counter
+    """
+    return _register(Counter, name, description, label_names)
+
+
+def gauge(name: str, description: str, label_names: tuple = ()) -> Gauge:
+    """
+    Returns the gauge with the specified name, which is created if it does not exist yet.
+    :param name: The name of the metric
+    :param description: The description of the metric
+    :param label_names: The names of the labels of the metric. Default ()
+    :return: A Gauge
+    """
+    return _register(Gauge, name, description, label_names)
+
+
+def histogram(name: str, description: str, label_names: tuple = (), buckets: tuple = _DEFAULT_BUCKETS) -> Histogram:
+    """
+    Returns the histogram with the specified name, which is created if it does not exist yet.
+    :param name: The name of the metric
+    :param description: The description of the metric
+    :param label_names: The names of the labels of the metric. Default ()
+    :param buckets: The upper bounds of the buckets. Default 10 µs to 10 s
+    :return: A Histogram
+    """
+    return _register(Histogram, name, description, label_names, buckets=buckets)
+
+
+def get_metrics() -> dict:
+    """
+    Returns all registered metrics as a plain dictionary, see _Metric.to_dict().
+    :return: Dictionary mapping metric names to dictionaries
+    """
+    return {name: metric.to_dict() for name, metric in sorted(_registry.items())}
+
+
+def get_prometheus_text() -> str:
+    """
+    Returns all registered metrics in the Prometheus text exposition format, e.g. to be served by an HTTP endpoint
+    or written to a file for the node exporter textfile collector.
+    :return: The metrics as text
+    """
+    return ''.join(metric.to_prometheus() for name, metric in sorted(_registry.items()))
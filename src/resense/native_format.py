@@ -0,0 +1,141 @@
+import numpy as np
+import json
+import struct
+import zlib
+
+# A native recording file consists of
+#   - a fixed header: magic bytes, format version (uint16) and the length of the JSON header (uint32)
+#   - the JSON header: number of data points, chunk size, compression, column layout and recording metadata
+#   - the chunks: each chunk contains a range of rows, stored column by column
+#   - the chunk index: a JSON list containing the offset and stored size of every column of every chunk
+#   - a fixed trailer: the offset of the chunk index (uint64) followed by the index magic bytes
+# All integers in the fixed header and trailer as well as all column data are little endian.
+_MAGIC = b'RSREC\x00'
+_INDEX_MAGIC = b'RSRI'
+_FORMAT_VERSION = 1
+_FIXED_HEADER = struct.Struct('<6sHI')
+_TRAILER = struct.Struct('<Q4s')
+
+_DEFAULT_CHUNK_SIZE = 262144
+_COMPRESSION_LEVEL = 1
+_COMPRESSIONS = (None, 'zlib')
+
+
+def _is_native_file(file_path: str) -> bool:
+    with open(file_path, 'rb') as file_input:
+        return file_input.read(len(_MAGIC)) == _MAGIC
+
+
+def _get_column_layout(columns: dict) -> list:
+    return [{'name': name, 'dtype': column.dtype.newbyteorder('<').str, 'shape': list(column.shape[1:])}
+            for name, column in columns.items()]
+
+
+def _write_native_file(file_path: str, columns: dict, metadata: dict, compression: str = None,
+                       chunk_size: int = _DEFAULT_CHUNK_SIZE):
+    """
+    Writes columns of equal length and a dictionary of JSON serializable metadata to a native recording file.
+    Uncompressed columns are written directly from their memory, compressed columns are compressed chunk by chunk.
+    """
+    if compression not in _COMPRESSIONS:
+        raise Exception("unsupported compression: " + str(compression))
+    if chunk_size <= 0:
+        raise Exception("chunk_size has to be positive")
+    layout = _get_column_layout(columns)
+    count = len(next(iter(columns.values())))
+    header = json.dumps({
+        'count': count,
+        'chunk_size': chunk_size,
+        'compression': compression,
+        'columns': layout,
+        'metadata': metadata,
+    }).encode('utf-8')
+    index = []
+    with open(file_path, 'wb') as file_output:
+        file_output.write(_FIXED_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(header)))
+        file_output.write(header)
+        offset = _FIXED_HEADER.size + len(header)
+        for start in range(0, count, chunk_size):
+            sizes = []
+            for column, description in zip(columns.values(), layout):
+                data = np.ascontiguousarray(column[start:start + chunk_size], dtype=description['dtype'])
+                if compression == 'zlib':
+                    data = zlib.compress(data, _COMPRESSION_LEVEL)
+                file_output.write(data)
+                sizes.append(data.nbytes if isinstance(data, np.ndarray) else len(data))
+            index.append([offset, sizes])
+            offset += sum(sizes)
+        file_output.write(json.dumps(index).encode('utf-8'))
+        file_output.write(_TRAILER.pack(offset, _INDEX_MAGIC))
+
+
+def _read_native_header(file_input) -> dict:
+    fixed_header = file_input.read(_FIXED_HEADER.size)
+    if len(fixed_header) < _FIXED_HEADER.size:
+        raise Exception("invalid recording file: missing header")
+    magic, version, header_size = _FIXED_HEADER.unpack(fixed_header)
+    if magic != _MAGIC:
+        raise Exception("invalid recording file: not a native recording file")
+    if version > _FORMAT_VERSION:
+        raise Exception("recording file version " + str(version) + " is not supported by this version")
+    header = json.loads(file_input.read(header_size).decode('utf-8'))
+    header['version'] = version
+    return header
+
+
+def _read_native_index(file_input) -> list:
+    file_input.seek(-_TRAILER.size, 2)
+    index_end = file_input.tell()
+    index_offset, index_magic = _TRAILER.unpack(file_input.read(_TRAILER.size))
+    if index_magic != _INDEX_MAGIC:
+        raise Exception("invalid recording file: missing chunk index, the file may be incomplete")
+    file_input.seek(index_offset)
+    return json.loads(file_input.read(index_end - index_offset).decode('utf-8'))
+
+
+def _read_native_metadata(file_path: str) -> dict:
+    """
+    Reads only the JSON header of a native recording file.
+    """
+    with open(file_path, 'rb') as file_input:
+        return _read_native_header(file_input)
+
+
+def _read_native_file(file_path: str, start: int = 0, end: int = None) -> tuple:
+    """
+    Reads the rows between start and end of all columns of a native recording file. Only the chunks overlapping
+    this range are read. Uncompressed chunks are read directly into the resulting arrays. An Exception is raised if
+    the range is empty.
+    :return: Tuple of the JSON header and a dictionary of columns
+    """
+    with open(file_path, 'rb') as file_input:
+        header = _read_native_header(file_input)
+        index = _read_native_index(file_input)
+        count = header['count']
+        chunk_size = header['chunk_size']
+        start, end, _ = slice(start, end).indices(count)
+        if end <= start:
+            raise Exception("invalid data point range: " + str(start) + " to " + str(end) + " of " + str(count)
+                            + " data points")
+        layout = header['columns']
+        columns = [np.empty([end - start] + description['shape'], dtype=description['dtype'])
+                   for description in layout]
+        for chunk in range(start // chunk_size, (end + chunk_size - 1) // chunk_size):
+            chunk_start = chunk * chunk_size
+            chunk_rows = min(chunk_size, count - chunk_start)
+            first = max(start, chunk_start) - chunk_start
+            last = min(end, chunk_start + chunk_rows) - chunk_start
+            offset, sizes = index[chunk]
+            for column, size in zip(columns, sizes):
+                target = column[chunk_start + first - start:chunk_start + last - start]
+                if header['compression'] == 'zlib':
+                    file_input.seek(offset)
+                    data = zlib.decompress(file_input.read(size))
+                    rows = np.frombuffer(data, dtype=column.dtype).reshape((chunk_rows,) + column.shape[1:])
+                    target[...] = rows[first:last]
+                else:
+                    file_input.seek(offset + first * column.strides[0])
+                    if file_input.readinto(memoryview(target).cast('B')) != target.nbytes:
+                        raise Exception("invalid recording file: unexpected end of file")
+                offset += size
+    return header, {description['name']: column for description, column in zip(layout, columns)}
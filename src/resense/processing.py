@@ -0,0 +1,526 @@
+from .recording import *
+from abc import ABC, abstractmethod
+
+_DEFAULT_FIR_TAPS = 101
+_DEFAULT_TARE_SAMPLES = 100
+# number of samples filtered by one matrix product if scipy is not installed
+_IIR_BLOCK_SIZE = 128
+# scipy is optional: if it is installed, IIR filters use its compiled implementation. It is imported when the first
+# block is filtered, since importing it takes far longer than importing this package. False: not imported yet
+_scipy_signal = False
+
+
+def _get_scipy_signal():
+    global _scipy_signal
+    if _scipy_signal is False:
+        try:
+            from scipy import signal as _scipy_signal
+        except ImportError:
+            _scipy_signal = None
+    return _scipy_signal
+
+
+def _create_derived_recording(recording: BufferedRecording, timestamps: np.ndarray, values: np.ndarray,
+                              temperatures: np.ndarray = None) -> BufferedRecording:
+    derived = BufferedRecording(timestamps=timestamps, values=values, temperatures=temperatures)
+    derived._set_metadata(recording._get_metadata())
+    return derived
+
+
+def get_offset(recording: BufferedRecording, start_time: float, end_time: float) -> np.ndarray:
+    """
+    Returns the mean of all six F/T channels in the specified time frame, e.g. while the sensor was unloaded. The
+    time frame is specified in seconds relative to the first data point, see BufferedRecording.slice_time().
+    :param recording: The recording
+    :param start_time: Start time offset
+    :param end_time: End time offset
+    :return: Array of six offsets
+    """
+    window = recording.slice_time(start_time, end_time)
+    if window is None:
+        raise Exception("time frame contains no data points")
+    return window.values.mean(axis=0, dtype=np.float64)
+
+
+def tare(recording: BufferedRecording, start_time: float, end_time: float) -> BufferedRecording:
+    """
+    Returns a new recording whose values are offset so that the mean of every channel in the specified time frame
+    is zero, see get_offset(). The offset is subtracted from all data points at once.
+    :param recording: The recording
+    :param start_time: Start time offset
+    :param end_time: End time offset
+    :return: A new BufferedRecording
+    """
+    offset = get_offset(recording, start_time, end_time)
+    return _create_derived_recording(recording, recording.timestamps, recording.values - offset,
+                                     recording.temperatures)
+
+
+def _interpolate_recording(recording: BufferedRecording, timestamps: np.ndarray) -> BufferedRecording:
+    """
+    Linearly interpolates all columns of a recording at the specified time stamps, which have to be in the time
+    frame of the recording. The neighbours of all time stamps are found by a single binary search.
+    """
+    source = recording.get_array_of_timestamps(relative=False, seconds=False)
+    indices = np.clip(np.searchsorted(source, timestamps, side='right') - 1, 0, max(len(source) - 2, 0))
+    following = np.minimum(indices + 1, len(source) - 1)
+    distances = (source[following] - source[indices]).astype(np.float64)
+    weights = np.divide(timestamps - source[indices], distances, out=np.zeros(len(timestamps)),
+                        where=distances > 0)
+    values = recording.values[indices] * (1.0 - weights)[:, None] + recording.values[following] * weights[:, None]
+    temperatures = None
+    if recording.temperatures is not None:
+        temperatures = recording.temperatures[indices] * (1.0 - weights) + recording.temperatures[following] * weights
+    return _create_derived_recording(recording, timestamps, values, temperatures)
+
+
+def resample(recording: BufferedRecording, sample_rate: float, start_time: float = 0.0,
+             end_time: float = None) -> BufferedRecording:
+    """
+    Resamples a recording onto evenly spaced time stamps by linear interpolation. The new time stamps start at
+    start_time and end at or before end_time (in seconds relative to the first data point). Note that the recording
+    is not low-pass filtered, filter it before resampling to a lower sample rate.
+    :param recording: The recording
+    :param sample_rate: The new sample rate in Hz
+    :param start_time: Start time offset. Default 0.0
+    :param end_time: End time offset. Default None (end of the recording)
+    :return: A new BufferedRecording
+    """
+    if end_time is None or end_time > recording.get_time_duration():
+        end_time = recording.get_time_duration()
+    if end_time < start_time:
+        raise Exception("end_time has to be greater than start_time")
+    count = int((end_time - start_time) * sample_rate + 1e-9) + 1
+    timestamps = recording.first_time_offset + int(round(start_time * 1000000.0)) + \
+        (np.arange(count) * (1000000.0 / sample_rate)).astype(np.int64)
+    resampled = _interpolate_recording(recording, timestamps)
+    resampled.set_sample_rate(sample_rate)
+    return resampled
+
+
+class _Filter(ABC):
+
+    def __init__(self, channels: int):
+        self._channels = channels
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the filter state. The next block starts a new signal.
+        """
+        self._state = None
+
+    @abstractmethod
+    def _filter(self, values: np.ndarray) -> np.ndarray:
+        """
+        Filters a non-empty block of values of shape (N, channels) and updates the filter state.
+        """
+
+    def process_block(self, values) -> np.ndarray:
+        """
+        Filters a block of values. The filter state is carried over to the next block, so consecutive blocks of a
+        live stream are filtered as one continuous signal. The state is initialized from the first sample, as if
+        the signal had been constant before, which avoids a transient caused by static loads.
+        :param values: 2D array of shape (N, channels)
+        :return: 2D float64 array of shape (N, channels) containing the filtered values
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != self._channels:
+            raise Exception("values must be of shape (N, " + str(self._channels) + ")")
+        if len(values) == 0:
+            return values.copy()
+        return self._filter(values)
+
+    def process_recording(self, recording: BufferedRecording, reset: bool = True,
+                          zero_phase: bool = False) -> BufferedRecording:
+        """
+        Filters all F/T values of a recording. If reset is False, the filter state is carried over from the
+        previous call, e.g. to filter the blocks returned by HEXSensor.iter_blocks(). If zero_phase is True, the
+        values are filtered forwards and backwards, which cancels the delay of the filter. This is only possible
+        offline and implies reset.
+        :param recording: The recording
+        :param reset: Whether to reset the filter state first. Default True
+        :param zero_phase: Whether to filter forwards and backwards. Default False
+        :return: A new BufferedRecording
+        """
+        if reset or zero_phase:
+            self.reset()
+        values = self.process_block(recording.values)
+        if zero_phase:
+            self.reset()
+            values = self.process_block(values[::-1])[::-1]
+            self.reset()
+        return _create_derived_recording(recording, recording.timestamps, values, recording.temperatures)
+
+
+class FIRFilter(_Filter):
+
+    def __init__(self, taps, channels: int = 6):
+        """
+        Creates a finite impulse response filter with the specified coefficients, e.g. from design_fir_lowpass().
+        Every channel is filtered by a single convolution per block. The last len(taps) - 1 samples are kept as
+        filter state.
+        :param taps: 1D array of filter coefficients
+        :param channels: The number of channels. Default 6
+        """
+        self._taps = np.asarray(taps, dtype=np.float64)
+        if self._taps.ndim != 1 or len(self._taps) == 0:
+            raise Exception("taps must be a non-empty 1D array")
+        super().__init__(channels)
+
+    def get_taps(self) -> np.ndarray:
+        """
+        :return: The filter coefficients
+        """
+        return self._taps
+
+    def get_delay(self) -> float:
+        """
+        :return: The delay of a linear phase (symmetric) filter in samples
+        """
+        return (len(self._taps) - 1) / 2.0
+
+    def _filter(self, values: np.ndarray) -> np.ndarray:
+        if self._state is None:
+            self._state = np.repeat(values[0:1], len(self._taps) - 1, axis=0)
+        extended = np.concatenate((self._state, values))
+        filtered = np.empty(values.shape, dtype=np.float64)
+        for channel in range(0, self._channels):
+            filtered[:, channel] = np.convolve(extended[:, channel], self._taps, mode='valid')
+        self._state = extended[len(extended) - len(self._taps) + 1:]
+        return filtered
+
+
+def _get_companion_matrix(a: np.ndarray) -> np.ndarray:
+    """
+    Returns the matrix which advances the state of a transposed direct form II filter by one sample if the input is
+    0, i.e. state[n + 1] = companion @ state[n] + gain * input[n].
+    """
+    order = len(a) - 1
+    companion = np.zeros((order, order), dtype=np.float64)
+    companion[:, 0] = -a[1:]
+    companion[0:-1, 1:] = np.identity(order - 1)
+    return companion
+
+
+def _get_steady_state(b: np.ndarray, a: np.ndarray) -> np.ndarray:
+    """
+    Returns the state of a transposed direct form II filter whose input was constantly 1 (see scipy.signal.lfilter_zi).
+    """
+    order = len(a) - 1
+    if order == 0:
+        return np.empty((0,), dtype=np.float64)
+    return np.linalg.solve(np.identity(order) - _get_companion_matrix(a), b[1:] - a[1:] * b[0])
+
+
+def _get_sections(a: np.ndarray) -> list:
+    """
+    Factors the all-pole filter 1 / A(z) into a cascade of first order (real poles) and second order (pairs of
+    complex conjugate poles) sections and returns their denominators.
+    """
+    poles = np.roots(np.trim_zeros(a, 'b'))
+    sections = [np.array([1.0, -2.0 * pole.real, abs(pole) ** 2]) for pole in poles[poles.imag > 0]]
+    sections.extend(np.array([1.0, -pole.real]) for pole in poles[poles.imag == 0])
+    return sections
+
+
+def _get_block_matrices(b: np.ndarray, a: np.ndarray, block_size: int) -> tuple:
+    """
+    Returns the matrices which filter a block of up to block_size samples at once, used if scipy is not installed.
+    The powers of the companion matrix are only accurate for low orders, higher orders are split into sections.
+    With the state s before the block, the input x and the powers M^k of the companion matrix:
+        y = observation[0:n] @ s + impulse[0:n, 0:n] @ x
+        s' = powers[n] @ s + responses[n - 1::-1].T @ x
+    where observation[i] = (M^i)[0] maps the state to output i, impulse is the lower triangular Toeplitz matrix of
+    the impulse response and responses[k] = M^k @ gain is the effect of an input sample on the state k samples later.
+    """
+    order = len(a) - 1
+    companion = _get_companion_matrix(a)
+    gain = b[1:] - a[1:] * b[0]
+    powers = np.empty((block_size + 1, order, order), dtype=np.float64)
+    powers[0] = np.identity(order)
+    for index in range(0, block_size):
+        powers[index + 1] = companion @ powers[index]
+    responses = powers[0:block_size] @ gain
+    observation = powers[0:block_size, 0, :]
+    impulse_response = np.concatenate(([b[0]], responses[0:block_size - 1, 0]))
+    lags = np.arange(block_size)[:, None] - np.arange(block_size)[None, :]
+    impulse = np.where(lags >= 0, impulse_response[np.maximum(lags, 0)], 0.0)
+    return observation, impulse, powers, responses
+
+
+class IIRFilter(_Filter):
+
+    def __init__(self, b, a, channels: int = 6):
+        """
+        Creates an infinite impulse response filter with the specified numerator (b) and denominator (a)
+        coefficients, e.g. from design_butterworth(). If scipy is installed, blocks are filtered by
+        scipy.signal.lfilter. Otherwise, the numerator is applied as FIR filter followed by a cascade of first and
+        second order sections of the denominator, each of which filters all channels of 128 samples by one matrix
+        product (see _get_block_matrices()). This is slower than scipy but does not loop over samples in Python.
+        :param b: 1D array of numerator coefficients
+        :param a: 1D array of denominator coefficients
+        :param channels: The number of channels. Default 6
+        """
+        a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+        b = np.atleast_1d(np.asarray(b, dtype=np.float64))
+        if a[0] == 0:
+            raise Exception("a[0] must not be 0")
+        # normalize and pad both coefficient arrays to the same length
+        size = max(len(a), len(b))
+        self._a = np.zeros((size,), dtype=np.float64)
+        self._b = np.zeros((size,), dtype=np.float64)
+        self._a[0:len(a)] = a / a[0]
+        self._b[0:len(b)] = b / a[0]
+        self._steady_state = _get_steady_state(self._b, self._a)
+        self._block_matrices = None
+        super().__init__(channels)
+
+    def get_coefficients(self) -> tuple:
+        """
+        :return: The normalized coefficients (b, a)
+        """
+        return self._b, self._a
+
+    def _filter(self, values: np.ndarray) -> np.ndarray:
+        scipy_signal = _get_scipy_signal()
+        if scipy_signal is not None:
+            if self._state is None:
+                self._state = self._steady_state[:, None] * values[0][None, :]
+            filtered, self._state = scipy_signal.lfilter(self._b, self._a, values, axis=0, zi=self._state)
+            return filtered
+        if len(self._a) > 3:
+            # the state is the cascade of filters, each starts from the first sample it receives
+            if self._state is None:
+                self._state = [FIRFilter(self._b, self._channels)] + \
+                              [IIRFilter([1.0], section, self._channels) for section in _get_sections(self._a)]
+            for stage in self._state:
+                values = stage.process_block(values)
+            return values
+        if self._state is None:
+            self._state = self._steady_state[:, None] * values[0][None, :]
+        if len(self._a) == 1:
+            return values * self._b[0]
+        if self._block_matrices is None:
+            self._block_matrices = _get_block_matrices(self._b, self._a, _IIR_BLOCK_SIZE)
+        observation, impulse, powers, responses = self._block_matrices
+        filtered = np.empty(values.shape, dtype=np.float64)
+        state = self._state
+        for start in range(0, len(values), _IIR_BLOCK_SIZE):
+            block = values[start:start + _IIR_BLOCK_SIZE]
+            count = len(block)
+            filtered[start:start + count] = observation[0:count] @ state + impulse[0:count, 0:count] @ block
+            state = powers[count] @ state + responses[count - 1::-1].T @ block
+        self._state = state
+        return filtered
+
+
+def design_fir_lowpass(cutoff: float, sample_rate: float, num_taps: int = _DEFAULT_FIR_TAPS,
+                       channels: int = 6) -> FIRFilter:
+    """
+    Designs a linear phase low-pass FIR filter using the windowed sinc method (Hamming window). The filter has a
+    gain of 1 at 0 Hz and delays the signal by (num_taps - 1) / 2 samples.
+    :param cutoff: The cutoff frequency in Hz
+    :param sample_rate: The sample rate in Hz
+    :param num_taps: The number of coefficients, should be odd. Default 101
+    :param channels: The number of channels. Default 6
+    :return: An FIRFilter
+    """
+    if not 0 < cutoff < sample_rate / 2.0:
+        raise Exception("cutoff has to be between 0 and half the sample rate")
+    positions = np.arange(num_taps) - (num_taps - 1) / 2.0
+    taps = np.sinc(2.0 * cutoff / sample_rate * positions) * np.hamming(num_taps)
+    return FIRFilter(taps / taps.sum(), channels)
+
+
+def design_butterworth(cutoff: float, sample_rate: float, order: int = 2, highpass: bool = False,
+                       channels: int = 6) -> IIRFilter:
+    """
+    Designs a Butterworth low-pass or high-pass IIR filter using the bilinear transform. A high-pass filter can be
+    used to remove a slowly drifting offset. Orders above 8 are numerically unreliable.
+    :param cutoff: The cutoff (-3 dB) frequency in Hz
+    :param sample_rate: The sample rate in Hz
+    :param order: The filter order. Default 2
+    :param highpass: Whether to design a high-pass instead of a low-pass filter. Default False
+    :param channels: The number of channels. Default 6
+    :return: An IIRFilter
+    """
+    if not 0 < cutoff < sample_rate / 2.0:
+        raise Exception("cutoff has to be between 0 and half the sample rate")
+    # poles of the analog prototype with a cutoff of 1 rad/s
+    poles = np.exp(1j * np.pi * (2 * np.arange(order) + order + 1) / (2.0 * order))
+    warped = 2.0 * sample_rate * np.tan(np.pi * cutoff / sample_rate)
+    if highpass:
+        zeros = np.zeros((order,), dtype=complex)
+        poles = warped / poles
+        gain = 1.0
+    else:
+        zeros = np.empty((0,), dtype=complex)
+        poles = warped * poles
+        gain = warped ** order
+    # bilinear transform
+    factor = 2.0 * sample_rate
+    digital_zeros = np.concatenate(((factor + zeros) / (factor - zeros), -np.ones((order - len(zeros),))))
+    digital_poles = (factor + poles) / (factor - poles)
+    gain = gain * np.real(np.prod(factor - zeros) / np.prod(factor - poles))
+    return IIRFilter(gain * np.real(np.poly(digital_zeros)), np.real(np.poly(digital_poles)), channels)
+
+
+def decimate(recording: BufferedRecording, factor: int, anti_aliasing: bool = True) -> BufferedRecording:
+    """
+    Reduces the sample rate of a recording by keeping every factor-th data point. If anti_aliasing is True, the
+    values are low-pass filtered (zero phase) before, otherwise the new recording is a view of the original one.
+    :param recording: The recording
+    :param factor: The decimation factor
+    :param anti_aliasing: Whether to low-pass filter the values first. Default True
+    :return: A new BufferedRecording
+    """
+    return Decimator(factor, anti_aliasing).process_recording(recording, zero_phase=True)
+
+
+class Decimator:
+
+    def __init__(self, factor: int, anti_aliasing: bool = True, num_taps: int = _DEFAULT_FIR_TAPS):
+        """
+        Creates a stage which keeps every factor-th data point. If anti_aliasing is True, the values are low-pass
+        filtered by an FIR filter with a cutoff at 80% of the new Nyquist frequency first. The position within the
+        decimation pattern is carried over between blocks.
+        :param factor: The decimation factor
+        :param anti_aliasing: Whether to low-pass filter the values first. Default True
+        :param num_taps: The number of coefficients of the anti aliasing filter. Default 101
+        """
+        if factor < 1:
+            raise Exception("factor has to be at least 1")
+        self._factor = factor
+        self._filter = None
+        if anti_aliasing and factor > 1:
+            self._filter = design_fir_lowpass(0.4 / factor, 1.0, num_taps)
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the filter state and restarts the decimation pattern.
+        """
+        self._phase = 0
+        if self._filter is not None:
+            self._filter.reset()
+
+    def process_recording(self, recording: BufferedRecording, reset: bool = True,
+                          zero_phase: bool = False) -> BufferedRecording:
+        """
+        Decimates a recording or, if reset is False, the next block of a stream, see _Filter.process_recording().
+        :param recording: The recording
+        :param reset: Whether to reset the state first. Default True
+        :param zero_phase: Whether to filter forwards and backwards (offline only). Default False
+        :return: A new BufferedRecording, None if the block contains no retained data point
+        """
+        if reset or zero_phase:
+            self.reset()
+        if self._filter is not None:
+            recording = self._filter.process_recording(recording, reset=False, zero_phase=zero_phase)
+        indices = slice((-self._phase) % self._factor, None, self._factor)
+        self._phase = (self._phase + recording.get_data_point_count()) % self._factor
+        timestamps = recording.timestamps[indices]
+        if len(timestamps) == 0:
+            return None
+        temperatures = None if recording.temperatures is None else recording.temperatures[indices]
+        decimated = _create_derived_recording(recording, timestamps, recording.values[indices], temperatures)
+        if recording.get_sample_rate() is not None:
+            decimated.set_sample_rate(recording.get_sample_rate() / self._factor)
+        return decimated
+
+
+class Tare:
+
+    def __init__(self, offset=None, num_samples: int = _DEFAULT_TARE_SAMPLES):
+        """
+        Creates a stage which subtracts an offset from all six F/T channels. If offset is None, the offset is the
+        mean of the first num_samples samples of the stream, so the sensor should be unloaded when the stream
+        starts. Until num_samples samples were received, the mean of the samples received so far is used.
+        :param offset: Array of six offsets, e.g. from get_offset(). Default None (learned from the stream)
+        :param num_samples: The number of samples used to learn the offset. Default 100
+        """
+        self._fixed_offset = None if offset is None else np.asarray(offset, dtype=np.float64)
+        self._num_samples = num_samples
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the learned offset.
+        """
+        self._sum = np.zeros((6,), dtype=np.float64)
+        self._count = 0
+
+    def get_offset(self) -> np.ndarray:
+        """
+        :return: The current offset, None if it is learned and no samples were received yet
+        """
+        if self._fixed_offset is not None:
+            return self._fixed_offset
+        return self._sum / self._count if self._count > 0 else None
+
+    def process_block(self, values) -> np.ndarray:
+        """
+        Subtracts the offset from a block of values.
+        :param values: 2D array of shape (N, 6)
+        :return: 2D float64 array of shape (N, 6)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self._fixed_offset is None and self._count < self._num_samples and len(values) > 0:
+            learned = values[0:self._num_samples - self._count]
+            self._sum += learned.sum(axis=0)
+            self._count += len(learned)
+        offset = self.get_offset()
+        return values if offset is None else values - offset
+
+    def process_recording(self, recording: BufferedRecording, reset: bool = True) -> BufferedRecording:
+        """
+        Subtracts the offset from all F/T values of a recording or, if reset is False, the next block of a stream.
+        :param recording: The recording
+        :param reset: Whether to discard the learned offset first. Default True
+        :return: A new BufferedRecording
+        """
+        if reset:
+            self.reset()
+        return _create_derived_recording(recording, recording.timestamps, self.process_block(recording.values),
+                                         recording.temperatures)
+
+
+class Pipeline:
+
+    def __init__(self, stages: list):
+        """
+        Creates a chain of processing stages (e.g. Tare, FIRFilter, IIRFilter, Decimator) which are applied in the
+        given order. A pipeline can process whole recordings offline or the blocks of a live stream, e.g.
+        'for block in sensor.iter_blocks(): filtered = pipeline.process_recording(block, reset=False)'.
+        :param stages: A list of stages
+        """
+        self._stages = list(stages)
+
+    def get_stages(self) -> list:
+        """
+        :return: The stages of this pipeline
+        """
+        return self._stages
+
+    def reset(self):
+        """
+        Resets the state of all stages.
+        """
+        for stage in self._stages:
+            stage.reset()
+
+    def process_recording(self, recording: BufferedRecording, reset: bool = True) -> BufferedRecording:
+        """
+        Applies all stages to a recording or, if reset is False, to the next block of a stream.
+        :param recording: The recording
+        :param reset: Whether to reset the state of all stages first. Default True
+        :return: A new BufferedRecording, None if a Decimator retained no data point of the block
+        """
+        if reset:
+            self.reset()
+        for stage in self._stages:
+            recording = stage.process_recording(recording, reset=False)
+            if recording is None:
+                return None
+        return recording
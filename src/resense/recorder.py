@@ -0,0 +1,124 @@
+from .recording import *
+from .io_util import _get_bin_dtype, _encode_bin_header
+from .importer import import_recording_from_file
+import os
+import time
+
+_DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class StreamingRecorder:
+
+    def __init__(self, file_path: str, has_temperature: bool = False,
+                 flush_interval: float = _DEFAULT_FLUSH_INTERVAL):
+        """
+        Creates a recorder which appends blocks of samples to a file instead of keeping them in memory. The file
+        uses the FTE binary format (bin/dat), so it can be imported by FTE and the importer. Data sets have a fixed
+        size, so the file stays readable after a crash: the number of data sets in the header is updated every
+        flush_interval seconds, and load_streamed_recording() derives the number of data sets from the file size.
+        :param file_path: The file to write to. An existing file will be overwritten
+        :param has_temperature: Whether to store a temperature value for every data set. Default False
+        :param flush_interval: The interval in seconds in which data is flushed to disk. Default 1.0
+        """
+        self._file_path = file_path
+        self._has_temperature = has_temperature
+        self._dtype = _get_bin_dtype(has_temperature)
+        self._flush_interval = flush_interval
+        self._count = 0
+        self._file = open(file_path, 'wb')
+        self._file.write(_encode_bin_header(0, has_temperature))
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_file_path(self) -> str:
+        """
+        :return: The path of the file written by this recorder
+        """
+        return self._file_path
+
+    def get_data_point_count(self) -> int:
+        """
+        :return: The number of data points appended to this recorder
+        """
+        return self._count
+
+    def is_closed(self) -> bool:
+        """
+        :return: True if the recorder was closed
+        """
+        return self._file.closed
+
+    def append_block(self, timestamps: np.ndarray, values: np.ndarray, temperatures: np.ndarray = None):
+        """
+        Appends a block of samples to the file. The block is encoded with a single NumPy operation and written with
+        a single write call. Data is flushed to disk if the flush interval has elapsed.
+        :param timestamps: 1D array of microsecond time stamps
+        :param values: 2D array of shape (N, 6) containing the F/T values
+        :param temperatures: 1D array of temperature values, required if the recorder stores temperatures
+        """
+        data_sets = np.empty((len(timestamps),), dtype=self._dtype)
+        data_sets['timestamp'] = timestamps
+        data_sets['values'] = values
+        if self._has_temperature:
+            data_sets['temperature'] = np.nan if temperatures is None else temperatures
+        self._file.write(data_sets.tobytes())
+        first_block = self._count == 0
+        self._count += len(data_sets)
+        # the header of an empty file cannot indicate temperatures, so it is written as soon as data is available
+        if first_block or time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def append(self, recording: BufferedRecording):
+        """
+        Appends all data points of a recording to the file, see append_block().
+        :param recording: The recording to append
+        """
+        self.append_block(recording.timestamps, recording.values, recording.temperatures)
+
+    def flush(self):
+        """
+        Writes the current number of data sets to the header and flushes all data to disk.
+        """
+        self._file.flush()
+        self._file.seek(0)
+        self._file.write(_encode_bin_header(self._count, self._has_temperature))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Flushes all data and closes the file. Calling close on a closed recorder does nothing.
+        """
+        if self.is_closed():
+            return
+        self.flush()
+        self._file.close()
+
+    def get_recording(self) -> BufferedRecording:
+        """
+        Flushes all data and opens the file as a BufferedRecording, see load_streamed_recording().
+        :return: A BufferedRecording backed by the file
+        """
+        if not self.is_closed():
+            self.flush()
+        return load_streamed_recording(self._file_path)
+
+
+def load_streamed_recording(file_path: str) -> BufferedRecording:
+    """
+    Opens a file written by a StreamingRecorder (or any FTE binary file) as a BufferedRecording without loading it.
+    The columns of the recording are views into a memory mapping of the file, so only the accessed parts are read.
+    The number of data points is derived from the file size, so incomplete files can be opened as well.
+    :param file_path: The file to read from
+    :return: A BufferedRecording backed by the file
+    """
+    recording = import_recording_from_file(file_path, 'bin', memory_map=True)
+    recording.set_name(os.path.basename(file_path))
+    return recording
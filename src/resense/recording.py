@@ -4,6 +4,17 @@ import pickle
 import os
 from pathlib import Path
 from math import sqrt
+import fnmatch
+from .native_format import _is_native_file, _write_native_file, _read_native_file, _read_native_metadata, \
+    _DEFAULT_CHUNK_SIZE
+
+# file extension of the native recording file format used by BufferedRecording.save()
+_NATIVE_EXTENSION = 'rsr'
+# file extensions supported by import_recording_from_file()
+_RECORDING_EXTENSIONS = ('csv', 'json', 'pkl', 'bin', 'dat', _NATIVE_EXTENSION)
+# pickle streams written with protocol 2 or higher start with this byte. FTE binary files cannot, since their first
+# byte belongs to the number of data sets.
+_PICKLE_PROTOCOL_BYTE = b'\x80'
 
 
 class ForceValue:
@@ -55,12 +66,36 @@ class Direction(Enum):
     Z = 3
 
 
+_VALUE_COLUMNS = {
+    (Variable.FORCE, Direction.X): 0,
+    (Variable.FORCE, Direction.Y): 1,
+    (Variable.FORCE, Direction.Z): 2,
+    (Variable.TORQUE, Direction.X): 3,
+    (Variable.TORQUE, Direction.Y): 4,
+    (Variable.TORQUE, Direction.Z): 5,
+}
+
+
+def _to_microseconds(times) -> np.ndarray:
+    # round to the nearest microsecond: rounding up or down would turn float noise, e.g. 0.009 * 1000000.0 =
+    # 9000.000000000002, into an extra microsecond and include or exclude a data point at the boundary
+    return np.rint(np.asarray(times, dtype=np.float64) * 1000000.0).astype(np.int64)
+
+
+def _read_only_view(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
 class DataSet:
 
-    def __init__(self, time_offset: int = 0, force: ForceValue = None, torque: TorqueValue = None):
+    def __init__(self, time_offset: int = 0, force: ForceValue = None, torque: TorqueValue = None,
+                 temperature: float = None):
         self.time_offset = time_offset
         self.force = force
         self.torque = torque
+        self.temperature = temperature
 
     def get_time_stamp(self, seconds: bool = True) -> float:
         """
@@ -84,33 +119,143 @@ class DataSet:
         return delta / 1000000.0 if seconds else delta
 
 
-class BufferedRecording:
+class DataPointView:
 
-    def __init__(self, data_points: np.ndarray = None, file: str = None):
+    def __init__(self, recording, indices: range):
+        """
+        Creates a lazy, read-only sequence of the data points of a recording. No DataSet objects are stored,
+        they are created from the columns of the recording whenever an element is accessed.
+        :param recording: The BufferedRecording to read from
+        :param indices: The range of data point indices covered by this view
         """
-        Creates a new BufferedRecording. If data_points is not None, the recording will contain the specified data
-        points. If data_points is None and file is not None, the recording will be imported from a binary file format.
-        Note that this file format IS NOT compatible with the importer, exporter or FTE! If the number of data points
-        is 0 an Exception will be raised. If both data_points and file are None an Exception will be raised.
+        self._recording = recording
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return DataPointView(self._recording, self._indices[key])
+        return self._recording._create_data_set(self._indices[key])
+
+    def __iter__(self):
+        for index in self._indices:
+            yield self._recording._create_data_set(index)
+
+    def _get_columns(self) -> tuple:
+        recording = self._recording
+        if self._indices.step > 0:
+            indices = slice(self._indices.start, self._indices.stop, self._indices.step)
+        else:
+            indices = np.array(self._indices, dtype=np.intp)
+        temperatures = None if recording.temperatures is None else recording.temperatures[indices]
+        return recording.timestamps[indices], recording.values[indices], temperatures
+
+
+def _columns_from_data_points(data_points, dtype) -> tuple:
+    if isinstance(data_points, DataPointView):
+        timestamps, values, temperatures = data_points._get_columns()
+        return timestamps, values.astype(dtype, copy=False), temperatures
+
+    count = len(data_points)
+    timestamps = np.fromiter((point.time_offset for point in data_points), dtype=np.int64, count=count)
+    values = np.array([(point.force.x, point.force.y, point.force.z,
+                        point.torque.x, point.torque.y, point.torque.z) for point in data_points], dtype=dtype)
+    temperature_list = [getattr(point, 'temperature', None) for point in data_points]
+    if all(temperature is None for temperature in temperature_list):
+        return timestamps, values.reshape((count, 6)), None
+    temperatures = np.array([np.nan if temperature is None else temperature for temperature in temperature_list],
+                            dtype=dtype)
+    return timestamps, values.reshape((count, 6)), temperatures
+
+
+class BufferedRecording:
+
+    def __init__(self, data_points=None, file: str = None, timestamps: np.ndarray = None,
+                 values: np.ndarray = None, temperatures: np.ndarray = None, dtype=np.float64,
+                 allow_pickle: bool = False):
+        """
+        Creates a new BufferedRecording. The recording is stored column by column: an int64 array of microsecond
+        time stamps, a (N, 6) array of Fx, Fy, Fz, Mx, My, Mz values and an optional temperature column.
+
+        If timestamps and values are not None, the recording will use these arrays as its columns without copying
+        them. If data_points is not None, the recording will contain the specified data points (DataSet objects),
+        which are converted to columns of the specified dtype (float32 or float64). If data_points and timestamps
+        are None and file is not None, the recording will be loaded from a file written by save(). Note that this
+        file format IS NOT compatible with FTE! Files saved by Resense.py 0.0.3 or earlier are pickled objects.
+        Unpickling can execute arbitrary code, so they are only loaded if allow_pickle is True. Only load such files
+        from trusted sources. If the number of data points is 0 an Exception will be raised. If data_points,
+        timestamps and file are None an Exception will be raised.
         :param data_points: The data points of this recording. Default None
         :param file: The file to read from. Default None
-        """
-        if data_points is None and file is None:
-            raise Exception('specify either data_points or input_file')
-        if data_points is not None:
-            self.data_points = data_points
-            self.name = ""
+        :param timestamps: 1D array of microsecond time stamps. Default None
+        :param values: 2D array of shape (N, 6) containing the F/T values. Default None
+        :param temperatures: Optional 1D array of temperature values. Default None
+        :param dtype: The floating point type used when converting data points. Default float64
+        :param allow_pickle: Whether to load pickled recordings saved by previous versions. Default False
+        """
+        self.name = ""
+        self.sample_rate = None
+        self.sensor_id = None
+        self.calibration_matrix = None
+        if timestamps is not None or values is not None:
+            if timestamps is None or values is None:
+                raise Exception('specify both timestamps and values')
+            self.timestamps = np.asarray(timestamps)
+            self.values = np.asarray(values)
+            self.temperatures = None if temperatures is None else np.asarray(temperatures)
+        elif data_points is not None:
+            self.timestamps, self.values, self.temperatures = _columns_from_data_points(data_points, dtype)
+        elif file is not None:
+            if _is_native_file(file):
+                header, columns = _read_native_file(file)
+                self.timestamps = columns['timestamps']
+                self.values = columns['values']
+                self.temperatures = columns.get('temperatures')
+                self._set_metadata(header['metadata'])
+            elif allow_pickle:
+                with open(file, 'rb') as fin:
+                    obj = pickle.load(fin)
+                state = obj.__dict__
+                if 'timestamps' in state:
+                    self.timestamps = state['timestamps']
+                    self.values = state['values']
+                    self.temperatures = state.get('temperatures')
+                else:
+                    self.timestamps, self.values, self.temperatures = _columns_from_data_points(
+                        state['data_points'], dtype)
+            else:
+                raise Exception(file + " is not a recording file, set allow_pickle to load files saved by "
+                                       "previous versions")
+            if len(self.name) == 0:
+                self.name = os.path.basename(file)
         else:
-            with open(file, 'rb') as fin:
-                obj = pickle.load(fin)
-            self.data_points = obj.data_points
-            self.name = os.path.basename(file)
+            raise Exception('specify either data_points, timestamps and values or input_file')
 
-        if len(self.data_points) == 0:
+        if len(self.timestamps) == 0:
             raise Exception("no data points given")
+        if self.values.shape != (len(self.timestamps), 6):
+            raise Exception("values must be of shape (N, 6)")
+        if self.temperatures is not None and len(self.temperatures) != len(self.timestamps):
+            raise Exception("temperatures must be of the same length as timestamps")
+
+        self.first_time_offset = int(self.timestamps[0])
+        self.length = len(self.timestamps)
+        self._timestamp_cache = {}
+        self._buffers = None
 
-        self.first_time_offset = self.data_points[0].time_offset
-        self.length = len(self.data_points)
+    @property
+    def data_points(self) -> DataPointView:
+        """
+        :return: A lazy view of all data points in this recording
+        """
+        return DataPointView(self, range(self.length))
+
+    def _create_data_set(self, index: int) -> DataSet:
+        fx, fy, fz, tx, ty, tz = self.values[index].tolist()
+        temperature = None if self.temperatures is None else float(self.temperatures[index])
+        return DataSet(int(self.timestamps[index]), ForceValue(fx, fy, fz), TorqueValue(tx, ty, tz), temperature)
 
     def set_name(self, name: str):
         """
@@ -125,6 +270,60 @@ class BufferedRecording:
         """
         return self.name
 
+    def set_sample_rate(self, sample_rate: float):
+        """
+        Sets the sample rate the recording was recorded with. It is stored as metadata and not used to calculate
+        time stamps.
+        :param sample_rate: The sample rate in Hz
+        """
+        self.sample_rate = sample_rate
+
+    def get_sample_rate(self) -> float:
+        """
+        :return: The sample rate the recording was recorded with, None if not known
+        """
+        return self.sample_rate
+
+    def set_sensor_id(self, sensor_id: str):
+        """
+        Sets an identifier of the sensor the recording was recorded with, e.g. the com port or serial number.
+        :param sensor_id: The sensor identifier
+        """
+        self.sensor_id = sensor_id
+
+    def get_sensor_id(self) -> str:
+        """
+        :return: The identifier of the sensor the recording was recorded with, None if not known
+        """
+        return self.sensor_id
+
+    def set_calibration_matrix(self, matrix):
+        """
+        Sets the calibration matrix which was applied to the values of this recording. The values are not changed.
+        :param matrix: Array of shape (6, 6)
+        """
+        self.calibration_matrix = None if matrix is None else np.array(matrix, dtype=np.float64).reshape((6, 6))
+
+    def get_calibration_matrix(self) -> np.ndarray:
+        """
+        :return: The calibration matrix which was applied to the values of this recording, None if not known
+        """
+        return self.calibration_matrix
+
+    def _get_metadata(self) -> dict:
+        return {
+            'name': self.name,
+            'sample_rate': self.sample_rate,
+            'sensor_id': self.sensor_id,
+            'calibration_matrix': None if self.calibration_matrix is None else self.calibration_matrix.tolist(),
+        }
+
+    def _set_metadata(self, metadata: dict):
+        self.name = metadata.get('name', '')
+        self.sample_rate = metadata.get('sample_rate')
+        self.sensor_id = metadata.get('sensor_id')
+        self.set_calibration_matrix(metadata.get('calibration_matrix'))
+
     def get_time_duration(self, seconds: bool = True) -> float:
         """
         Returns the duration of this recording. If seconds is True, the return value will be in seconds,
@@ -132,8 +331,7 @@ class BufferedRecording:
         :param seconds: Whether to return seconds or microseconds.
         :return: The duration of this recording
         """
-        last_index = len(self.data_points) - 1
-        duration_micro_seconds = self.data_points[last_index].time_offset - self.first_time_offset
+        duration_micro_seconds = int(self.timestamps[-1]) - self.first_time_offset
         return duration_micro_seconds / 1000000.0 if seconds else duration_micro_seconds
 
     def get_average_frequency(self) -> float:
@@ -159,70 +357,117 @@ class BufferedRecording:
         """
         if index < 0 or index >= self.length:
             return None
-        return self.data_points[index]
+        return self._create_data_set(index)
 
-    def _get_data_point_offset_seconds(self, data_point: DataSet, seconds: bool = True):
-        return data_point.get_time_offset(self.first_time_offset, seconds)
-
-    def get_array_of_timestamps(self, relative: bool = True, seconds: bool = True):
+    def get_array_of_timestamps(self, relative: bool = True, seconds: bool = True) -> np.ndarray:
         """
         Returns a numpy array containing the time stamps of all data sets in this recording. If relative is False,
         all time stamps will be absolute values as they were imported or received from the system clock. If relative
         is True, all time values will be a time offset relative to the first data point in this recording. If
-        seconds is True, the resulting time values will be in seconds, microseconds otherwise.
+        seconds is True, the resulting time values will be in seconds, microseconds otherwise. The returned array is
+        read-only: absolute microseconds are a view of the time stamp column, all other variants are computed once
+        and cached.
         :param relative: Whether to return relative values
         :param seconds: Whether to return seconds or microseconds
         :return: A numpy array of time values
         """
-        return np.array([
-            (self._get_data_point_offset_seconds(point, seconds) if relative else point.get_time_stamp(seconds))
-            for point in self.data_points])
+        if not relative and not seconds:
+            return _read_only_view(self.timestamps)
+        key = (relative, seconds)
+        cached = self._timestamp_cache.get(key)
+        if cached is None:
+            time_stamps = self.timestamps - self.first_time_offset if relative else self.timestamps
+            if seconds:
+                time_stamps = time_stamps / 1000000.0
+            cached = _read_only_view(time_stamps)
+            self._timestamp_cache[key] = cached
+        return cached
 
     def get_array_of_values(self, variable: Variable, direction: Direction) -> np.ndarray:
         """
         Returns a 1D numpy array containing floating point values from all data points. In this process only one
-        of the measurements (force/torque) and one dimension (x/y/z) is selected from each data point.
+        of the measurements (force/torque) and one dimension (x/y/z) is selected from each data point. The returned
+        array is a read-only view of the recording data.
         :param variable: Force/Torque
         :param direction: X/Y/Z
         :return: 1D numpy array
         """
-        if variable is Variable.FORCE:
-            if direction is Direction.X:
-                return np.array([point.force.x for point in self.data_points])
-            elif direction is Direction.Y:
-                return np.array([point.force.y for point in self.data_points])
-            elif direction is Direction.Z:
-                return np.array([point.force.z for point in self.data_points])
-        elif variable is Variable.TORQUE:
-            if direction is Direction.X:
-                return np.array([point.torque.x for point in self.data_points])
-            elif direction is Direction.Y:
-                return np.array([point.torque.y for point in self.data_points])
-            elif direction is Direction.Z:
-                return np.array([point.torque.z for point in self.data_points])
+        column = _VALUE_COLUMNS.get((variable, direction))
+        if column is None:
+            return None
+        return _read_only_view(self.values[:, column])
 
     def get_array_of_vectors(self, variable: Variable) -> np.ndarray:
         """
         Returns a 2D numpy array. Each row represents the force/torque (specified by the variable parameter) value
-        of one data set. Each column contains the corresponding X/Y/Z value.
+        of one data set. Each column contains the corresponding X/Y/Z value. The returned array is a read-only view
+        of the recording data.
         :param variable: Force/Torque
         :return: 2D numpy array
         """
         if variable is Variable.FORCE:
-            return np.array([[point.torque.data_point, point.torque.y, point.torque.z] for point in self.data_points])
-        elif variable is Variable.FORCE:
-            return np.array([[point.force.data_point, point.force.y, point.force.z] for point in self.data_points])
+            return _read_only_view(self.values[:, 0:3])
+        elif variable is Variable.TORQUE:
+            return _read_only_view(self.values[:, 3:6])
 
-    def get_data_points(self, start=0, end=None) -> np.ndarray:
+    def get_ft_matrix(self) -> np.ndarray:
+        """
+        Returns a read-only view of all F/T values as a 2D numpy array of shape (N, 6). The columns contain
+        Fx, Fy, Fz, Mx, My, Mz.
+        :return: 2D numpy array
         """
-        Returns a 1D numpy array of all data points.
+        return _read_only_view(self.values)
+
+    def get_data_points(self, start=0, end=None) -> DataPointView:
+        """
+        Returns a lazy view of all data points between the start and end offset. The view behaves like a read-only
+        sequence and creates DataSet objects only when they are accessed.
         :param start: Start offset
         :param end: End offset
-        :return: 1D numpy array
+        :return: A DataPointView
         """
         if end is None:
             end = self.get_data_point_count()
-        return np.array(self.data_points[start:end])
+        return DataPointView(self, range(self.length)[start:end])
+
+    def get_sub_recording(self, start=0, end=None):
+        """
+        Returns a new recording containing the data points between the start and end offset. The columns of the new
+        recording are views of the columns of this recording, so no data is copied. For memory-mapped recordings
+        only the accessed parts of the file are read.
+        :param start: Start offset
+        :param end: End offset
+        :return: A BufferedRecording
+        """
+        if end is None:
+            end = self.get_data_point_count()
+        indices = slice(start, end)
+        temperatures = None if self.temperatures is None else self.temperatures[indices]
+        recording = BufferedRecording(timestamps=self.timestamps[indices], values=self.values[indices],
+                                      temperatures=temperatures)
+        recording._set_metadata(self._get_metadata())
+        return recording
+
+    def _get_search_timestamps(self) -> np.ndarray:
+        """
+        Returns the time stamp column as native int64 array for binary searches. Columns of other types, e.g.
+        big endian columns of memory-mapped files, are converted once and cached.
+        """
+        if self.timestamps.dtype == np.int64:
+            return self.timestamps
+        cached = self._timestamp_cache.get('search')
+        if cached is None:
+            cached = _read_only_view(self.timestamps.astype(np.int64))
+            self._timestamp_cache['search'] = cached
+        return cached
+
+    def _get_time_window_bounds(self, start_times, end_times) -> tuple:
+        # time offsets are converted to integer microseconds, so that the time stamp column is not converted
+        start_us = _to_microseconds(start_times)
+        end_us = _to_microseconds(end_times)
+        timestamps = self._get_search_timestamps()
+        return (np.searchsorted(timestamps, start_us + self.first_time_offset, side='left'),
+                np.searchsorted(timestamps, end_us + self.first_time_offset, side='left'))
 
     def get_data_point_indices_for_time_frame(self, start_time: float, end_time: float) -> tuple:
         """
@@ -230,53 +475,246 @@ class BufferedRecording:
         timestamp is at least start_time after the timestamp of the first data point. The second index represents
         the last data point in this recording whose timestamp is at most end_time after the timestamp of the first
         data point. Both time intervals are specified in seconds. If any index or time offset is out of this
-        recordings bounds, (-1,-1) is returned.
+        recordings bounds or the time frame contains no data points, (-1,-1) is returned. The indices are found by a
+        binary search, so the time stamps have to be in ascending order.
         :param start_time: Start time offset
         :param end_time: End time offset
         :return: The time frame converted to indices
         """
-        if self.get_data_point_count() == 0:
+        if start_time < 0 or end_time > self.get_time_duration():
             return -1, -1
+        timestamps = self._get_search_timestamps()
+        start_index = int(np.searchsorted(timestamps, int(_to_microseconds(start_time)) + self.first_time_offset,
+                                          side='left'))
+        end_index = int(np.searchsorted(timestamps, int(_to_microseconds(end_time)) + self.first_time_offset,
+                                        side='right')) - 1
+        if start_index >= self.length or end_index < start_index:
+            return -1, -1
+        return start_index, end_index
+
+    def get_time_window_indices(self, start_times, end_times) -> tuple:
+        """
+        Converts many time windows to index ranges at once. Each window contains the data points whose time stamps
+        are at least start_time and less than end_time after the time stamp of the first data point, so consecutive
+        windows do not overlap. The times are specified in seconds and rounded to the nearest microsecond. Windows
+        are clipped to the bounds of this recording. The indices are found by a vectorized binary search, so the time stamps have to be in ascending
+        order.
+        :param start_times: 1D array of window start time offsets
+        :param end_times: 1D array of window end time offsets
+        :return: A tuple of two int arrays containing the start index and the end index (exclusive) of each window
+        """
+        return self._get_time_window_bounds(start_times, end_times)
+
+    def slice_time(self, start_time: float, end_time: float = None):
+        """
+        Returns a new recording containing the data points whose time stamps are at least start_time and less than
+        end_time after the time stamp of the first data point, see get_time_window_indices(). The times are specified
+        in seconds. Like get_sub_recording(), no data is copied.
+        :param start_time: Start time offset
+        :param end_time: End time offset. Default None (end of the recording)
+        :return: A BufferedRecording or None if the time frame contains no data points
+        """
+        if end_time is None:
+            start_index = self._get_time_window_bounds(start_time, start_time)[0]
+            end_index = self.length
+        else:
+            start_index, end_index = self._get_time_window_bounds(start_time, end_time)
+        if end_index <= start_index:
+            return None
+        return self.get_sub_recording(int(start_index), int(end_index))
+
+    def slice_time_windows(self, start_times, end_times) -> list:
+        """
+        Slices many time windows at once, see slice_time() and get_time_window_indices().
+        :param start_times: 1D array of window start time offsets
+        :param end_times: 1D array of window end time offsets
+        :return: A list containing a BufferedRecording (or None for empty windows) for each window
+        """
+        start_indices, end_indices = self._get_time_window_bounds(start_times, end_times)
+        return [self.get_sub_recording(start, end) if end > start else None
+                for start, end in zip(start_indices.tolist(), end_indices.tolist())]
+
+    def append_block(self, timestamps: np.ndarray, values: np.ndarray, temperatures: np.ndarray = None):
+        """
+        Appends a block of data points to this recording. The columns are copied into buffers which grow by doubling
+        their capacity, so appending many blocks takes linear time in total. Recordings and arrays returned before
+        are not changed. If only this recording or only the block contains temperatures, the missing temperatures
+        are NaN.
+        :param timestamps: 1D array of microsecond time stamps
+        :param values: 2D array of shape (N, 6) containing the F/T values
+        :param temperatures: Optional 1D array of temperature values. Default None
+        """
+        values = np.asarray(values)
+        if values.shape != (len(timestamps), 6):
+            raise Exception("values must be of shape (N, 6)")
+        if temperatures is not None and len(temperatures) != len(timestamps):
+            raise Exception("temperatures must be of the same length as timestamps")
+        if len(timestamps) == 0:
+            return
+        if temperatures is not None and self.temperatures is None:
+            self.temperatures = np.full((self.length,), np.nan, dtype=np.result_type(temperatures, np.float32))
+            self._buffers = None
+        start = self.length
+        end = start + len(timestamps)
+        columns = {'timestamps': self.timestamps, 'values': self.values, 'temperatures': self.temperatures}
+        dtypes = {'timestamps': np.int64, 'values': np.result_type(self.values, values, np.float32),
+                  'temperatures': None if self.temperatures is None else np.result_type(self.temperatures, np.float32)}
+        if self._buffers is None or end > len(self._buffers['timestamps']) or \
+                any(buffer.dtype != dtypes[name] for name, buffer in self._buffers.items()):
+            capacity = max(end, 2 * start)
+            self._buffers = {name: _grow_column(column, start, capacity, dtypes[name])
+                             for name, column in columns.items() if column is not None}
+        self._buffers['timestamps'][start:end] = timestamps
+        self._buffers['values'][start:end] = values
+        if 'temperatures' in self._buffers:
+            self._buffers['temperatures'][start:end] = np.nan if temperatures is None else temperatures
+        self.timestamps = self._buffers['timestamps'][0:end]
+        self.values = self._buffers['values'][0:end]
+        self.temperatures = self._buffers['temperatures'][0:end] if 'temperatures' in self._buffers else None
+        self.length = end
+        self._timestamp_cache = {}
+
+    def append(self, other, rebase: bool = False):
+        """
+        Appends all data points of another recording to this recording, see append_block(). If rebase is True, the
+        time stamps of the other recording are shifted so that its first data point follows the last data point of
+        this recording after one average sample period.
+        :param other: The recording to append
+        :param rebase: Whether to shift the time stamps of the other recording. Default False
+        """
+        timestamps = other.timestamps
+        if rebase:
+            timestamps = timestamps + _get_rebase_shift(self, int(self.timestamps[-1]), other)
+        self.append_block(timestamps, other.values, other.temperatures)
+
+    def save(self, file: str, compression: str = None, chunk_size: int = _DEFAULT_CHUNK_SIZE):
+        """
+        Saves this recording to a file in the native recording file format. The file contains the metadata of the
+        recording (name, sample rate, sensor id and calibration matrix) and the columns of the recording, stored in
+        chunks of chunk_size data points. Without compression, columns are written and read at disk speed. Use
+        load_recording() to read only a part of the file. Note that this file format IS NOT compatible with FTE!
+        :param file: The file to write to, the extension .rsr is recommended
+        :param compression: None or 'zlib'. Default None
+        :param chunk_size: The number of data points per chunk. Default 262144
+        """
+        columns = {'timestamps': self.timestamps, 'values': self.values}
+        if self.temperatures is not None:
+            columns['temperatures'] = self.temperatures
+        _write_native_file(file, columns, self._get_metadata(), compression, chunk_size)
+
+
+def _get_average_period(recording: BufferedRecording) -> float:
+    if recording.get_data_point_count() < 2:
+        return None
+    return recording.get_time_duration(seconds=False) / (recording.get_data_point_count() - 1)
+
+
+def _get_rebase_shift(previous: BufferedRecording, previous_end: int, following: BufferedRecording) -> int:
+    """
+    Returns the shift which moves the time stamps of the following recording so that its first data point follows
+    the last data point of the previous recording after one average sample period.
+    """
+    period = _get_average_period(previous)
+    if period is None:
+        period = _get_average_period(following)
+    return previous_end + max(int(round(period)) if period is not None else 1, 1) - int(following.timestamps[0])
 
-        recording_start_time = self.data_points[0].time_offset
-        recording_frequency = self.get_average_frequency()
-        data_point_count = self.get_data_point_count()
 
-        # convert values to microseconds for easy comparison
-        start_time_us = 1000000 * start_time + recording_start_time
-        end_time_us = 1000000 * end_time + recording_start_time
+def _grow_column(column: np.ndarray, length: int, capacity: int, dtype) -> np.ndarray:
+    buffer = np.empty((capacity,) + column.shape[1:], dtype=dtype)
+    buffer[0:length] = column[0:length]
+    return buffer
 
-        # guess the start index and then iterate over data points until the correct data point is found
-        start_index = int(start_time * recording_frequency)
-        if start_index < 0 or start_index >= data_point_count:
-            return -1, -1
-        while self.data_points[start_index].time_offset > start_time_us:
-            start_index -= 1
-            if start_index < 0:
-                return -1, -1
-        while self.data_points[start_index].time_offset < start_time_us:
-            start_index += 1
-            if start_index >= data_point_count:
-                return -1, -1
-
-        # guess the end index and then iterate over data points until the correct data point is found
-        end_index = int(end_time * recording_frequency)
-        if end_index < 0 or end_index >= data_point_count:
-            return -1, -1
-        while self.data_points[end_index].time_offset < end_time_us:
-            end_index += 1
-            if end_index >= data_point_count:
-                return -1, -1
-        while self.data_points[end_index].time_offset > end_time_us:
-            end_index -= 1
-            if end_index < 0:
-                return -1, -1
 
-        return start_index, end_index
+def _get_file_extension(file_name: str) -> str:
+    return os.path.splitext(file_name)[1][1:].lower()
 
-    def save(self, file: str):
-        with open(file, 'wb') as file_output:
-            pickle.dump(self, file_output)
+
+def _load_recording_file(file_path: str, allow_pickle: bool = False) -> BufferedRecording:
+    """
+    Loads a recording file of any format supported by import_recording_from_file(). Pickled recordings saved by
+    previous versions of BufferedRecordingSet.save() are loaded as well if allow_pickle is True.
+    """
+    # the importer depends on this module, so it cannot be imported at module level
+    from .importer import import_recording_from_file
+    if _get_file_extension(file_path) == 'bin':
+        with open(file_path, 'rb') as file_input:
+            if file_input.read(1) == _PICKLE_PROTOCOL_BYTE:
+                return BufferedRecording(file=file_path, allow_pickle=allow_pickle)
+    recording = import_recording_from_file(file_path)
+    if len(recording.get_name()) == 0:
+        recording.set_name(os.path.basename(file_path))
+    return recording
+
+
+def _try_load_recording_file(file_path: str, allow_pickle: bool = False, lazy: bool = False) -> tuple:
+    """
+    Loads a recording file like _load_recording_file(), or creates a LazyRecording if lazy is True, and returns a
+    tuple of the recording and None. If the file cannot be loaded, a tuple of None and the exception is returned, so
+    that a single bad file does not abort loading a folder.
+    """
+    try:
+        if lazy:
+            return LazyRecording(file_path, allow_pickle), None
+        return _load_recording_file(file_path, allow_pickle), None
+    except Exception as e:
+        return None, e
+
+
+class LazyRecording(BufferedRecording):
+
+    def __init__(self, file_path: str, allow_pickle: bool = False):
+        """
+        Creates a recording which is loaded from the specified file when its data is accessed for the first time.
+        Until then, only the name and, for files in the native recording file format, the metadata and the number of
+        data points are available. LazyRecordings can be used like any other BufferedRecording.
+        :param file_path: The file to load from, any file type supported by import_recording_from_file()
+        :param allow_pickle: Whether to load pickled recordings saved by previous versions. Default False
+        """
+        self._file_path = file_path
+        self._allow_pickle = allow_pickle
+        self._loaded = False
+        self.name = os.path.basename(file_path)
+        self.sample_rate = None
+        self.sensor_id = None
+        self.calibration_matrix = None
+        if _get_file_extension(file_path) == _NATIVE_EXTENSION and _is_native_file(file_path):
+            header = _read_native_metadata(file_path)
+            self._set_metadata(header['metadata'])
+            if len(self.name) == 0:
+                self.name = os.path.basename(file_path)
+            self.length = header['count']
+
+    def __getattr__(self, name):
+        # only called for attributes which do not exist yet, i.e. the data of a recording which was not loaded
+        if name.startswith('__') or self.__dict__.get('_loaded', True):
+            raise AttributeError(name)
+        self.load()
+        return getattr(self, name)
+
+    def get_file_path(self) -> str:
+        """
+        :return: The file this recording is loaded from
+        """
+        return self._file_path
+
+    def is_loaded(self) -> bool:
+        """
+        :return: True if the data of this recording was loaded
+        """
+        return self._loaded
+
+    def load(self):
+        """
+        Loads the data of this recording if it was not loaded yet. The name and metadata of the recording are kept.
+        """
+        if self._loaded:
+            return
+        recording = _load_recording_file(self._file_path, self._allow_pickle)
+        metadata = self._get_metadata()
+        self.__dict__.update(recording.__dict__)
+        self._set_metadata(metadata)
+        self._loaded = True
 
 
 class BufferedRecordingSet:
@@ -335,11 +773,13 @@ class BufferedRecordingSet:
         """
         return self.recordings[index]
 
-    def save(self, folder: str):
+    def save(self, folder: str, compression: str = None):
         """
-        Saves all recordings into the specified folder. If recordings have names, the name will be used as the
-        file name. Otherwise, the files will be named 'unnamed-' appended with a numerical index.
+        Saves all recordings into the specified folder using the native recording file format, see
+        BufferedRecording.save(). If recordings have names, the name will be used as the file name. Otherwise, the
+        files will be named 'unnamed-' appended with a numerical index.
         :param folder: The folder to save to
+        :param compression: None or 'zlib'. Default None
         """
         unnamed_index = 0
         Path(folder).mkdir(parents=True, exist_ok=True)
@@ -348,27 +788,131 @@ class BufferedRecordingSet:
             if len(recording_name) == 0:
                 recording_name = "unnamed-" + str(unnamed_index)
                 unnamed_index += 1
-            file_path = os.path.join(folder, recording_name + '.bin')
-            recording.save(file_path)
+            file_path = os.path.join(folder, recording_name + '.' + _NATIVE_EXTENSION)
+            recording.save(file_path, compression)
 
-    def load(self, folder: str):
+    def merge(self, rebase: bool = False) -> BufferedRecording:
         """
-        Loads all recordings from the specified folder. The recordings will be unnamed and added to this
-        recording set.
-        :param folder: The folder to read from
+        Merges all recordings of this set into one recording, see concatenate_recordings().
+        :param rebase: Whether to shift the time stamps so that the recordings follow each other. Default False
+        :return: A concatenated recording
+        """
+        return concatenate_recordings(*self.recordings, rebase=rebase)
+
+    def load(self, folder: str, pattern: str = '*', file_extensions: list = None, workers: int = None,
+             use_processes: bool = False, lazy: bool = False, allow_pickle: bool = False) -> list:
         """
-        for file_name in os.listdir(folder):
+        Loads all recordings from the specified folder in the order of their file names and adds them to this
+        recording set. All file types supported by import_recording_from_file() are loaded, other files are skipped.
+        The files are loaded in parallel by a pool of threads, or of processes if use_processes is True. Processes
+        are faster for text formats (csv, json), threads avoid copying the loaded data between processes. Files which
+        cannot be loaded (e.g. truncated or malformed files) are skipped as well; they are returned together with the
+        raised exception, so the other files of the folder are loaded anyway.
+
+        If lazy is True, the recordings are LazyRecordings which load their data when it is accessed for the first
+        time. In this case, only the metadata of files in the native recording file format is read, which can be used
+        to inspect large folders quickly. Only errors in this metadata are detected by load(), errors in the data are
+        raised when it is accessed. Files saved by Resense.py 0.0.3 or earlier are only loaded if allow_pickle is
+        True, see BufferedRecording.
+        :param folder: The folder to read from
+        :param pattern: Only files whose names match this glob pattern are loaded. Default '*'
+        :param file_extensions: Only files with these extensions are loaded, e.g. ['rsr', 'bin']. Default None (all)
+        :param workers: The number of threads or processes. Default None (depends on the number of CPUs)
+        :param use_processes: Whether to use a process pool instead of a thread pool. Default False
+        :param lazy: Whether to load the data of the recordings on first access. Default False
+        :param allow_pickle: Whether to load pickled recordings saved by previous versions. Default False
+        :return: List of tuples (file path, exception) of the files which could not be loaded
+        """
+        extensions = _RECORDING_EXTENSIONS if file_extensions is None else \
+            [extension.lower().lstrip('.') for extension in file_extensions]
+        file_paths = []
+        for file_name in sorted(os.listdir(folder)):
             file_path = os.path.join(folder, file_name)
-            recording = BufferedRecording(file=file_path)
-            self.add_recording(recording)
+            if fnmatch.fnmatch(file_name, pattern) and _get_file_extension(file_name) in extensions \
+                    and _get_file_extension(file_name) in _RECORDING_EXTENSIONS and os.path.isfile(file_path):
+                file_paths.append(file_path)
+        if lazy:
+            results = [_try_load_recording_file(file_path, allow_pickle, True) for file_path in file_paths]
+        else:
+            # imported on first use to keep importing the package fast
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+            executor_type = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            with executor_type(max_workers=workers) as executor:
+                results = list(executor.map(_try_load_recording_file, file_paths, [allow_pickle] * len(file_paths)))
+        errors = []
+        for file_path, (recording, error) in zip(file_paths, results):
+            if error is not None:
+                errors.append((file_path, error))
+            else:
+                self.add_recording(recording)
+        return errors
+
+
+def load_recording(file: str, start: int = 0, end: int = None) -> BufferedRecording:
+    """
+    Loads the data points between the start and end offset from a file written by BufferedRecording.save(). Only
+    the chunks containing these data points are read from the file. Negative offsets count from the end of the file.
+    If the range contains no data points, an Exception will be raised.
+    :param file: The file to read from
+    :param start: Start offset
+    :param end: End offset. Default None (end of the file)
+    :return: A BufferedRecording
+    """
+    header, columns = _read_native_file(file, start, end)
+    recording = BufferedRecording(timestamps=columns['timestamps'], values=columns['values'],
+                                  temperatures=columns.get('temperatures'))
+    recording._set_metadata(header['metadata'])
+    if len(recording.get_name()) == 0:
+        recording.set_name(os.path.basename(file))
+    return recording
+
+
+def read_recording_metadata(file: str) -> dict:
+    """
+    Reads the metadata of a file written by BufferedRecording.save() without loading its data points. The
+    returned dictionary contains the name, sample rate, sensor id and calibration matrix of the recording as well as
+    the number of data points (count) and whether the file contains temperatures (has_temperature).
+    :param file: The file to read from
+    :return: Dictionary of metadata
+    """
+    header = _read_native_metadata(file)
+    metadata = dict(header['metadata'])
+    metadata['count'] = header['count']
+    metadata['has_temperature'] = any(column['name'] == 'temperatures' for column in header['columns'])
+    return metadata
 
 
-def concatenate_recordings(first: BufferedRecording, seconds: BufferedRecording) -> BufferedRecording:
+def concatenate_recordings(*recordings, rebase: bool = False) -> BufferedRecording:
     """
-    Returns a new BufferedRecording containing all data sets from the specified two recordings.
-    :param first: First recording
-    :param seconds: Another recording
+    Returns a new BufferedRecording containing all data sets from the specified recordings in the given order. The
+    columns of the result are allocated once and every recording is copied once. If rebase is True, the time stamps
+    of each recording are shifted so that its first data point follows the last data point of the previous recording
+    after one average sample period, e.g. to join recordings which were recorded at different times. The metadata is
+    taken from the first recording. If only some recordings contain temperatures, the missing temperatures are NaN.
+    :param recordings: Two or more recordings
+    :param rebase: Whether to shift the time stamps so that the recordings follow each other. Default False
     :return: A concatenated recording
     """
-    data_points = first.data_points + seconds.data_points
-    return BufferedRecording(data_points=data_points)
+    if len(recordings) == 0:
+        raise Exception("no recordings given")
+    count = sum(recording.get_data_point_count() for recording in recordings)
+    timestamps = np.empty((count,), dtype=np.int64)
+    values = np.empty((count, 6), dtype=np.result_type(*[recording.values for recording in recordings]))
+    temperature_columns = [recording.temperatures for recording in recordings if recording.temperatures is not None]
+    temperatures = None
+    if len(temperature_columns) > 0:
+        temperatures = np.full((count,), np.nan, dtype=np.result_type(*temperature_columns, np.float32))
+    start = 0
+    for index, recording in enumerate(recordings):
+        end = start + recording.get_data_point_count()
+        shift = 0
+        if rebase and index > 0:
+            shift = _get_rebase_shift(recordings[index - 1], int(timestamps[start - 1]), recording)
+        np.add(recording.timestamps, shift, out=timestamps[start:end])
+        values[start:end] = recording.values
+        if recording.temperatures is not None:
+            temperatures[start:end] = recording.temperatures
+        start = end
+    concatenated = BufferedRecording(timestamps=timestamps, values=values, temperatures=temperatures)
+    concatenated._set_metadata(recordings[0]._get_metadata())
+    return concatenated
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class RingBuffer:
+
+    def __init__(self, capacity: int, channels: int = 6, dtype=np.float32):
+        """
+        Creates a preallocated ring buffer for time stamped samples. The buffer is meant to be filled by a single
+        producer thread and read by any number of consumer threads without locking (like a seqlock): before
+        writing, the producer reserves the slots by incrementing a begin counter, and it publishes the samples by
+        incrementing the write counter after the data was written. Consumers copy published samples and verify
+        afterwards, using the begin counter, that no write into the copied slots has started in the meantime.
+        :param capacity: The maximum number of samples kept in the buffer
+        :param channels: The number of values per sample. Default 6
+        :param dtype: The type of the stored values. Default float32
+        """
+        if capacity <= 0:
+            raise Exception("capacity has to be greater than 0")
+        self._capacity = capacity
+        self._values = np.empty((capacity, channels), dtype=dtype)
+        self._timestamps = np.empty((capacity,), dtype=np.int64)
+        self._write_begin = 0
+        self._write_count = 0
+        self._overrun_count = 0
+
+    def get_capacity(self) -> int:
+        """
+        :return: The maximum number of samples kept in the buffer
+        """
+        return self._capacity
+
+    def get_write_count(self) -> int:
+        """
+        :return: The total number of samples written to this buffer since it was created
+        """
+        return self._write_count
+
+    def get_overrun_count(self) -> int:
+        """
+        Returns the total number of samples which were overwritten before a consumer called read_since for them.
+        :return: The number of lost samples
+        """
+        return self._overrun_count
+
+    def write(self, timestamps: np.ndarray, values: np.ndarray):
+        """
+        Appends a block of samples to the buffer. If the buffer is full, the oldest samples are overwritten.
+        This must only be called from a single producer thread.
+        :param timestamps: 1D array of microsecond time stamps
+        :param values: 2D array of values, one row per sample
+        """
+        count = len(timestamps)
+        if count == 0:
+            return
+        write_count = self._write_count
+        if count > self._capacity:
+            timestamps = timestamps[count - self._capacity:]
+            values = values[count - self._capacity:]
+            write_count += count - self._capacity
+            count = self._capacity
+        # reserve the slots before overwriting them, so that readers detect torn copies
+        self._write_begin = write_count + count
+        start = write_count % self._capacity
+        first_part = min(count, self._capacity - start)
+        self._timestamps[start:start + first_part] = timestamps[0:first_part]
+        self._values[start:start + first_part] = values[0:first_part]
+        if first_part < count:
+            self._timestamps[0:count - first_part] = timestamps[first_part:]
+            self._values[0:count - first_part] = values[first_part:]
+        # publish the samples only after they were written completely
+        self._write_count = write_count + count
+
+    def _copy(self, start: int, end: int) -> tuple:
+        first = start % self._capacity
+        last = first + (end - start)
+        if last <= self._capacity:
+            return self._timestamps[first:last].copy(), self._values[first:last].copy()
+        last -= self._capacity
+        return (np.concatenate((self._timestamps[first:], self._timestamps[0:last])),
+                np.concatenate((self._values[first:], self._values[0:last])))
+
+    def read_latest(self, count: int) -> tuple:
+        """
+        Copies the most recent samples out of the buffer. Fewer samples are returned if the buffer does not
+        contain enough samples yet.
+        :param count: The maximum number of samples to return
+        :return: Tuple of a time stamp array and a value array
+        """
+        while True:
+            end = self._write_count
+            start = max(0, end - min(count, self._capacity))
+            timestamps, values = self._copy(start, end)
+            # the copy is valid if the producer did not start to overwrite the copied range in the meantime
+            if self._write_begin - self._capacity <= start:
+                return timestamps, values
+
+    def read_since(self, position: int, max_count: int = None) -> tuple:
+        """
+        Copies all samples written after the specified position (a previous value of the write counter) out of the
+        buffer. If samples after that position were already overwritten, they are skipped and added to the overrun
+        counter.
+        :param position: The write counter value of the last read
+        :param max_count: The maximum number of samples to return. Default None (unlimited)
+        :return: Tuple of a time stamp array, a value array, the new position and the number of skipped samples
+        """
+        while True:
+            end = self._write_count
+            start = max(position, end - self._capacity)
+            if max_count is not None:
+                end = min(end, start + max_count)
+            timestamps, values = self._copy(start, end)
+            if self._write_begin - self._capacity <= start:
+                lost = start - position
+                self._overrun_count += lost
+                return timestamps, values, end, lost
@@ -1,30 +1,46 @@
 from .recording import *
-import serial
+from .ring_buffer import RingBuffer
+from .framing import FrameSynchronizer, _FRAME_SIZE
+from .timing import SampleClock
+from .recorder import StreamingRecorder, _DEFAULT_FLUSH_INTERVAL
+from .metrics import counter, gauge, histogram, start_timer
 import time
-import struct
+import threading
 
 _BAUD_RATE = 2000000
 
+_READ_CHUNK_FRAMES = 1024
+_STREAM_READ_TIMEOUT = 0.05
+_DEFAULT_STREAM_BUFFER_SIZE = 60000
+
+# metrics are only updated while they are enabled, see metrics.enable_metrics()
+_BYTES_READ = counter('resense_sensor_bytes_read_total', 'Bytes read from the serial interface', ('port',))
+_SAMPLES_DECODED = counter('resense_sensor_samples_total', 'Valid frames decoded', ('port',))
+_CORRUPTED_FRAMES = counter('resense_sensor_corrupted_frames_total', 'Frames dropped due to corruption', ('port',))
+_SERIAL_BACKLOG = gauge('resense_sensor_serial_backlog_bytes', 'Bytes waiting in the serial buffer after a read',
+                        ('port',))
+_READ_SECONDS = histogram('resense_sensor_read_seconds', 'Duration of serial reads', ('port',))
+_DECODE_SECONDS = histogram('resense_sensor_decode_seconds', 'Duration of frame synchronization and decoding',
+                            ('port',))
+_CALIBRATION_SECONDS = histogram('resense_sensor_calibration_seconds', 'Duration of applying the calibration matrix',
+                                 ('port',))
+
 
 class CalibrationMatrix:
 
     def __init__(self, file_path: str = None):
         """
         Creates a new calibration matrix. If file_path is specified, the constructor will load from that file.
-        Otherwise, an identity matrix will be created.
+        Otherwise, an identity matrix will be created. The file has to contain six lines of six comma separated
+        values each.
         :param file_path: File to read from, default None
         """
-        self.matrix = np.zeros((6, 6))
         if file_path is None:
-            for column in range(0, 6):
-                self.matrix[column][column] = 1
+            self.matrix = np.identity(6)
         else:
-            with open(file_path, 'r') as file_input:
-                for row in range(0, 6):
-                    line = file_input.readline()
-                    values = line.split(',')
-                    for column in range(0, 6):
-                        self.matrix[row][column] = float(values[column])
+            self.matrix = np.loadtxt(file_path, delimiter=',', usecols=range(0, 6), max_rows=6, ndmin=2)
+            if self.matrix.shape != (6, 6):
+                raise Exception("calibration matrix file has to contain 6x6 values")
 
     def process(self, raw_values):
         """
@@ -33,25 +49,69 @@ class CalibrationMatrix:
         :param raw_values: The raw values
         :return: The calculated F/T values
         """
-        dest = np.empty((6,))
-        for row in range(0, 6):
-            result = 0.0
-            for column in range(0, 6):
-                result += self.matrix[row][column] * raw_values[column]
-            dest[row] = result
-        return dest
+        return self.matrix @ np.asarray(raw_values, dtype=np.float64)
+
+    def process_block(self, raw_block) -> np.ndarray:
+        """
+        Processes a block of raw samples using the calibration matrix. Each row of the block contains the six raw
+        values of one sample. All rows are processed by a single matrix multiplication.
+        :param raw_block: Array of shape (N, 6) containing raw values
+        :return: Array of shape (N, 6) containing the calculated F/T values
+        """
+        return np.asarray(raw_block, dtype=np.float64) @ self.matrix.T
+
+    def process_recording(self, recording: BufferedRecording) -> BufferedRecording:
+        """
+        Creates a new recording by applying the calibration matrix to all values of the specified recording. This
+        can be used to calibrate a recording of raw values (DIP switch 6 set to OFF) after it was recorded. Time
+        stamps, temperatures and the metadata are taken from the original recording.
+        :param recording: A recording containing raw values
+        :return: A new BufferedRecording containing the calculated F/T values
+        """
+        calibrated = BufferedRecording(timestamps=recording.timestamps,
+                                       values=self.process_block(recording.values),
+                                       temperatures=recording.temperatures)
+        calibrated._set_metadata(recording._get_metadata())
+        calibrated.set_calibration_matrix(self.matrix)
+        return calibrated
 
 
 class HEXSensor:
 
-    def __init__(self, com_port):
+    def __init__(self, com_port, frame_trailer: bytes = None, sample_rate: float = None, transport=None):
         """
-        Creates a new HEX sensor object to connect to a HEX F/T sensor
+        Creates a new HEX sensor object to connect to a HEX F/T sensor. Besides com ports, any URL supported by
+        pyserial (e.g. a pseudo terminal path or 'loop://') can be used. Alternatively, an object providing the
+        pyserial methods read(), isOpen() and close() as well as the attributes in_waiting and timeout can be
+        passed as transport, e.g. a simulator.SimulatedSerial for tests. Incoming frames are located by validating
+        their four trailing bytes, see FrameSynchronizer. Samples are time stamped by a SampleClock using the
+        sample rate configured on the electronics interface. If it is not specified, it will be estimated.
         :param com_port: The com port to use
+        :param frame_trailer: The expected trailing bytes of every frame. Default None (learned from the stream)
+        :param sample_rate: The sample rate set on the electronics interface. Default None
+        :param transport: The pyserial compatible object to read from instead of com_port. Default None
         """
+        if com_port is None and transport is None:
+            raise Exception('specify either com_port or transport')
         self._serial_interface = None
+        self._transport = transport
         self._com_port = com_port
+        self._metric_labels = (str(com_port),)
         self._calibration_matrix = CalibrationMatrix()
+        self._synchronizer = FrameSynchronizer(frame_trailer)
+        self._clock = SampleClock(sample_rate)
+        self._surplus_frames = None
+        self._ring_buffer = None
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._stream_condition = threading.Condition()
+        self._stream_error = None
+
+    def get_com_port(self):
+        """
+        :return: The com port of this sensor
+        """
+        return self._com_port
 
     def is_connected(self) -> bool:
         """
@@ -69,7 +129,18 @@ class HEXSensor:
         """
         if self.is_connected():
             return True
-        self._serial_interface = serial.Serial(port=self._com_port, baudrate=_BAUD_RATE, timeout=None)
+        self._synchronizer.reset()
+        self._clock.reset(time.time_ns() // 1000)
+        self._surplus_frames = None
+        if self._transport is None:
+            # pyserial is imported on first use, so simulated sensors and the other submodules do not need it
+            import serial
+            self._serial_interface = serial.serial_for_url(self._com_port, baudrate=_BAUD_RATE, timeout=None)
+        else:
+            if not self._transport.isOpen():
+                self._transport.open()
+            self._transport.timeout = None
+            self._serial_interface = self._transport
         return self.is_connected()
 
     def disconnect(self):
@@ -77,9 +148,25 @@ class HEXSensor:
         Disconnects the sensor electronics interface. Calling disconnect does nothing if the sensor was
         never connected before or the serial port was closed to another reason.
         """
+        self.stop_streaming()
         if self.is_connected():
             self._serial_interface.close()
 
+    def set_sample_rate(self, sample_rate: float):
+        """
+        Sets the sample rate used for time stamping. The specified sample rate has to be equal to the sample rate
+        configured on the electronics interface using the DIP switches. This resets the time stamping clock.
+        :param sample_rate: The sample rate in Hz
+        """
+        self._clock.set_sample_rate(sample_rate)
+
+    def get_timing_statistics(self) -> dict:
+        """
+        Returns statistics of the time stamping clock, see SampleClock.get_statistics().
+        :return: Dictionary of statistics
+        """
+        return self._clock.get_statistics()
+
     def set_calibration_matrix(self, matrix: CalibrationMatrix):
         """
         Sets the calibration matrix to use for recording samples. The default value is an identity matrix which
@@ -91,21 +178,15 @@ class HEXSensor:
 
     def record_sample(self):
         """
-        Records a single sample from the sensor electronics interface. Returns None if no sensor is connected
-        or an instance of a DataSet containing the microsecond time stamp and the force and torque values.
-        The DateSet is already processed using the calibration matrix specified by set_calibration_matrix or
-        the default identity matrix. Please note that calling this function will block until at least one
-        data set was sent by the electronics interface.
+        Records a single sample from the sensor electronics interface. Returns None if no sensor is connected,
+        the sensor is streaming or an instance of a DataSet containing the microsecond time stamp and the force
+        and torque values. The DateSet is already processed using the calibration matrix specified by
+        set_calibration_matrix or the default identity matrix. Please note that calling this function will block
+        until at least one data set was sent by the electronics interface.
         :return: DataSet if read was successful, None otherwise
         """
-        if not self.is_connected():
-            return None
-        serial_line = self._serial_interface.read(28)
-        raw_values = [struct.unpack('f', serial_line[i * 4:(i + 1) * 4])[0] for i in range(0, 6)]
-        processed_values = self._calibration_matrix.process(raw_values)
-        return DataSet(time.time_ns() // 1000,
-                       ForceValue(processed_values[0], processed_values[1], processed_values[2]),
-                       TorqueValue(processed_values[3], processed_values[4], processed_values[5]))
+        recording = self.record_samples(1)
+        return None if recording is None else recording.get_data_point(0)
 
     def record_duration(self, duration: float, sample_rate: int):
         """
@@ -117,24 +198,260 @@ class HEXSensor:
         :param sample_rate: The sample rate set on the electronics interface
         :return: BufferedRecording if read was successful, None otherwise
         """
+        if self._clock.get_nominal_sample_rate() != sample_rate:
+            self.set_sample_rate(sample_rate)
         num_samples = int(sample_rate * duration)
         return self.record_samples(num_samples)
 
     def record_samples(self, num_samples: int):
         """
         Reads the specified number of samples from the serial port. This method blocks until all samples are read or
-        an I/O error occurs.
+        an I/O error occurs. Returns None while the sensor is streaming. Samples are read from the serial port in
+        chunks of up to 1024 frames which are synchronized and decoded at once. Corrupted frames are skipped, see
+        get_frame_statistics(). Calibration is applied to all samples in one step after reading. The samples are
+        time stamped by the sample clock of this sensor, see SampleClock.
         :param num_samples: The number of samples to read
         :return: BufferedRecording if read was successful, None otherwise
         """
-        dest_array = np.empty((num_samples,), dtype=DataSet)
+        if not self.is_connected() or self.is_streaming() or num_samples <= 0:
+            return None
+        raw_values = np.empty((num_samples, 6), dtype=np.float32)
+        time_stamps = np.empty((num_samples,), dtype=np.int64)
         read = 0
-        for i in range(0, num_samples):
-            sample = self.record_sample()
-            if sample is None:
+        while read < num_samples:
+            if self._surplus_frames is not None:
+                frames, gaps = self._surplus_frames
+                self._surplus_frames = None
+                buffer = b''
+                requested = 0
+                read_time = time.time_ns() // 1000
+            else:
+                # request the bytes missing for the remaining samples. While resynchronizing, the synchronizer holds
+                # back the frames needed to validate the next frame boundary, these can exceed the remaining samples
+                requested = min(num_samples - read, _READ_CHUNK_FRAMES) * _FRAME_SIZE
+                requested -= self._synchronizer.get_pending_byte_count()
+                buffer = self._read_serial(max(requested, 1))
+                read_time = time.time_ns() // 1000
+                frames, gaps = self._read_frames(buffer)
+            count = min(len(frames), num_samples - read)
+            if len(frames) > count:
+                # resynchronizing releases all buffered frames at once, keep the surplus for the next call
+                self._surplus_frames = frames[count:], [(position - count, skipped) for position, skipped in gaps
+                                                        if position > count]
+                gaps = [gap for gap in gaps if gap[0] <= count]
+            time_stamps[read:read + count] = self._clock.timestamp_block(count, read_time, gaps=gaps)
+            raw_values[read:read + count] = frames[0:count]
+            read += count
+            if len(buffer) < requested:
                 break
-            dest_array[i] = sample
-            read += 1
         if read == 0:
             return None
-        return BufferedRecording(data_points=dest_array[0:read])
+        return self._create_recording(time_stamps[0:read], raw_values[0:read])
+
+    def record_to_file(self, file_path: str, duration: float = None, sample_rate: int = None,
+                       flush_interval: float = _DEFAULT_FLUSH_INTERVAL):
+        """
+        Records samples directly to a file using a StreamingRecorder, so memory usage does not depend on the
+        duration. If duration and sample_rate are specified, duration * sample_rate samples are recorded. If only
+        duration is specified, samples are recorded until the duration has elapsed. If duration is None, samples are
+        recorded until a KeyboardInterrupt is raised or an I/O error occurs. Data written before a crash can be
+        loaded by load_streamed_recording().
+        :param file_path: The file to write to (FTE binary format)
+        :param duration: The duration in seconds. Default None (unbounded)
+        :param sample_rate: The sample rate set on the electronics interface. Default None
+        :param flush_interval: The interval in seconds in which data is flushed to disk. Default 1.0
+        :return: BufferedRecording backed by the written file if at least one sample was recorded, None otherwise
+        """
+        if not self.is_connected() or self.is_streaming():
+            return None
+        if sample_rate is not None and self._clock.get_nominal_sample_rate() != sample_rate:
+            self.set_sample_rate(sample_rate)
+        remaining = None if duration is None or sample_rate is None else int(duration * sample_rate)
+        end_time = None if duration is None or sample_rate is not None else time.monotonic() + duration
+        with StreamingRecorder(file_path, flush_interval=flush_interval) as recorder:
+            try:
+                while remaining is None or remaining > 0:
+                    if end_time is not None and time.monotonic() >= end_time:
+                        break
+                    count = _READ_CHUNK_FRAMES if remaining is None else min(remaining, _READ_CHUNK_FRAMES)
+                    block = self.record_samples(count)
+                    if block is None:
+                        break
+                    recorder.append(block)
+                    if remaining is not None:
+                        remaining -= block.get_data_point_count()
+            except KeyboardInterrupt:
+                pass
+            if recorder.get_data_point_count() == 0:
+                return None
+        return recorder.get_recording()
+
+    def _read_serial(self, size: int) -> bytes:
+        start_time = start_timer()
+        buffer = self._serial_interface.read(size)
+        if start_time is not None:
+            _READ_SECONDS.observe_since(start_time, self._metric_labels)
+            _BYTES_READ.inc(len(buffer), self._metric_labels)
+            _SERIAL_BACKLOG.set(self._serial_interface.in_waiting, self._metric_labels)
+        return buffer
+
+    def _read_frames(self, buffer) -> tuple:
+        """
+        Synchronizes and decodes the bytes and returns the raw values of the valid frames as well as the positions
+        of the dropped corrupted frames. Corrupted frames were sampled nevertheless, so the gaps are passed to the
+        sample clock to keep the time base in step.
+        """
+        start_time = start_timer()
+        frames = self._synchronizer.feed(buffer)
+        gaps = self._synchronizer.get_gaps()
+        if start_time is not None:
+            _DECODE_SECONDS.observe_since(start_time, self._metric_labels)
+            _SAMPLES_DECODED.inc(len(frames), self._metric_labels)
+            _CORRUPTED_FRAMES.inc(sum(skipped for _, skipped in gaps), self._metric_labels)
+        return frames, gaps
+
+    def is_streaming(self) -> bool:
+        """
+        :return: True if the background acquisition thread started by start_streaming() is running
+        """
+        return self._stream_thread is not None and self._stream_thread.is_alive()
+
+    def start_streaming(self, buffer_size: int = _DEFAULT_STREAM_BUFFER_SIZE) -> bool:
+        """
+        Starts continuous acquisition in a background thread. The thread reads and synchronizes all incoming frames
+        from the serial port and writes the raw values into a preallocated ring buffer of the specified size,
+        overwriting the oldest samples when the buffer is full. While streaming, samples are accessed by get_latest_sample(),
+        get_latest_samples() and iter_blocks(); record_sample() and record_samples() return None.
+        :param buffer_size: The number of samples kept in the ring buffer
+        :return: True if streaming was started or is already running, False if the sensor is not connected
+        """
+        if self.is_streaming():
+            return True
+        if not self.is_connected():
+            return False
+        self._ring_buffer = RingBuffer(buffer_size)
+        self._stream_error = None
+        self._stream_stop.clear()
+        self._serial_interface.timeout = _STREAM_READ_TIMEOUT
+        self._stream_thread = threading.Thread(target=self._stream_loop, name='HEXSensor-' + str(self._com_port),
+                                               daemon=True)
+        self._stream_thread.start()
+        return True
+
+    def stop_streaming(self):
+        """
+        Stops the background acquisition thread. Samples remaining in the ring buffer can still be accessed until
+        streaming is started again. Calling stop_streaming does nothing if the sensor is not streaming.
+        """
+        if self._stream_thread is None:
+            return
+        self._stream_stop.set()
+        self._stream_thread.join()
+        self._stream_thread = None
+        with self._stream_condition:
+            self._stream_condition.notify_all()
+        if self.is_connected():
+            self._serial_interface.timeout = None
+
+    def _stream_loop(self):
+        try:
+            while not self._stream_stop.is_set():
+                buffer = self._read_serial(max(self._serial_interface.in_waiting, _FRAME_SIZE))
+                read_time = time.time_ns() // 1000
+                frames, gaps = self._read_frames(buffer)
+                timestamps = self._clock.timestamp_block(len(frames), read_time, gaps=gaps)
+                if len(frames) == 0:
+                    continue
+                self._ring_buffer.write(timestamps, frames)
+                with self._stream_condition:
+                    self._stream_condition.notify_all()
+        except Exception as e:
+            self._stream_error = e
+        finally:
+            self._stream_stop.set()
+            with self._stream_condition:
+                self._stream_condition.notify_all()
+
+    def get_frame_statistics(self) -> dict:
+        """
+        Returns the counters of the framing layer since the last connect: the number of decoded frames, the number
+        of frames dropped due to corruption, the number of discarded bytes and the number of resynchronizations.
+        :return: Dictionary of counters
+        """
+        return self._synchronizer.get_statistics()
+
+    def get_stream_error(self):
+        """
+        :return: The exception which terminated the background acquisition thread, None otherwise
+        """
+        return self._stream_error
+
+    def get_overrun_count(self) -> int:
+        """
+        Returns the number of streamed samples which were overwritten in the ring buffer before they were
+        consumed by iter_blocks().
+        :return: The number of lost samples
+        """
+        if self._ring_buffer is None:
+            return 0
+        return self._ring_buffer.get_overrun_count()
+
+    def _create_recording(self, timestamps: np.ndarray, raw_values: np.ndarray):
+        if len(timestamps) == 0:
+            return None
+        start_time = start_timer()
+        values = self._calibration_matrix.process_block(raw_values)
+        if start_time is not None:
+            _CALIBRATION_SECONDS.observe_since(start_time, self._metric_labels)
+        recording = BufferedRecording(timestamps=timestamps, values=values)
+        recording.set_sample_rate(self._clock.get_nominal_sample_rate())
+        recording.set_sensor_id(str(self._com_port))
+        recording.set_calibration_matrix(self._calibration_matrix.matrix)
+        return recording
+
+    def get_latest_sample(self):
+        """
+        Returns the most recent streamed sample without blocking.
+        :return: DataSet or None if no sample was received yet
+        """
+        recording = self.get_latest_samples(1)
+        return None if recording is None else recording.get_data_point(0)
+
+    def get_latest_samples(self, num_samples: int):
+        """
+        Returns the most recent streamed samples without blocking. If fewer samples were received or fit into the
+        ring buffer, all available samples are returned.
+        :param num_samples: The number of samples
+        :return: BufferedRecording or None if no sample was received yet
+        """
+        if self._ring_buffer is None:
+            return None
+        return self._create_recording(*self._ring_buffer.read_latest(num_samples))
+
+    def iter_blocks(self, min_samples: int = 1, max_samples: int = None, include_buffered: bool = False):
+        """
+        Iterates over blocks of newly streamed samples as they arrive. Each block is a BufferedRecording containing
+        at least min_samples samples (the last block may be smaller) and at most max_samples samples. The iteration
+        ends when streaming is stopped. Samples which are overwritten in the ring buffer before they are consumed
+        are skipped and counted by get_overrun_count().
+        :param min_samples: The minimum number of samples per block. Default 1
+        :param max_samples: The maximum number of samples per block. Default None (unlimited)
+        :param include_buffered: Whether to start with the samples already in the ring buffer. Default False
+        :return: Generator of BufferedRecordings
+        """
+        ring_buffer = self._ring_buffer
+        if ring_buffer is None:
+            return
+        position = 0 if include_buffered else ring_buffer.get_write_count()
+        while True:
+            with self._stream_condition:
+                while (ring_buffer.get_write_count() - position < min_samples
+                       and self._ring_buffer is ring_buffer and self.is_streaming()):
+                    self._stream_condition.wait(_STREAM_READ_TIMEOUT)
+            streaming = self._ring_buffer is ring_buffer and self.is_streaming()
+            timestamps, raw_values, position, _ = ring_buffer.read_since(position, max_samples)
+            recording = self._create_recording(timestamps, raw_values)
+            if recording is not None:
+                yield recording
+            elif not streaming:
+                return
@@ -0,0 +1,153 @@
+from .recording import *
+from .sensor import HEXSensor, _DEFAULT_STREAM_BUFFER_SIZE
+from .processing import _interpolate_recording
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+
+def _align_recordings(recordings: list, sample_rate: float = None) -> list:
+    """
+    Resamples the recordings onto a common, evenly spaced timebase covering the time frame in which all recordings
+    overlap. Values are linearly interpolated. If sample_rate is None, the highest average frequency of the
+    recordings is used.
+    """
+    start = max(int(recording.timestamps[0]) for recording in recordings)
+    end = min(int(recording.timestamps[-1]) for recording in recordings)
+    if end < start:
+        raise Exception("recordings do not overlap")
+    if sample_rate is None:
+        sample_rate = max(recording.get_average_frequency() for recording in recordings)
+    count = int((end - start) * sample_rate / 1000000.0) + 1
+    timestamps = start + (np.arange(count) * (1000000.0 / sample_rate)).astype(np.int64)
+    aligned = []
+    for recording in recordings:
+        aligned_recording = _interpolate_recording(recording, timestamps)
+        aligned_recording.set_sample_rate(sample_rate)
+        aligned.append(aligned_recording)
+    return aligned
+
+
+class SensorGroup:
+
+    def __init__(self, sensors: list):
+        """
+        Creates a group of HEX sensors which are recorded in parallel. Each sensor is read by its own thread, so
+        the sensors do not wait for each other. All sensors are time stamped by their sample clocks, which are
+        anchored to the same host clock. This common timebase is used to align the recordings.
+        :param sensors: A list of HEXSensors or com ports
+        """
+        self._sensors = [sensor if isinstance(sensor, HEXSensor) else HEXSensor(sensor) for sensor in sensors]
+        self._statistics = [None] * len(self._sensors)
+
+    def get_sensors(self) -> list:
+        """
+        :return: A list of all sensors in this group
+        """
+        return self._sensors
+
+    def get_sensor_count(self) -> int:
+        """
+        :return: The number of sensors in this group
+        """
+        return len(self._sensors)
+
+    def connect(self) -> bool:
+        """
+        Connects all sensors of this group.
+        :return: True if all sensors are connected, False otherwise
+        """
+        return all([sensor.connect() for sensor in self._sensors])
+
+    def disconnect(self):
+        """
+        Disconnects all sensors of this group.
+        """
+        for sensor in self._sensors:
+            sensor.disconnect()
+
+    def start_streaming(self, buffer_size: int = _DEFAULT_STREAM_BUFFER_SIZE) -> bool:
+        """
+        Starts the background acquisition thread of every sensor, see HEXSensor.start_streaming().
+        :param buffer_size: The number of samples kept in the ring buffer of each sensor
+        :return: True if all sensors are streaming, False otherwise
+        """
+        return all([sensor.start_streaming(buffer_size) for sensor in self._sensors])
+
+    def stop_streaming(self):
+        """
+        Stops the background acquisition thread of every sensor.
+        """
+        for sensor in self._sensors:
+            sensor.stop_streaming()
+
+    def _record(self, index: int, record_function, *arguments):
+        start_time = time.perf_counter()
+        recording = record_function(*arguments)
+        elapsed = time.perf_counter() - start_time
+        count = 0 if recording is None else recording.get_data_point_count()
+        self._statistics[index] = {
+            'samples': count,
+            'elapsed': elapsed,
+            'throughput': count / elapsed if elapsed > 0 else None,
+            'first_timestamp': None if recording is None else recording.first_time_offset,
+        }
+        return recording
+
+    def _record_all(self, record_functions: list, arguments: list, align: bool):
+        with ThreadPoolExecutor(max_workers=len(self._sensors)) as executor:
+            futures = [executor.submit(self._record, index, record_function, *argument)
+                       for index, (record_function, argument) in enumerate(zip(record_functions, arguments))]
+            recordings = [future.result() for future in futures]
+        if any(recording is None for recording in recordings):
+            return None
+        for sensor, recording in zip(self._sensors, recordings):
+            recording.set_name(str(sensor.get_com_port()))
+        if align:
+            recordings = _align_recordings(recordings)
+        return BufferedRecordingSet(recordings)
+
+    def record_samples(self, num_samples, align: bool = True):
+        """
+        Reads the specified number of samples from all sensors in parallel. If align is True, all recordings are
+        linearly resampled onto a common, evenly spaced timebase covering the time frame in which all recordings
+        overlap, so data point i of every recording refers to the same point in time.
+        :param num_samples: The number of samples to read, either one value for all sensors or a list
+        :param align: Whether to align the recordings. Default True
+        :return: BufferedRecordingSet containing one recording per sensor if all reads were successful, None otherwise
+        """
+        if not isinstance(num_samples, (list, tuple)):
+            num_samples = [num_samples] * len(self._sensors)
+        return self._record_all([sensor.record_samples for sensor in self._sensors],
+                                [(count,) for count in num_samples], align)
+
+    def record_duration(self, duration: float, sample_rate, align: bool = True):
+        """
+        Records the specified duration from all sensors in parallel, see record_samples(). The specified sample
+        rates have to be equal to the sample rates configured on the electronics interfaces using the DIP switches.
+        :param duration: The duration in seconds
+        :param sample_rate: The sample rate, either one value for all sensors or a list
+        :param align: Whether to align the recordings. Default True
+        :return: BufferedRecordingSet containing one recording per sensor if all reads were successful, None otherwise
+        """
+        if not isinstance(sample_rate, (list, tuple)):
+            sample_rate = [sample_rate] * len(self._sensors)
+        return self._record_all([sensor.record_duration for sensor in self._sensors],
+                                [(duration, rate) for rate in sample_rate], align)
+
+    def get_statistics(self) -> list:
+        """
+        Returns statistics of the last recording for every sensor: the number of samples, the elapsed wall time in
+        seconds, the throughput in samples per second, the skew of the first time stamp relative to the first sensor
+        in microseconds and the sample rate estimated by the sample clock of the sensor.
+        :return: A list containing one dictionary per sensor
+        """
+        reference = self._statistics[0]['first_timestamp'] if self._statistics[0] is not None else None
+        statistics = []
+        for sensor, sensor_statistics in zip(self._sensors, self._statistics):
+            entry = {'port': sensor.get_com_port(), 'sample_rate': sensor.get_timing_statistics()['sample_rate']}
+            if sensor_statistics is not None:
+                entry.update(sensor_statistics)
+                if reference is not None and sensor_statistics['first_timestamp'] is not None:
+                    entry['skew_us'] = sensor_statistics['first_timestamp'] - reference
+            statistics.append(entry)
+        return statistics
@@ -0,0 +1,325 @@
+import numpy as np
+import os
+import threading
+import time
+from .framing import _FRAME_DTYPE, _FRAME_SIZE
+
+_DEFAULT_SAMPLE_RATE = 1000.0
+_DEFAULT_TRAILER = b'\r\n\r\n'
+# size of the simulated receive buffer of the operating system, frames arriving while it is full are lost
+_DEFAULT_BUFFER_SIZE = 1 << 20
+# amplitudes and frequencies (Hz) of the sine waves of the simulated Fx, Fy, Fz, Mx, My, Mz values
+_AMPLITUDES = np.array([2.0, 3.0, 10.0, 50.0, 60.0, 20.0], dtype=np.float64)
+_FREQUENCIES = np.array([0.5, 0.7, 1.1, 1.3, 1.7, 1.9], dtype=np.float64)
+_MIN_SLEEP = 0.0005
+_PTY_WRITE_SIZE = 4096
+_PTY_POLL_INTERVAL = 0.05
+
+
+def create_frames(count: int, start_index: int = 0, sample_rate: float = _DEFAULT_SAMPLE_RATE,
+                  trailer: bytes = _DEFAULT_TRAILER, corruption_interval: int = None,
+                  corruption_length: int = 1) -> bytes:
+    """
+    Creates the byte stream of count frames as sent by a HEX sensor electronics interface: six float32 values
+    followed by the four trailing bytes per frame. The values are sine waves of different amplitude and frequency
+    per channel, evaluated at the sample index, so consecutive calls continue the same signal. If
+    corruption_interval is specified, the trailing bytes of the last corruption_length frames of every
+    corruption_interval frames are damaged.
+    :param count: The number of frames
+    :param start_index: The sample index of the first frame. Default 0
+    :param sample_rate: The sample rate used to evaluate the sine waves. Default 1000.0
+    :param trailer: The four trailing bytes of every frame. Default b'\r\n\r\n'
+    :param corruption_interval: Damage every n-th frame. Default None (no corruption)
+    :param corruption_length: The number of consecutive damaged frames. Default 1
+    :return: The frames as bytes
+    """
+    if len(trailer) != 4:
+        raise Exception("trailer has to consist of 4 bytes")
+    indices = np.arange(start_index, start_index + count, dtype=np.int64)
+    phases = (indices / sample_rate).reshape((-1, 1)) * (2.0 * np.pi * _FREQUENCIES)
+    frames = np.empty((count,), dtype=_FRAME_DTYPE)
+    frames['values'] = _AMPLITUDES * np.sin(phases)
+    frames['trailer'] = np.frombuffer(trailer, dtype='<u4')[0]
+    if corruption_interval is not None:
+        corrupted = (indices % corruption_interval) >= corruption_interval - corruption_length
+        frames['trailer'][corrupted] ^= 0xFFFF
+    return frames.tobytes()
+
+
+class SimulatedSerial:
+
+    def __init__(self, sample_rate: float = _DEFAULT_SAMPLE_RATE, num_frames: int = None,
+                 trailer: bytes = _DEFAULT_TRAILER, corruption_interval: int = None,
+                 buffer_size: int = _DEFAULT_BUFFER_SIZE, paced: bool = True, corruption_length: int = 1):
+        """
+        Creates an in-memory serial interface which behaves like a HEX sensor electronics interface connected by
+        USB, e.g. to run HEXSensor without hardware: HEXSensor(None, transport=SimulatedSerial()). It provides the
+        parts of the pyserial interface used by HEXSensor (read(), in_waiting, timeout, isOpen() and close()).
+        Frames are created by create_frames(). If paced is True, frames become available at the sample rate
+        after open() was called. Like the receive buffer of the operating system, at most buffer_size bytes are
+        kept; frames arriving while the buffer is full are lost and counted, see get_dropped_frame_count(). If
+        paced is False, the buffer is always filled immediately, so reads measure the maximum throughput of the
+        reader. After num_frames frames were sent, reads return the remaining bytes without blocking.
+        :param sample_rate: The sample rate in Hz. Default 1000.0
+        :param num_frames: The total number of frames to send. Default None (unbounded)
+        :param trailer: The four trailing bytes of every frame. Default b'\r\n\r\n'
+        :param corruption_interval: Damage every n-th frame, see create_frames(). Default None (no corruption)
+        :param buffer_size: The size of the receive buffer in bytes. Default 1 MiB
+        :param paced: Whether frames are sent at the sample rate. Default True
+        :param corruption_length: The number of consecutive damaged frames, see create_frames(). Default 1
+        """
+        self.timeout = None
+        self._sample_rate = sample_rate
+        self._num_frames = num_frames
+        self._trailer = trailer
+        self._corruption_interval = corruption_interval
+        self._corruption_length = corruption_length
+        self._buffer_size = max(buffer_size, _FRAME_SIZE)
+        self._paced = paced
+        self._open = False
+        self._lock = threading.Lock()
+        self.open()
+
+    def open(self):
+        """
+        Opens the interface and starts sending frames from the beginning.
+        """
+        with self._lock:
+            self._pending = bytearray()
+            self._frame_index = 0
+            self._dropped_frame_count = 0
+            self._start_time = time.monotonic()
+            self._open = True
+
+    def isOpen(self) -> bool:
+        """
+        :return: True if the interface is open
+        """
+        return self._open
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    def close(self):
+        """
+        Closes the interface. Buffered bytes are discarded.
+        """
+        with self._lock:
+            self._open = False
+            self._pending = bytearray()
+
+    def get_sent_frame_count(self) -> int:
+        """
+        :return: The number of frames sent so far, including dropped frames
+        """
+        return self._frame_index
+
+    def get_dropped_frame_count(self) -> int:
+        """
+        :return: The number of frames lost because the receive buffer was full
+        """
+        return self._dropped_frame_count
+
+    def is_exhausted(self) -> bool:
+        """
+        :return: True if all num_frames frames were sent
+        """
+        return self._num_frames is not None and self._frame_index >= self._num_frames
+
+    def _fill(self):
+        if self._paced:
+            due = int((time.monotonic() - self._start_time) * self._sample_rate) - self._frame_index
+        else:
+            due = self._buffer_size // _FRAME_SIZE
+        if self._num_frames is not None:
+            due = min(due, self._num_frames - self._frame_index)
+        free = (self._buffer_size - len(self._pending)) // _FRAME_SIZE
+        if due > free and self._paced:
+            # the device kept sampling while the buffer was full
+            self._dropped_frame_count += due - free
+            self._frame_index += due - free
+        count = min(due, free)
+        if count > 0:
+            self._pending += create_frames(count, self._frame_index, self._sample_rate, self._trailer,
+                                           self._corruption_interval, self._corruption_length)
+            self._frame_index += count
+
+    @property
+    def in_waiting(self) -> int:
+        """
+        :return: The number of bytes in the receive buffer
+        """
+        with self._lock:
+            if self._open:
+                self._fill()
+            return len(self._pending)
+
+    def _get_wait_time(self, missing: int) -> float:
+        # a blocked reader drains the receive buffer continuously, wake up before it is full
+        missing_frames = -(-min(missing, self._buffer_size // 2) // _FRAME_SIZE)
+        return max(missing_frames / self._sample_rate, _MIN_SLEEP)
+
+    def _take(self, data: bytearray, size: int):
+        count = size - len(data)
+        data += self._pending[0:count]
+        del self._pending[0:count]
+
+    def read(self, size: int = 1) -> bytes:
+        """
+        Reads size bytes. Like pyserial, this blocks until size bytes were received if timeout is None and returns
+        after timeout seconds with fewer bytes otherwise. Reads larger than the receive buffer are served in several
+        parts. After all num_frames frames were sent, the remaining bytes are returned without blocking.
+        :param size: The number of bytes to read. Default 1
+        :return: The received bytes
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        data = bytearray()
+        while True:
+            with self._lock:
+                if not self._open:
+                    return bytes(data)
+                self._fill()
+                self._take(data, size)
+                if len(data) >= size or self.is_exhausted():
+                    return bytes(data)
+                wait_time = self._get_wait_time(size - len(data))
+            if not self._paced:
+                # frames are sent immediately, the next iteration refills the buffer
+                continue
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self._take(data, size)
+                    return bytes(data)
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+    def write(self, data) -> int:
+        """
+        Discards the written bytes, the electronics interface does not receive commands.
+        :param data: The bytes to write
+        :return: The number of written bytes
+        """
+        return len(data)
+
+    def reset_input_buffer(self):
+        """
+        Discards all bytes in the receive buffer.
+        """
+        with self._lock:
+            self._pending = bytearray()
+
+
+class PtySimulator:
+
+    def __init__(self, sample_rate: float = _DEFAULT_SAMPLE_RATE, num_frames: int = None,
+                 trailer: bytes = _DEFAULT_TRAILER, corruption_interval: int = None, paced: bool = True):
+        """
+        Simulates a HEX sensor electronics interface on a pseudo terminal (POSIX only), so that the complete serial
+        stack including the operating system and pyserial is exercised: HEXSensor(simulator.get_port()). After
+        start(), a background thread writes the frames of a SimulatedSerial to the pseudo terminal. If paced is
+        True, frames are sent at the sample rate and frames are dropped if the reader falls behind, see
+        get_dropped_frame_count(). Otherwise, frames are sent as fast as the reader consumes them. Since pyserial
+        discards bytes received before the port was opened, connect the reader between open() and start(). Used
+        as context manager, the pseudo terminal is opened on entry and closed on exit.
+        :param sample_rate: The sample rate in Hz. Default 1000.0
+        :param num_frames: The total number of frames to send. Default None (unbounded)
+        :param trailer: The four trailing bytes of every frame. Default b'\r\n\r\n'
+        :param corruption_interval: Damage every n-th frame, see create_frames(). Default None (no corruption)
+        :param paced: Whether frames are sent at the sample rate. Default True
+        """
+        self._source = SimulatedSerial(sample_rate, num_frames, trailer, corruption_interval, paced=paced)
+        self._source.close()
+        self._master = None
+        self._slave = None
+        self._port = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def get_port(self) -> str:
+        """
+        :return: The path of the pseudo terminal to connect to, None if it was not opened
+        """
+        return self._port
+
+    def get_sent_frame_count(self) -> int:
+        """
+        :return: The number of frames sent so far, including dropped frames
+        """
+        return self._source.get_sent_frame_count()
+
+    def get_dropped_frame_count(self) -> int:
+        """
+        :return: The number of frames lost because the reader did not keep up
+        """
+        return self._source.get_dropped_frame_count()
+
+    def open(self):
+        """
+        Opens the pseudo terminal without sending frames. Calling open does nothing if the pseudo terminal is open.
+        """
+        if self._master is not None:
+            return
+        import tty
+        self._master, self._slave = os.openpty()
+        # raw mode: the terminal must not translate the trailing bytes (e.g. \r to \n) of the frames
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self._port = os.ttyname(self._slave)
+
+    def start(self):
+        """
+        Opens the pseudo terminal if necessary and starts sending frames. Calling start does nothing if the
+        simulator is running.
+        """
+        if self._thread is not None:
+            return
+        self.open()
+        self._stop.clear()
+        self._source.open()
+        self._thread = threading.Thread(target=self._write_loop, name='PtySimulator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sending frames and closes the pseudo terminal.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._source.close()
+        if self._master is not None:
+            os.close(self._master)
+            os.close(self._slave)
+            self._master = None
+            self._slave = None
+            self._port = None
+
+    def _write_loop(self):
+        import select
+        self._source.timeout = _PTY_POLL_INTERVAL
+        data = b''
+        while not self._stop.is_set():
+            if len(data) == 0:
+                if self._source.is_exhausted() and self._source.in_waiting == 0:
+                    break
+                # wait for at least one frame, then take everything sent so far
+                data = self._source.read(_FRAME_SIZE)
+                data += self._source.read(min(self._source.in_waiting, _PTY_WRITE_SIZE))
+                continue
+            if len(select.select([], [self._master], [], _PTY_POLL_INTERVAL)[1]) == 0:
+                continue
+            try:
+                data = data[os.write(self._master, data):]
+            except BlockingIOError:
+                pass
@@ -0,0 +1,235 @@
+from .recording import *
+
+_DEFAULT_HISTOGRAM_BINS = 50
+
+
+def _get_value_columns(recording: BufferedRecording, variable: Variable, direction: Direction) -> np.ndarray:
+    if direction is None:
+        return get_magnitudes(recording, variable)
+    return recording.get_array_of_values(variable, direction)
+
+
+def get_magnitudes(recording: BufferedRecording, variable: Variable) -> np.ndarray:
+    """
+    Returns the length of the force or torque vector of every data point, calculated for all data points at once.
+    :param recording: The recording
+    :param variable: Force/Torque
+    :return: 1D numpy array
+    """
+    vectors = recording.get_array_of_vectors(variable)
+    return np.sqrt(np.einsum('ij,ij->i', vectors, vectors, dtype=np.float64))
+
+
+def get_summary(recording: BufferedRecording) -> dict:
+    """
+    Returns summary statistics of all six F/T channels of a recording: the minimum, maximum, mean, standard
+    deviation and root mean square of each channel as arrays of six values (Fx, Fy, Fz, Mx, My, Mz). Additionally,
+    the maximum force and torque magnitudes and the number of data points are returned. Means are accumulated in
+    float64 for float32 recordings.
+    :param recording: The recording
+    :return: Dictionary of statistics
+    """
+    values = recording.get_ft_matrix()
+    mean = values.mean(axis=0, dtype=np.float64)
+    std = values.std(axis=0, dtype=np.float64)
+    return {
+        'count': recording.get_data_point_count(),
+        'min': values.min(axis=0).astype(np.float64),
+        'max': values.max(axis=0).astype(np.float64),
+        'mean': mean,
+        'std': std,
+        'rms': np.sqrt(mean * mean + std * std),
+        'max_force_magnitude': float(get_magnitudes(recording, Variable.FORCE).max()),
+        'max_torque_magnitude': float(get_magnitudes(recording, Variable.TORQUE).max()),
+    }
+
+
+def find_peaks(recording: BufferedRecording, variable: Variable, direction: Direction = None, height: float = None,
+               min_distance: int = 1) -> np.ndarray:
+    """
+    Finds the local maxima of one channel or, if direction is None, of the force or torque magnitude. Candidates are
+    found for all data points at once. Peaks lower than height are ignored. If peaks are closer than min_distance
+    data points, only the highest of them is kept. A plateau (equal consecutive values) is a peak only if the values
+    before and after it are lower, it is reported at its middle data point (rounded down) like scipy.signal.find_peaks.
+    Flat shoulders of rising or falling edges are no peaks.
+    :param recording: The recording
+    :param variable: Force/Torque
+    :param direction: X/Y/Z or None for the magnitude. Default None
+    :param height: The minimum height of a peak. Default None (no minimum)
+    :param min_distance: The minimum distance between two peaks in data points. Default 1
+    :return: 1D array of the indices of the peaks in ascending order
+    """
+    signal = _get_value_columns(recording, variable, direction)
+    if len(signal) < 3:
+        return np.empty((0,), dtype=np.intp)
+    # collapse runs of equal values, a run is a peak if the runs before and after it are lower
+    starts = np.flatnonzero(np.concatenate(([True], signal[1:] != signal[0:-1])))
+    ends = np.append(starts[1:], len(signal)) - 1
+    levels = signal[starts]
+    runs = np.flatnonzero((levels[1:-1] > levels[0:-2]) & (levels[1:-1] > levels[2:])) + 1
+    peaks = (starts[runs] + ends[runs]) // 2
+    if height is not None:
+        peaks = peaks[signal[peaks] >= height]
+    if min_distance <= 1 or len(peaks) < 2:
+        return peaks
+    # keep the highest peaks first and remove all lower peaks within min_distance of a kept peak
+    keep = np.ones((len(peaks),), dtype=bool)
+    for index in np.argsort(signal[peaks], kind='stable')[::-1]:
+        if not keep[index]:
+            continue
+        first = np.searchsorted(peaks, peaks[index] - min_distance + 1, side='left')
+        last = np.searchsorted(peaks, peaks[index] + min_distance - 1, side='right')
+        keep[first:last] = False
+        keep[index] = True
+    return peaks[keep]
+
+
+def get_interval_statistics(recording: BufferedRecording) -> dict:
+    """
+    Returns statistics of the intervals between consecutive time stamps in microseconds: the mean, standard
+    deviation (jitter), minimum and maximum interval.
+    :param recording: The recording
+    :return: Dictionary of statistics, the values are None for recordings with a single data point
+    """
+    intervals = np.diff(recording.get_array_of_timestamps(relative=False, seconds=False))
+    if len(intervals) == 0:
+        return {'mean_us': None, 'std_us': None, 'min_us': None, 'max_us': None}
+    return {
+        'mean_us': float(intervals.mean()),
+        'std_us': float(intervals.std()),
+        'min_us': int(intervals.min()),
+        'max_us': int(intervals.max()),
+    }
+
+
+def get_interval_histogram(recording: BufferedRecording, bins=_DEFAULT_HISTOGRAM_BINS) -> tuple:
+    """
+    Returns a histogram of the intervals between consecutive time stamps in microseconds, e.g. to inspect the
+    timing jitter of a recording.
+    :param recording: The recording
+    :param bins: The number of bins or the bin edges, see numpy.histogram(). Default 50
+    :return: A tuple of the counts and the bin edges
+    """
+    intervals = np.diff(recording.get_array_of_timestamps(relative=False, seconds=False))
+    return np.histogram(intervals, bins=bins)
+
+
+class RunningStatistics:
+
+    def __init__(self, channels: int = 6):
+        """
+        Creates an accumulator which updates the statistics of F/T values block by block, e.g. during live
+        acquisition, without storing the values. Mean and variance are updated using Welford's algorithm, extended to
+        blocks (Chan et al.): each block is reduced with NumPy and merged into the totals, which is numerically
+        stable and costs a few operations per block.
+        :param channels: The number of channels. Default 6
+        """
+        self._channels = channels
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all accumulated values.
+        """
+        self._count = 0
+        self._mean = np.zeros((self._channels,), dtype=np.float64)
+        self._m2 = np.zeros((self._channels,), dtype=np.float64)
+        self._minimum = np.full((self._channels,), np.inf)
+        self._maximum = np.full((self._channels,), -np.inf)
+
+    def _merge(self, count: int, mean: np.ndarray, m2: np.ndarray, minimum: np.ndarray, maximum: np.ndarray):
+        total = self._count + count
+        delta = mean - self._mean
+        self._mean = self._mean + delta * (count / total)
+        self._m2 = self._m2 + m2 + delta * delta * (self._count * count / total)
+        self._count = total
+        self._minimum = np.minimum(self._minimum, minimum)
+        self._maximum = np.maximum(self._maximum, maximum)
+
+    def update(self, values: np.ndarray):
+        """
+        Adds a block of values.
+        :param values: 2D array of shape (N, channels), e.g. the F/T values of a block of samples
+        """
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values.reshape((1, -1))
+        if values.shape[1] != self._channels:
+            raise Exception("values must be of shape (N, " + str(self._channels) + ")")
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0, dtype=np.float64)
+        deviations = values - mean
+        m2 = np.einsum('ij,ij->j', deviations, deviations)
+        self._merge(len(values), mean, m2, values.min(axis=0), values.max(axis=0))
+
+    def update_recording(self, recording: BufferedRecording):
+        """
+        Adds all F/T values of a recording, e.g. of a block returned by HEXSensor.iter_blocks().
+        :param recording: The recording
+        """
+        self.update(recording.get_ft_matrix())
+
+    def merge(self, other):
+        """
+        Adds the values accumulated by another RunningStatistics, e.g. to combine the statistics of several threads.
+        :param other: Another RunningStatistics
+        """
+        if other.get_count() > 0:
+            self._merge(other._count, other._mean, other._m2, other._minimum, other._maximum)
+
+    def get_count(self) -> int:
+        """
+        :return: The number of accumulated samples
+        """
+        return self._count
+
+    def get_mean(self) -> np.ndarray:
+        """
+        :return: The mean of each channel, None if no values were added
+        """
+        return self._mean.copy() if self._count > 0 else None
+
+    def get_variance(self) -> np.ndarray:
+        """
+        :return: The (population) variance of each channel, None if no values were added
+        """
+        return self._m2 / self._count if self._count > 0 else None
+
+    def get_std(self) -> np.ndarray:
+        """
+        :return: The (population) standard deviation of each channel, None if no values were added
+        """
+        return np.sqrt(self._m2 / self._count) if self._count > 0 else None
+
+    def get_rms(self) -> np.ndarray:
+        """
+        :return: The root mean square of each channel, None if no values were added
+        """
+        return np.sqrt(self._mean * self._mean + self._m2 / self._count) if self._count > 0 else None
+
+    def get_min(self) -> np.ndarray:
+        """
+        :return: The minimum of each channel, None if no values were added
+        """
+        return self._minimum.copy() if self._count > 0 else None
+
+    def get_max(self) -> np.ndarray:
+        """
+        :return: The maximum of each channel, None if no values were added
+        """
+        return self._maximum.copy() if self._count > 0 else None
+
+    def get_summary(self) -> dict:
+        """
+        Returns the accumulated statistics in the same form as get_summary() without the magnitudes.
+        :return: Dictionary of statistics
+        """
+        return {
+            'count': self._count,
+            'min': self.get_min(),
+            'max': self.get_max(),
+            'mean': self.get_mean(),
+            'std': self.get_std(),
+            'rms': self.get_rms(),
+        }
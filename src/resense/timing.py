@@ -0,0 +1,221 @@
+import numpy as np
+from collections import deque
+from math import sqrt
+
+# maximum deviation of the estimated sample period from the nominal period (2%)
+_MAX_PERIOD_DEVIATION = 0.02
+# windows whose earliest arrival is later than this many sample periods (and at least _MIN_GAP_US) are treated as
+# a gap in the stream
+_GAP_PERIODS = 100
+_MIN_GAP_US = 100000
+# duration of the windows used to estimate the clock drift in microseconds
+_DRIFT_WINDOW_US = 1000000
+# number of windows whose lower envelope is used to estimate the sample period
+_DRIFT_WINDOWS = 10
+# fraction of the offset to the lower envelope which is corrected after each window
+_OFFSET_GAIN = 0.5
+
+
+class SampleClock:
+
+    def __init__(self, sample_rate: float = None, drift_correction: bool = True, counter_modulus: int = None):
+        """
+        Creates a clock which derives the time stamps of samples from their index instead of the time at which
+        Python decoded them. The index of a sample is either counted or taken from a device counter contained in
+        the frames. Each sample is stamped with origin + index * period, which yields a monotonic and evenly spaced
+        timebase. The origin is anchored to the host clock using the arrival times of the received blocks: since a
+        sample can only arrive after it was taken, the origin follows the earliest arrivals (the lower envelope).
+        The earliest arrival of each window of about one second is a point of the lower envelope. If
+        drift_correction is True, the period is the slope of a line fitted through the last ten of these points,
+        which compensates the deviation of the sensor clock from the host clock. The origin is slewed towards the
+        fitted line after each window. If the sample rate is None, the period is always estimated this way; it is
+        seeded from the spacing between the arrivals of the first two blocks.
+        :param sample_rate: The nominal sample rate in Hz. Default None (estimated)
+        :param drift_correction: Whether to correct the period for clock drift. Default True
+        :param counter_modulus: The modulus of the device counter if the frames contain one. Default None
+        """
+        self._nominal_period = None if sample_rate is None else 1000000.0 / sample_rate
+        self._drift_correction = drift_correction
+        self._counter_modulus = counter_modulus
+        self.reset()
+
+    def reset(self, start_time: int = None):
+        """
+        Resets the clock. The next block will be anchored from scratch.
+        :param start_time: The host time in microseconds at which the acquisition started. If no sample rate was
+                           specified, it is used to stamp the first block until the second block arrives. Default
+                           None
+        """
+        self._period = self._nominal_period
+        self._origin = None
+        self._start_time = start_time
+        self._first_block = None
+        self._next_index = 0
+        self._last_counter = None
+        self._last_timestamp = None
+        self._window_start = None
+        self._window_minimum = None
+        self._envelope = deque(maxlen=_DRIFT_WINDOWS)
+        self._residual_count = 0
+        self._residual_mean = 0.0
+        self._residual_m2 = 0.0
+        self._residual_maximum = None
+        self._residual_minimum = None
+        self._gap_count = 0
+
+    def set_sample_rate(self, sample_rate: float):
+        """
+        Sets the nominal sample rate and resets the clock.
+        :param sample_rate: The nominal sample rate in Hz
+        """
+        self._nominal_period = 1000000.0 / sample_rate
+        self.reset()
+
+    def get_nominal_sample_rate(self) -> float:
+        """
+        :return: The nominal sample rate in Hz, None if it was not specified
+        """
+        return None if self._nominal_period is None else 1000000.0 / self._nominal_period
+
+    def get_sample_rate(self) -> float:
+        """
+        :return: The current (drift corrected) estimate of the sample rate in Hz, None if not known yet
+        """
+        return None if not self._period else 1000000.0 / self._period
+
+    def get_statistics(self) -> dict:
+        """
+        Returns statistics about the arrival jitter, i.e. the difference between the arrival time of each block and
+        the time stamp of its last sample, in microseconds. Additionally returns the estimated sample rate, the
+        deviation of the estimated period from the nominal period in ppm and the number of detected gaps.
+        :return: Dictionary of statistics
+        """
+        drift = None
+        if self._period and self._nominal_period:
+            drift = (self._period / self._nominal_period - 1.0) * 1000000.0
+        std = sqrt(self._residual_m2 / self._residual_count) if self._residual_count > 0 else None
+        return {
+            'sample_rate': self.get_sample_rate(),
+            'drift_ppm': drift,
+            'blocks': self._residual_count,
+            'jitter_mean_us': self._residual_mean if self._residual_count > 0 else None,
+            'jitter_std_us': std,
+            'jitter_min_us': self._residual_minimum,
+            'jitter_max_us': self._residual_maximum,
+            'gaps': self._gap_count,
+        }
+
+    def _get_indices(self, count: int, counters, gaps) -> np.ndarray:
+        if counters is None:
+            indices = np.arange(self._next_index, self._next_index + count, dtype=np.int64)
+            self._next_index += count
+            for position, skipped in gaps:
+                indices[position:] += skipped
+                self._next_index += skipped
+            return indices
+        counters = np.asarray(counters, dtype=np.int64)
+        previous = counters[0] - 1 if self._last_counter is None else self._last_counter
+        steps = np.diff(counters, prepend=previous)
+        if self._counter_modulus is not None:
+            steps %= self._counter_modulus
+        indices = self._next_index - 1 + np.cumsum(steps)
+        self._last_counter = int(counters[-1])
+        self._next_index = int(indices[-1]) + 1
+        return indices
+
+    def _add_residual(self, residual: float):
+        self._residual_count += 1
+        delta = residual - self._residual_mean
+        self._residual_mean += delta / self._residual_count
+        self._residual_m2 += delta * (residual - self._residual_mean)
+        self._residual_maximum = residual if self._residual_maximum is None else max(self._residual_maximum, residual)
+        self._residual_minimum = residual if self._residual_minimum is None else min(self._residual_minimum, residual)
+
+    def _anchor(self, index: int, arrival_time: int):
+        self._origin = arrival_time - index * self._period
+        self._window_start = index
+        self._window_minimum = None
+        self._envelope.clear()
+
+    def _correct_drift(self, index: int):
+        minimum_index, minimum_arrival, minimum_residual = self._window_minimum
+        self._window_minimum = None
+        if minimum_residual > max(_GAP_PERIODS * self._period, _MIN_GAP_US):
+            # even the earliest arrival of the whole window was late: samples were lost, anchor the clock again
+            self._gap_count += 1
+            self._anchor(minimum_index, minimum_arrival)
+            self._window_start = index
+            return
+        self._envelope.append((minimum_index, minimum_arrival))
+        self._window_start = index
+        current = self._origin + index * self._period
+        if len(self._envelope) >= 2 and (self._drift_correction or self._nominal_period is None):
+            # fit a line through the lower envelope of the last windows, its slope is the sample period
+            indices = np.array([point[0] for point in self._envelope], dtype=np.float64)
+            arrivals = np.array([point[1] - self._envelope[0][1] for point in self._envelope], dtype=np.float64)
+            slope, intercept = np.polyfit(indices, arrivals, 1)
+            if self._nominal_period is not None:
+                slope = min(max(slope, self._nominal_period * (1.0 - _MAX_PERIOD_DEVIATION)),
+                            self._nominal_period * (1.0 + _MAX_PERIOD_DEVIATION))
+            period = slope
+            target = self._envelope[0][1] + intercept + index * slope
+        else:
+            period = self._period
+            target = current + minimum_residual
+        # slew the origin towards the lower envelope instead of stepping to it
+        self._period = period
+        self._origin = current + _OFFSET_GAIN * (target - current) - index * period
+
+    def timestamp_block(self, count: int, arrival_time: int, counters=None, gaps=None) -> np.ndarray:
+        """
+        Calculates the time stamps of a block of samples which was received at the specified host time. Samples
+        which were sampled but dropped, e.g. corrupted frames, are passed as gaps, so that the following samples keep
+        their index. Gaps are ignored when device counters are used.
+        :param count: The number of samples in the block
+        :param arrival_time: The host time in microseconds at which the block was received
+        :param counters: The device counter of each sample if the frames contain one. Default None
+        :param gaps: Tuples (position, count) of dropped samples before the sample at position, see
+                     FrameSynchronizer.get_gaps(). The position may be equal to count. Default None
+        :return: 1D int64 array of microsecond time stamps
+        """
+        if count == 0:
+            if counters is None and gaps:
+                self._next_index += sum(skipped for _, skipped in gaps)
+            return np.empty((0,), dtype=np.int64)
+        indices = self._get_indices(count, counters, () if gaps is None else gaps)
+        last_index = int(indices[-1])
+        first_block = self._first_block
+        if first_block is not None and last_index > first_block[0] and arrival_time > first_block[1]:
+            # the second block: seed the period from the spacing between the first two arrivals
+            self._period = (arrival_time - first_block[1]) / float(last_index - first_block[0])
+            self._first_block = None
+            self._anchor(last_index, arrival_time)
+        if self._period is None:
+            # no sample rate given: spread the first block evenly since the start of the acquisition until the
+            # second block arrives, the start time includes any idle time before the first sample
+            start_time = arrival_time if self._start_time is None else self._start_time
+            self._period = max(arrival_time - start_time, 1) / float(last_index + 1)
+            self._first_block = (last_index, arrival_time)
+        if self._origin is None:
+            self._anchor(last_index, arrival_time)
+
+        residual = arrival_time - (self._origin + last_index * self._period)
+        if residual < 0:
+            # the block arrived before its predicted time stamp: the origin is too late
+            self._origin += residual
+            if self._window_minimum is not None:
+                self._window_minimum = self._window_minimum[0:2] + (self._window_minimum[2] - residual,)
+            residual = 0.0
+        self._add_residual(residual)
+
+        if self._window_minimum is None or residual <= self._window_minimum[2]:
+            self._window_minimum = (last_index, arrival_time, residual)
+        if (last_index - self._window_start) * self._period >= _DRIFT_WINDOW_US:
+            self._correct_drift(last_index + 1)
+
+        timestamps = (self._origin + indices * self._period).astype(np.int64)
+        if self._last_timestamp is not None and timestamps[0] <= self._last_timestamp:
+            # corrections never move time stamps backwards
+            timestamps = np.maximum(timestamps, self._last_timestamp + 1 + np.arange(count, dtype=np.int64))
+        self._last_timestamp = int(timestamps[-1])
+        return timestamps
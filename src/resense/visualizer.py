@@ -1,44 +1,280 @@
-import matplotlib.pyplot as plt
 from .recording import *
 
+# number of horizontal pixels of a typical plot, each pixel column is drawn using its minimum and maximum
+_DEFAULT_PIXELS = 2000
+_DEFAULT_FRAME_RATE = 30.0
+_DEFAULT_WINDOW = 10.0
+_DEFAULT_LIVE_SAMPLE_RATE = 1000.0
+# fraction of the value range added above and below the data when the y axis of a live plot is rescaled
+_LIVE_Y_MARGIN = 0.1
 
-def _show_generic_xyz_plot(time_points, x, y, z, y_label, legend, name):
-    plt.plot(time_points, x, label="x")
-    plt.plot(time_points, y, label="y")
-    plt.plot(time_points, z, label="z")
-    plt.title(name)
-    plt.xlabel("Time (s)")
-    plt.ylabel(y_label)
-    plt.legend(loc=legend)
-    plt.grid()
-    plt.show()
 
+def _get_pyplot():
+    # matplotlib takes several hundred milliseconds to import, so it is imported when the first plot is created
+    import matplotlib.pyplot
+    return matplotlib.pyplot
 
-def display_force_plot(recording: BufferedRecording, legend: str = "upper left", name: str = None):
+
+def decimate_min_max(time_points: np.ndarray, values: np.ndarray, pixels: int = _DEFAULT_PIXELS) -> tuple:
+    """
+    Reduces the number of points of a line plot without changing its appearance. The points are split into pixels
+    buckets of equal size, and only the minimum and maximum of each bucket are kept in their original order. The
+    resulting plot shows every peak, but its rendering cost depends on the width of the plot instead of the number
+    of points. All buckets are reduced at once.
+    :param time_points: 1D array of x values
+    :param values: 1D array or 2D array of shape (N, channels) of y values
+    :param pixels: The number of buckets, e.g. the width of the plot in pixels. Default 2000
+    :return: A tuple of the x and y values, each of shape (2 * pixels, channels) or (2 * pixels,) for 1D values
     """
-    Displays a force plot showing all force values in the specified recording using matplotlib.
+    values = np.asarray(values)
+    one_dimensional = values.ndim == 1
+    if one_dimensional:
+        values = values.reshape((-1, 1))
+    count = len(values)
+    if count <= 2 * pixels:
+        time_points = np.repeat(np.asarray(time_points).reshape((-1, 1)), values.shape[1], axis=1)
+        return (time_points[:, 0], values[:, 0]) if one_dimensional else (time_points, values)
+    bucket_size = -(-count // pixels)
+    buckets = -(-count // bucket_size)
+    # pad the last bucket with its last value, so that all buckets can be reduced as one 3D array
+    padded = np.pad(values, ((0, buckets * bucket_size - count), (0, 0)), mode='edge')
+    padded = padded.reshape((buckets, bucket_size, values.shape[1]))
+    offsets = np.arange(buckets).reshape((-1, 1)) * bucket_size
+    minimum_indices = np.minimum(padded.argmin(axis=1) + offsets, count - 1)
+    maximum_indices = np.minimum(padded.argmax(axis=1) + offsets, count - 1)
+    indices = np.empty((2 * buckets, values.shape[1]), dtype=np.intp)
+    indices[0::2] = np.minimum(minimum_indices, maximum_indices)
+    indices[1::2] = np.maximum(minimum_indices, maximum_indices)
+    decimated_time_points = np.asarray(time_points)[indices]
+    decimated_values = np.take_along_axis(values, indices, axis=0)
+    if one_dimensional:
+        return decimated_time_points[:, 0], decimated_values[:, 0]
+    return decimated_time_points, decimated_values
+
+
+def _draw_xyz_plot(axes, recording: BufferedRecording, variable: Variable, y_label: str, legend: str, name: str,
+                   pixels: int):
+    time_points, values = decimate_min_max(recording.get_array_of_timestamps(),
+                                           recording.get_array_of_vectors(variable), pixels)
+    for channel, label in enumerate(["x", "y", "z"]):
+        axes.plot(time_points[:, channel], values[:, channel], label=label)
+    axes.set_title(name)
+    axes.set_xlabel("Time (s)")
+    axes.set_ylabel(y_label)
+    axes.legend(loc=legend)
+    axes.grid()
+
+
+def _show_generic_xyz_plot(recording, variable, y_label, legend, name, pixels, block):
+    plt = _get_pyplot()
+    figure, axes = plt.subplots()
+    _draw_xyz_plot(axes, recording, variable, y_label, legend, name, pixels)
+    plt.show(block=block)
+
+
+def _create_headless_figure():
+    # the figure is not managed by pyplot and renders using Agg, so no display is required (e.g. on CI machines)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _save_generic_xyz_plot(recording, variable, y_label, legend, name, pixels, file_path, dpi):
+    figure = _create_headless_figure()
+    _draw_xyz_plot(figure.subplots(), recording, variable, y_label, legend, name, pixels)
+    figure.savefig(file_path, dpi=dpi)
+
+
+def display_force_plot(recording: BufferedRecording, legend: str = "upper left", name: str = None,
+                       pixels: int = _DEFAULT_PIXELS, block: bool = True):
+    """
+    Displays a force plot showing all force values in the specified recording using matplotlib. Long recordings are
+    decimated to the minimum and maximum of each of the specified number of buckets, see decimate_min_max().
     :param recording: The recording to plot
     :param legend: Where to display the legend. See matplotlib documentation
     :param name: The title for the plot
+    :param pixels: The number of buckets. Default 2000
+    :param block: Whether to block until the plot window is closed. Default True
     """
-    time_points = recording.get_array_of_timestamps()
-    x_points = recording.get_array_of_values(Variable.FORCE, Direction.X)
-    y_points = recording.get_array_of_values(Variable.FORCE, Direction.Y)
-    z_points = recording.get_array_of_values(Variable.FORCE, Direction.Z)
+    _show_generic_xyz_plot(recording, Variable.FORCE, "Force (N)", legend, name, pixels, block)
 
-    _show_generic_xyz_plot(time_points, x_points, y_points, z_points, "Force (N)", legend, name)
+
+def display_torque_plot(recording: BufferedRecording, legend: str = "upper left", name: str = None,
+                        pixels: int = _DEFAULT_PIXELS, block: bool = True):
+    """
+    Displays a torque plot showing all torque values in the specified recording using matplotlib. Long recordings
+    are decimated to the minimum and maximum of each of the specified number of buckets, see decimate_min_max().
+    :param recording: The recording to plot
+    :param legend: Where to display the legend. See matplotlib documentation
+    :param name: The title for the plot
+    :param pixels: The number of buckets. Default 2000
+    :param block: Whether to block until the plot window is closed. Default True
+    """
+    _show_generic_xyz_plot(recording, Variable.TORQUE, "Torque (mNm)", legend, name, pixels, block)
 
 
-def display_torque_plot(recording: BufferedRecording, legend: str = "upper left", name: str = None):
+def save_force_plot(recording: BufferedRecording, file_path: str, legend: str = "upper left", name: str = None,
+                    pixels: int = _DEFAULT_PIXELS, dpi: int = None):
     """
-    Displays a torque plot showing all torque values in the specified recording using matplotlib.
+    Saves a force plot of the specified recording to an image file (e.g. png, svg or pdf), see display_force_plot().
+    No display is required, so this can be used to generate reports on headless machines.
     :param recording: The recording to plot
+    :param file_path: The file to write to
     :param legend: Where to display the legend. See matplotlib documentation
     :param name: The title for the plot
+    :param pixels: The number of buckets. Default 2000
+    :param dpi: The resolution of the image. Default None (matplotlib default)
     """
-    time_points = recording.get_array_of_timestamps()
-    x_points = recording.get_array_of_values(Variable.TORQUE, Direction.X)
-    y_points = recording.get_array_of_values(Variable.TORQUE, Direction.Y)
-    z_points = recording.get_array_of_values(Variable.TORQUE, Direction.Z)
+    _save_generic_xyz_plot(recording, Variable.FORCE, "Force (N)", legend, name, pixels, file_path, dpi)
+
+
+def save_torque_plot(recording: BufferedRecording, file_path: str, legend: str = "upper left", name: str = None,
+                     pixels: int = _DEFAULT_PIXELS, dpi: int = None):
+    """
+    Saves a torque plot of the specified recording to an image file (e.g. png, svg or pdf), see
+    display_torque_plot(). No display is required, so this can be used to generate reports on headless machines.
+    :param recording: The recording to plot
+    :param file_path: The file to write to
+    :param legend: Where to display the legend. See matplotlib documentation
+    :param name: The title for the plot
+    :param pixels: The number of buckets. Default 2000
+    :param dpi: The resolution of the image. Default None (matplotlib default)
+    """
+    _save_generic_xyz_plot(recording, Variable.TORQUE, "Torque (mNm)", legend, name, pixels, file_path, dpi)
+
+
+class LivePlot:
+
+    def __init__(self, sensor, variable: Variable = Variable.FORCE, window: float = _DEFAULT_WINDOW,
+                 frame_rate: float = _DEFAULT_FRAME_RATE, pixels: int = _DEFAULT_PIXELS // 2):
+        """
+        Creates a plot which shows the latest force or torque values of a streaming sensor, see
+        HEXSensor.start_streaming(). The plot is redrawn at a fixed frame rate independent of the sample rate: each
+        frame takes the samples of the last window seconds from the ring buffer of the sensor and decimates them to
+        the specified number of buckets, see decimate_min_max(). Only the lines are redrawn (blitting), the axes are
+        redrawn only if the value range grows or shrinks considerably.
+        :param sensor: A streaming HEXSensor or any object providing get_latest_samples()
+        :param variable: Force/Torque. Default Force
+        :param window: The displayed time frame in seconds. Default 10.0
+        :param frame_rate: The number of frames per second. Default 30.0
+        :param pixels: The number of buckets. Default 1000
+        """
+        self._sensor = sensor
+        self._variable = variable
+        self._window = window
+        self._frame_rate = frame_rate
+        self._pixels = pixels
+        self._figure = None
+        self._axes = None
+        self._lines = []
+        self._background = None
+        self._timer = None
+        self._frame_count = 0
+
+    def _create_figure(self, figure=None):
+        self._figure = _get_pyplot().figure() if figure is None else figure
+        self._axes = self._figure.subplots()
+        self._lines = [self._axes.plot([], [], label=label, animated=True)[0] for label in ["x", "y", "z"]]
+        self._axes.set_xlim(-self._window, 0.0)
+        self._axes.set_xlabel("Time (s)")
+        self._axes.set_ylabel("Force (N)" if self._variable is Variable.FORCE else "Torque (mNm)")
+        self._axes.legend(loc="upper left")
+        self._axes.grid()
+        self._figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # the static parts of the plot were redrawn: store them as background for the next frames
+        self._background = self._figure.canvas.copy_from_bbox(self._figure.bbox)
+        for line in self._lines:
+            self._axes.draw_artist(line)
+
+    def _get_sample_count(self) -> int:
+        sample_rate = None
+        if hasattr(self._sensor, 'get_timing_statistics'):
+            sample_rate = self._sensor.get_timing_statistics()['sample_rate']
+        return int(self._window * (sample_rate or _DEFAULT_LIVE_SAMPLE_RATE)) + 1
+
+    def _rescale(self, values: np.ndarray) -> bool:
+        minimum = float(values.min())
+        maximum = float(values.max())
+        lower, upper = self._axes.get_ylim()
+        span = max(maximum - minimum, 1e-9)
+        # grow immediately, shrink only if the data uses less than half of the axis to avoid redrawing every frame
+        if minimum >= lower and maximum <= upper and span > 0.5 * (upper - lower):
+            return False
+        self._axes.set_ylim(minimum - _LIVE_Y_MARGIN * span, maximum + _LIVE_Y_MARGIN * span)
+        return True
+
+    def update(self):
+        """
+        Draws one frame using the latest samples of the sensor. This is called by the timer started by show(), but
+        can also be called manually, e.g. before save().
+        """
+        if self._figure is None:
+            self._create_figure()
+        recording = self._sensor.get_latest_samples(self._get_sample_count())
+        if recording is None:
+            return
+        timestamps = recording.get_array_of_timestamps(relative=False, seconds=False)
+        time_points = (timestamps - timestamps[-1]) / 1000000.0
+        time_points, values = decimate_min_max(time_points, recording.get_array_of_vectors(self._variable),
+                                               self._pixels)
+        for channel, line in enumerate(self._lines):
+            line.set_data(time_points[:, channel], values[:, channel])
+        canvas = self._figure.canvas
+        if self._rescale(values) or self._background is None:
+            # a full redraw calls _on_draw, which stores the new background and draws the lines
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            for line in self._lines:
+                self._axes.draw_artist(line)
+            canvas.blit(self._figure.bbox)
+        canvas.flush_events()
+        self._frame_count += 1
+
+    def get_frame_count(self) -> int:
+        """
+        :return: The number of frames drawn so far
+        """
+        return self._frame_count
+
+    def show(self, block: bool = True):
+        """
+        Opens the plot window and starts redrawing it at the frame rate.
+        :param block: Whether to block until the plot window is closed. Default True
+        """
+        if self._figure is None:
+            self._create_figure()
+        self._timer = self._figure.canvas.new_timer(interval=int(1000.0 / self._frame_rate))
+        self._timer.add_callback(self.update)
+        self._timer.start()
+        _get_pyplot().show(block=block)
+
+    def save(self, file_path: str, dpi: int = None):
+        """
+        Draws the latest samples and saves the plot to an image file. If the plot was not shown, no display is
+        required, e.g. to save snapshots of a live acquisition on a headless machine.
+        :param file_path: The file to write to
+        :param dpi: The resolution of the image. Default None (matplotlib default)
+        """
+        if self._figure is None:
+            self._create_figure(_create_headless_figure())
+        self.update()
+        for line in self._lines:
+            line.set_animated(False)
+        self._figure.savefig(file_path, dpi=dpi)
+        for line in self._lines:
+            line.set_animated(True)
 
-    _show_generic_xyz_plot(time_points, x_points, y_points, z_points, "Torque (mNm)", legend, name)
+    def close(self):
+        """
+        Stops redrawing and closes the plot window.
+        """
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        if self._figure is not None:
+            _get_pyplot().close(self._figure)
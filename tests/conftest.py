@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the package is located in src/resense and installed as resensepy, the tests use the source tree
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
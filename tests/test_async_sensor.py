@@ -0,0 +1,57 @@
+import asyncio
+import numpy as np
+from resense.async_sensor import AsyncHEXSensor, ReplayTransport
+from resense.framing import _decode_frames
+from resense.simulator import create_frames
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_record_samples_from_replay():
+    data = create_frames(500)
+    sensor = AsyncHEXSensor(transport=ReplayTransport(data, chunk_size=1000), sample_rate=1000.0)
+
+    async def record():
+        await sensor.connect()
+        first = await sensor.record_samples(300)
+        second = await sensor.record_samples(300)
+        await sensor.disconnect()
+        return first, second
+
+    first, second = _run(record())
+    assert first.get_data_point_count() == 300
+    assert second.get_data_point_count() == 200
+    values = np.concatenate((first.get_ft_matrix(), second.get_ft_matrix()))
+    assert np.array_equal(values, _decode_frames(data))
+    timestamps = np.concatenate((first.get_array_of_timestamps(relative=False, seconds=False),
+                                 second.get_array_of_timestamps(relative=False, seconds=False)))
+    assert np.all(np.diff(timestamps) > 0)
+
+
+def test_stream_yields_blocks_until_the_end():
+    data = create_frames(1050, corruption_interval=100)
+    sensor = AsyncHEXSensor(transport=ReplayTransport(data, chunk_size=700))
+
+    async def stream():
+        await sensor.connect()
+        return [block async for block in sensor.stream(min_samples=128)]
+
+    blocks = _run(stream())
+    assert all(block.get_data_point_count() >= 128 for block in blocks[0:-1])
+    assert sum(block.get_data_point_count() for block in blocks) == 1040
+    assert sensor.get_frame_statistics()['corrupted_frames'] == 10
+
+
+def test_paced_replay():
+    data = create_frames(100, sample_rate=5000.0)
+    sensor = AsyncHEXSensor(transport=ReplayTransport(data, chunk_size=280, sample_rate=5000.0), sample_rate=5000.0)
+
+    async def record():
+        await sensor.connect()
+        return await sensor.record_samples(100)
+
+    recording = _run(record())
+    assert recording.get_data_point_count() == 100
+    assert recording.get_sample_rate() == 5000.0
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from resense.framing import FrameSynchronizer, _decode_frames
+from resense.simulator import create_frames
+
+
+def test_feed_in_small_chunks():
+    data = create_frames(50)
+    synchronizer = FrameSynchronizer()
+    frames = np.concatenate([synchronizer.feed(data[start:start + 13]) for start in range(0, len(data), 13)])
+    assert np.array_equal(frames, _decode_frames(data))
+    assert synchronizer.get_statistics()['frames'] == 50
+
+
+def test_feed_reports_gaps():
+    data = create_frames(35, corruption_interval=10)
+    synchronizer = FrameSynchronizer(b'\r\n\r\n')
+    frames = synchronizer.feed(data)
+    assert len(frames) == 32
+    assert synchronizer.get_gaps() == [(9, 1), (18, 1), (27, 1)]
+    statistics = synchronizer.get_statistics()
+    assert (statistics['corrupted_frames'], statistics['resyncs']) == (3, 3)
+    synchronizer.feed(b'')
+    assert synchronizer.get_gaps() == []
+
+
+def _corrupt(data: bytes, first: int, count: int) -> bytes:
+    data = bytearray(data)
+    for index in range(first, first + count):
+        data[index * 28 + 24:index * 28 + 28] = b'\x00\xff\x00\xff'
+    return bytes(data)
+
+
+@pytest.mark.parametrize('chunk_size', [28, 56, 100, 300, 200 * 28])
+def test_consecutive_corrupted_frames_in_chunks(chunk_size):
+    data = _corrupt(create_frames(200), 50, 5)
+    synchronizer = FrameSynchronizer(b'\r\n\r\n')
+    frames = []
+    gaps = []
+    for start in range(0, len(data), chunk_size):
+        block = synchronizer.feed(data[start:start + chunk_size])
+        offset = sum(len(frames_of_chunk) for frames_of_chunk in frames)
+        gaps.extend((offset + position, count) for position, count in synchronizer.get_gaps())
+        frames.append(block)
+    assert np.array_equal(np.concatenate(frames), np.delete(_decode_frames(create_frames(200)), range(50, 55), axis=0))
+    assert gaps == [(50, 5)]
+    statistics = synchronizer.get_statistics()
+    assert statistics['corrupted_frames'] == 5
+    assert statistics['discarded_bytes'] == 5 * 28
+    assert statistics['resyncs'] == 1
@@ -0,0 +1,188 @@
+import json
+import numpy as np
+import os
+import pickle
+import pytest
+from resense.exporter import export_recording_chunks_to_csv, export_recording_to_file
+from resense.importer import import_recording_from_file, iter_recording_chunks_from_csv, \
+    iter_recording_chunks_from_json
+from resense.recording import BufferedRecording
+
+
+def _recording(count: int, with_temperature: bool = False) -> BufferedRecording:
+    # values with few significant bits, so that they are exactly representable by float32
+    values = (np.arange(count * 6, dtype=np.float64).reshape((count, 6)) - 3 * count) / 4.0
+    temperatures = np.arange(count, dtype=np.float64) / 8.0 + 20.0 if with_temperature else None
+    return BufferedRecording(timestamps=np.arange(count, dtype=np.int64) * 1000 + 1234567890123,
+                             values=values, temperatures=temperatures)
+
+
+def _assert_equal_recordings(loaded: BufferedRecording, recording: BufferedRecording):
+    assert np.array_equal(loaded.timestamps, recording.timestamps)
+    assert np.array_equal(loaded.values, recording.values)
+    if recording.temperatures is None:
+        assert loaded.temperatures is None
+    else:
+        assert np.array_equal(loaded.temperatures, recording.temperatures)
+
+
+@pytest.mark.parametrize('with_temperature', [False, True])
+def test_bin_round_trip(tmp_path, with_temperature):
+    file_path = str(tmp_path / 'recording.bin')
+    recording = _recording(1000, with_temperature)
+    export_recording_to_file(recording, file_path)
+    loaded = import_recording_from_file(file_path)
+    assert loaded.values.dtype == np.float32
+    _assert_equal_recordings(loaded, recording)
+
+
+@pytest.mark.parametrize('with_temperature', [False, True])
+def test_truncated_bin_file(tmp_path, with_temperature):
+    file_path = str(tmp_path / 'recording.bin')
+    export_recording_to_file(_recording(100, with_temperature), file_path)
+    with open(file_path, 'rb') as file_input:
+        data = file_input.read()
+    with open(file_path, 'wb') as file_output:
+        file_output.write(data[0:-10])
+    with pytest.raises(Exception, match="expected 100 data sets, found 99"):
+        import_recording_from_file(file_path)
+
+
+@pytest.mark.parametrize('with_temperature', [False, True])
+def test_memory_map_bin(tmp_path, with_temperature):
+    file_path = str(tmp_path / 'recording.bin')
+    recording = _recording(1000, with_temperature)
+    export_recording_to_file(recording, file_path)
+    loaded = import_recording_from_file(file_path, memory_map=True)
+    _assert_equal_recordings(loaded, recording)
+    assert not loaded.values.flags.writeable
+    sub_recording = loaded.get_sub_recording(100, 200)
+    assert np.array_equal(sub_recording.values, recording.values[100:200])
+
+
+def test_memory_map_ignores_incomplete_data_set(tmp_path):
+    file_path = str(tmp_path / 'recording.bin')
+    recording = _recording(100)
+    export_recording_to_file(recording, file_path)
+    with open(file_path, 'rb') as file_input:
+        data = file_input.read()
+    with open(file_path, 'wb') as file_output:
+        # header of a file whose recording was interrupted before the count was written
+        file_output.write(bytes(4) + data[4:-10])
+    loaded = import_recording_from_file(file_path, memory_map=True)
+    assert loaded.get_data_point_count() == 99
+    assert np.array_equal(loaded.values, recording.values[0:99])
+
+
+def _write_csv(file_path: str, recording: BufferedRecording, cell_separator: str, dec_separator: str, newline: str):
+    lines = [cell_separator.join(['Timestamp', 'Fx', 'Fy', 'Fz', 'Mx', 'My', 'Mz'])]
+    for timestamp, values in zip(recording.timestamps, recording.values):
+        lines.append(cell_separator.join([str(timestamp)] + [repr(value).replace('.', dec_separator)
+                                                             for value in values.tolist()]))
+    with open(file_path, 'w', newline='') as file_output:
+        file_output.write(newline.join(lines) + newline)
+
+
+def test_csv_round_trip(tmp_path):
+    file_path = str(tmp_path / 'recording.csv')
+    recording = _recording(1000)
+    recording.values[0] = [0.1, -1e-7, 123456.789, 1e20, -0.0, 2.0 / 3.0]
+    export_recording_to_file(recording, file_path)
+    _assert_equal_recordings(import_recording_from_file(file_path), recording)
+
+
+@pytest.mark.parametrize('cell_separator, dec_separator', [(',', '.'), (';', ',')])
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_import_csv_dialects(tmp_path, cell_separator, dec_separator, newline):
+    file_path = str(tmp_path / 'recording.csv')
+    recording = _recording(100)
+    recording.values[0] = [0.1, -1e-7, 123456.789, 1e20, -0.0, 2.0 / 3.0]
+    _write_csv(file_path, recording, cell_separator, dec_separator, newline)
+    _assert_equal_recordings(import_recording_from_file(file_path), recording)
+
+
+def test_csv_chunks(tmp_path):
+    file_path = str(tmp_path / 'recording.csv')
+    copy_path = str(tmp_path / 'copy.csv')
+    recording = _recording(1000)
+    _write_csv(file_path, recording, ';', ',', '\r\n')
+    chunks = list(iter_recording_chunks_from_csv(file_path, chunk_size=300))
+    assert [chunk.get_data_point_count() for chunk in chunks] == [300, 300, 300, 100]
+    export_recording_chunks_to_csv(chunks, copy_path)
+    _assert_equal_recordings(import_recording_from_file(copy_path), recording)
+
+
+@pytest.mark.parametrize('file_extension', ['json', 'pkl', 'dat'])
+@pytest.mark.parametrize('with_temperature', [False, True])
+def test_round_trip(tmp_path, file_extension, with_temperature):
+    file_path = str(tmp_path / ('recording.' + file_extension))
+    recording = _recording(1000, with_temperature)
+    export_recording_to_file(recording, file_path)
+    _assert_equal_recordings(import_recording_from_file(file_path), recording)
+
+
+def test_json_export_writes_nan_and_infinity(tmp_path):
+    file_path = str(tmp_path / 'recording.json')
+    recording = _recording(10, with_temperature=True)
+    recording.values[3] = [np.nan, np.inf, -np.inf, 1.0, 2.0, 3.0]
+    export_recording_to_file(recording, file_path)
+    with open(file_path) as file_input:
+        rows = json.load(file_input)['data']
+    assert np.isnan(rows[3][1])
+    assert rows[3][2:4] == [float('inf'), float('-inf')]
+    loaded = import_recording_from_file(file_path)
+    assert np.array_equal(loaded.values, recording.values, equal_nan=True)
+    assert np.array_equal(loaded.temperatures, recording.temperatures)
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 100, 4096])
+@pytest.mark.parametrize('with_temperature', [False, True])
+def test_json_chunks(tmp_path, block_size, with_temperature):
+    file_path = str(tmp_path / 'recording.json')
+    recording = _recording(200, with_temperature)
+    recording.values[5] = [np.nan, np.inf, -np.inf, 0.1, -1e-7, 1e20]
+    export_recording_to_file(recording, file_path)
+    chunks = list(iter_recording_chunks_from_json(file_path, block_size=block_size))
+    assert sum(chunk.get_data_point_count() for chunk in chunks) == 200
+    assert np.array_equal(np.concatenate([chunk.timestamps for chunk in chunks]), recording.timestamps)
+    assert np.array_equal(np.concatenate([chunk.values for chunk in chunks]), recording.values, equal_nan=True)
+    if with_temperature:
+        assert np.array_equal(np.concatenate([chunk.temperatures for chunk in chunks]), recording.temperatures)
+
+
+def test_import_formatted_json(tmp_path):
+    file_path = str(tmp_path / 'recording.json')
+    recording = _recording(100, with_temperature=True)
+    rows = [[int(timestamp)] + values + [temperature] for timestamp, values, temperature
+            in zip(recording.timestamps, recording.values.tolist(), recording.temperatures.tolist())]
+    with open(file_path, 'w', newline='') as file_output:
+        json.dump({'name': 'test', 'data': rows}, file_output, indent=2)
+        file_output.write('\r\n')
+    for chunk in iter_recording_chunks_from_json(file_path, block_size=50):
+        assert chunk.temperatures is not None
+    _assert_equal_recordings(import_recording_from_file(file_path), recording)
+
+
+class _Exploit:
+
+    def __reduce__(self):
+        return os.system, ('echo unsafe',)
+
+
+def test_pkl_rejects_unsafe_classes(tmp_path):
+    file_path = str(tmp_path / 'recording.pkl')
+    with open(file_path, 'wb') as file_output:
+        pickle.dump({'data': [[0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]], 'exploit': _Exploit()}, file_output)
+    with pytest.raises(pickle.UnpicklingError, match="not allowed"):
+        import_recording_from_file(file_path)
+
+
+def test_pkl_accepts_numpy_arrays(tmp_path):
+    file_path = str(tmp_path / 'recording.pkl')
+    recording = _recording(100)
+    data = np.concatenate((recording.timestamps[:, None].astype(np.float64), recording.values), axis=1)
+    with open(file_path, 'wb') as file_output:
+        pickle.dump({'data': data}, file_output)
+    loaded = import_recording_from_file(file_path)
+    assert np.array_equal(loaded.values, recording.values)
+    assert loaded.get_data_point_count() == 100
@@ -0,0 +1,81 @@
+import pytest
+from resense import metrics, sensor
+from resense.sensor import HEXSensor
+from resense.simulator import SimulatedSerial
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset_metrics()
+    metrics.enable_metrics()
+    yield
+    metrics.disable_metrics()
+    metrics.reset_metrics()
+
+
+def test_registration_returns_existing_metric():
+    test_counter = metrics.counter('resense_test_registration_total', 'Test counter', ('port',))
+    assert metrics.counter('resense_test_registration_total', 'Test counter', ('port',)) is test_counter
+    with pytest.raises(Exception, match="already registered"):
+        metrics.histogram('resense_test_registration_total', 'Test histogram')
+
+
+def test_updates_are_ignored_while_disabled():
+    test_counter = metrics.counter('resense_test_disabled_total', 'Test counter')
+    test_counter.inc()
+    assert metrics.start_timer() is None
+    assert metrics.get_metrics()['resense_test_disabled_total']['samples'] == []
+
+
+def test_counter_and_gauge(enabled_metrics):
+    test_counter = metrics.counter('resense_test_counter_total', 'Test counter', ('port',))
+    test_gauge = metrics.gauge('resense_test_gauge', 'Test gauge', ('port',))
+    test_counter.inc(labels=('a',))
+    test_counter.inc(5, ('a',))
+    test_counter.inc(2, ('b',))
+    test_gauge.set(3.5, ('a',))
+    test_gauge.set(1.5, ('a',))
+    assert test_counter.to_dict()['samples'] == [{'labels': {'port': 'a'}, 'value': 6},
+                                                 {'labels': {'port': 'b'}, 'value': 2}]
+    assert test_gauge.to_prometheus() == ('# HELP resense_test_gauge Test gauge\n'
+                                          '# TYPE resense_test_gauge gauge\n'
+                                          'resense_test_gauge{port="a"} 1.5\n')
+
+
+def test_histogram_prometheus_text(enabled_metrics):
+    test_histogram = metrics.histogram('resense_test_seconds', 'Test histogram', ('port',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        test_histogram.observe(value, ('COM"1',))
+    assert test_histogram.to_prometheus() == ('# HELP resense_test_seconds Test histogram\n'
+                                              '# TYPE resense_test_seconds histogram\n'
+                                              'resense_test_seconds_bucket{port="COM\\"1",le="0.1"} 2\n'
+                                              'resense_test_seconds_bucket{port="COM\\"1",le="1.0"} 3\n'
+                                              'resense_test_seconds_bucket{port="COM\\"1",le="+Inf"} 4\n'
+                                              'resense_test_seconds_sum{port="COM\\"1"} 2.65\n'
+                                              'resense_test_seconds_count{port="COM\\"1"} 4\n')
+    assert test_histogram.to_prometheus() in metrics.get_prometheus_text()
+    sample = metrics.get_metrics()['resense_test_seconds']['samples'][0]
+    assert sample['count'] == 4
+    assert sample['buckets'] == {0.1: 2, 1.0: 3, float('inf'): 4}
+
+
+def _record_samples(count: int):
+    hex_sensor = HEXSensor(None, sample_rate=1000.0, transport=SimulatedSerial(1000.0, paced=False))
+    assert hex_sensor.connect()
+    recording = hex_sensor.record_samples(count)
+    hex_sensor.disconnect()
+    return recording
+
+
+def test_sensor_metrics(enabled_metrics):
+    assert _record_samples(100).get_data_point_count() == 100
+    collected = metrics.get_metrics()
+    assert collected['resense_sensor_samples_total']['samples'][0]['value'] >= 100
+    assert collected['resense_sensor_calibration_seconds']['samples'][0]['count'] >= 1
+
+
+def test_sensor_does_not_observe_while_disabled(monkeypatch):
+    observed = []
+    monkeypatch.setattr(sensor._CALIBRATION_SECONDS, 'observe_since', lambda *arguments: observed.append(arguments))
+    assert _record_samples(100).get_data_point_count() == 100
+    assert observed == []
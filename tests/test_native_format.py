@@ -0,0 +1,55 @@
+import numpy as np
+import os
+import pytest
+from resense.native_format import _read_native_file, _read_native_metadata, _write_native_file
+
+
+def _columns(count: int) -> dict:
+    return {'timestamps': np.arange(count, dtype=np.int64) * 1000,
+            'values': np.arange(count * 6, dtype=np.float32).reshape((count, 6))}
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_write_and_read(tmp_path, compression):
+    file_path = str(tmp_path / 'recording.rsr')
+    columns = _columns(1000)
+    _write_native_file(file_path, columns, {'name': 'test'}, compression, chunk_size=128)
+    header, loaded = _read_native_file(file_path)
+    assert header['count'] == 1000
+    assert header['metadata'] == {'name': 'test'}
+    assert _read_native_metadata(file_path)['metadata'] == {'name': 'test'}
+    for name, column in columns.items():
+        assert loaded[name].dtype == column.dtype
+        assert np.array_equal(loaded[name], column)
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+@pytest.mark.parametrize('start, end', [(0, 1), (127, 129), (100, 900), (-10, None), (999, 5000)])
+def test_read_range(tmp_path, compression, start, end):
+    file_path = str(tmp_path / 'recording.rsr')
+    columns = _columns(1000)
+    _write_native_file(file_path, columns, {}, compression, chunk_size=128)
+    _, loaded = _read_native_file(file_path, start, end)
+    for name, column in columns.items():
+        assert np.array_equal(loaded[name], column[start:end])
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+@pytest.mark.parametrize('start, end', [(500, 400), (300, 300), (1000, None), (0, 0)])
+def test_read_empty_range(tmp_path, compression, start, end):
+    file_path = str(tmp_path / 'recording.rsr')
+    _write_native_file(file_path, _columns(1000), {}, compression, chunk_size=128)
+    with pytest.raises(Exception, match='invalid data point range'):
+        _read_native_file(file_path, start, end)
+
+
+def test_read_truncated_file(tmp_path):
+    file_path = str(tmp_path / 'recording.rsr')
+    _write_native_file(file_path, _columns(1000), {})
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file_input:
+        data = file_input.read()
+    with open(file_path, 'wb') as file_output:
+        file_output.write(data[0:size // 2])
+    with pytest.raises(Exception):
+        _read_native_file(file_path)
@@ -0,0 +1,79 @@
+import numpy as np
+import os
+import pytest
+import subprocess
+import sys
+import time
+from resense import processing
+from resense.processing import IIRFilter, design_butterworth
+
+
+def _lfilter_reference(b, a, values, state):
+    # transposed direct form II, one sample at a time
+    filtered = np.empty(values.shape)
+    state = state.copy()
+    for index in range(0, len(values)):
+        filtered[index] = b[0] * values[index] + state[0]
+        state[0:-1] = b[1:-1, None] * values[index] + state[1:] - a[1:-1, None] * filtered[index]
+        state[-1] = b[-1] * values[index] - a[-1] * filtered[index]
+    return filtered
+
+
+@pytest.fixture
+def without_scipy(monkeypatch):
+    monkeypatch.setattr(processing, '_scipy_signal', None)
+
+
+def test_filter_is_abstract():
+    with pytest.raises(TypeError):
+        processing._Filter(6)
+
+
+def test_iir_filter_passes_constant_signal():
+    values = np.ones((100, 6)) * np.arange(1, 7)
+    filtered = design_butterworth(10.0, 1000.0).process_block(values)
+    assert np.allclose(filtered, values)
+
+
+def test_iir_filter_is_continuous_across_blocks():
+    b, a = design_butterworth(10.0, 1000.0).get_coefficients()
+    values = np.random.default_rng(0).normal(size=(200, 6))
+    whole = IIRFilter(b, a).process_block(values)
+    iir_filter = IIRFilter(b, a)
+    blocks = np.concatenate((iir_filter.process_block(values[0:77]), iir_filter.process_block(values[77:])))
+    assert np.allclose(blocks, whole)
+
+
+def test_importing_does_not_load_scipy():
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    code = ('import sys; sys.path.insert(0, {!r}); import resense.sensor_group, resense.processing; '
+            'print(resense.processing._scipy_signal is False, "scipy" in sys.modules)').format(source)
+    output = subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.PIPE).stdout
+    assert output.split() == [b'True', b'False']
+
+
+@pytest.mark.parametrize('order', [1, 2, 3, 4, 6])
+@pytest.mark.parametrize('highpass', [False, True])
+def test_iir_fallback_matches_direct_form(without_scipy, order, highpass):
+    iir_filter = design_butterworth(50.0, 1000.0, order=order, highpass=highpass)
+    b, a = iir_filter.get_coefficients()
+    values = np.random.default_rng(order).normal(size=(1000, 6)) + np.arange(1, 7)
+    state = iir_filter._steady_state[:, None] * values[0][None, :]
+    assert np.allclose(iir_filter.process_block(values), _lfilter_reference(b, a, values, state), atol=1e-9)
+
+
+@pytest.mark.parametrize('order', [2, 4])
+def test_iir_fallback_is_continuous_across_blocks(without_scipy, order):
+    b, a = design_butterworth(20.0, 1000.0, order=order).get_coefficients()
+    values = np.random.default_rng(0).normal(size=(1000, 6))
+    whole = IIRFilter(b, a).process_block(values)
+    iir_filter = IIRFilter(b, a)
+    blocks = [iir_filter.process_block(values[start:start + 77]) for start in range(0, 1000, 77)]
+    assert np.allclose(np.concatenate(blocks), whole)
+
+
+def test_iir_fallback_does_not_loop_over_samples(without_scipy):
+    values = np.random.default_rng(0).normal(size=(200000, 6))
+    start = time.perf_counter()
+    design_butterworth(10.0, 1000.0, order=4).process_block(values)
+    assert time.perf_counter() - start < 5.0
@@ -0,0 +1,88 @@
+import numpy as np
+import os
+import pytest
+from resense.recording import BufferedRecording, BufferedRecordingSet, load_recording
+
+
+def _recording(name: str, count: int) -> BufferedRecording:
+    recording = BufferedRecording(timestamps=np.arange(count, dtype=np.int64) * 1000,
+                                  values=np.arange(count * 6, dtype=np.float64).reshape((count, 6)))
+    recording.set_name(name)
+    return recording
+
+
+def _create_folder(folder) -> str:
+    BufferedRecordingSet([_recording('a', 10), _recording('c', 20)]).save(str(folder))
+    with open(os.path.join(str(folder), 'a.rsr'), 'rb') as file_input:
+        header = file_input.read(16)
+    # a truncated native file and a file which is not a recording at all
+    with open(os.path.join(str(folder), 'b.rsr'), 'wb') as file_output:
+        file_output.write(header)
+    with open(os.path.join(str(folder), 'd.csv'), 'w') as file_output:
+        file_output.write('not a recording\n')
+    return str(folder)
+
+
+def test_save_and_load(tmp_path):
+    BufferedRecordingSet([_recording('a', 10), _recording('b', 20)]).save(str(tmp_path))
+    recording_set = BufferedRecordingSet()
+    assert recording_set.load(str(tmp_path)) == []
+    assert [recording.get_name() for recording in recording_set.get_recordings()] == ['a', 'b']
+    assert np.array_equal(recording_set.get_recording(1).get_ft_matrix(), _recording('b', 20).get_ft_matrix())
+
+
+def test_load_skips_bad_files(tmp_path):
+    folder = _create_folder(tmp_path)
+    recording_set = BufferedRecordingSet()
+    errors = recording_set.load(folder)
+    assert [recording.get_name() for recording in recording_set.get_recordings()] == ['a', 'c']
+    assert [os.path.basename(file_path) for file_path, _ in errors] == ['b.rsr', 'd.csv']
+    assert all(isinstance(error, Exception) for _, error in errors)
+
+
+def test_lazy_load_skips_bad_metadata(tmp_path):
+    folder = _create_folder(tmp_path)
+    recording_set = BufferedRecordingSet()
+    errors = recording_set.load(folder, file_extensions=['rsr'], lazy=True)
+    assert [os.path.basename(file_path) for file_path, _ in errors] == ['b.rsr']
+    assert recording_set.get_recording_count() == 2
+    assert recording_set.get_recording(1).get_data_point_count() == 20
+
+
+def test_load_recording_range(tmp_path):
+    file_path = str(tmp_path / 'a.rsr')
+    _recording('a', 1000).save(file_path, chunk_size=300)
+    part = load_recording(file_path, 250, 650)
+    assert part.get_name() == 'a'
+    assert np.array_equal(part.get_ft_matrix(), _recording('a', 1000).get_ft_matrix()[250:650])
+    for start, end in ((500, 400), (500, 500)):
+        with pytest.raises(Exception, match='invalid data point range'):
+            load_recording(file_path, start, end)
+
+
+def test_slice_time_boundaries():
+    recording = _recording('a', 1000)
+    counts = [recording.slice_time(index * 0.001, index * 0.001 + 0.001).get_data_point_count()
+              for index in range(999)]
+    assert counts == [1] * 999
+    window = recording.slice_time(0.008, 0.008 + 0.001)
+    assert window.get_array_of_timestamps(relative=False, seconds=False).tolist() == [8000]
+    assert recording.slice_time(0.0, 0.0) is None
+    assert recording.slice_time(0.998).get_data_point_count() == 2
+    assert recording.slice_time(0.1, 0.3).get_data_point_count() == 200
+
+
+def test_time_window_indices_match_slice_time():
+    recording = _recording('a', 1000)
+    starts = np.arange(0, 0.99, 0.01)
+    starts_indices, end_indices = recording.get_time_window_indices(starts, starts + 0.01)
+    assert (end_indices - starts_indices).tolist() == [10] * len(starts)
+    assert starts_indices.tolist() == list(range(0, 990, 10))
+
+
+def test_data_point_indices_for_time_frame():
+    recording = _recording('a', 1000)
+    assert recording.get_data_point_indices_for_time_frame(0.009, 0.009) == (9, 9)
+    assert recording.get_data_point_indices_for_time_frame(0.0, 0.999) == (0, 999)
+    assert recording.get_data_point_indices_for_time_frame(0.0015, 0.0025) == (2, 2)
+    assert recording.get_data_point_indices_for_time_frame(0.5, 1.5) == (-1, -1)
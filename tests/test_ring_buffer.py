@@ -0,0 +1,65 @@
+import numpy as np
+from resense.ring_buffer import RingBuffer
+
+
+def _write(buffer: RingBuffer, start: int, count: int):
+    timestamps = np.arange(start, start + count, dtype=np.int64)
+    buffer.write(timestamps, np.repeat(timestamps.reshape((-1, 1)), 6, axis=1).astype(np.float32))
+
+
+def test_read_latest_wraps_around():
+    buffer = RingBuffer(4)
+    _write(buffer, 0, 3)
+    _write(buffer, 3, 3)
+    timestamps, values = buffer.read_latest(10)
+    assert timestamps.tolist() == [2, 3, 4, 5]
+    assert values[:, 0].tolist() == [2, 3, 4, 5]
+
+
+def test_read_since_counts_overruns():
+    buffer = RingBuffer(4)
+    _write(buffer, 0, 6)
+    timestamps, _, position, lost = buffer.read_since(0)
+    assert timestamps.tolist() == [2, 3, 4, 5]
+    assert (position, lost) == (6, 2)
+    assert buffer.get_overrun_count() == 2
+
+
+def _interleave_partial_write(buffer: RingBuffer):
+    # simulates the producer being preempted while it overwrites slots 0 and 1 with samples 4 and 5: the first
+    # copy and its validation happen before the write is published, which happens during the next copy
+    copy = buffer._copy
+    calls = []
+
+    def copy_during_write(start, end):
+        if len(calls) == 0:
+            buffer._write_begin = 6
+            buffer._timestamps[0:2] = [4, 5]
+            buffer._values[0:2] = [[4] * 6, [5] * 6]
+        elif len(calls) == 1:
+            buffer._write_count = 6
+        calls.append((start, end))
+        return copy(start, end)
+
+    buffer._copy = copy_during_write
+    return calls
+
+
+def test_read_latest_retries_torn_copy():
+    buffer = RingBuffer(4)
+    _write(buffer, 0, 4)
+    calls = _interleave_partial_write(buffer)
+    timestamps, values = buffer.read_latest(4)
+    assert calls[-1] == (2, 6)
+    assert timestamps.tolist() == [2, 3, 4, 5]
+    assert values[:, 0].tolist() == [2, 3, 4, 5]
+
+
+def test_read_since_retries_torn_copy():
+    buffer = RingBuffer(4)
+    _write(buffer, 0, 4)
+    _interleave_partial_write(buffer)
+    timestamps, values, position, lost = buffer.read_since(0)
+    assert timestamps.tolist() == [2, 3, 4, 5]
+    assert values[:, 0].tolist() == [2, 3, 4, 5]
+    assert (position, lost) == (6, 2)
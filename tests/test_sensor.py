@@ -0,0 +1,108 @@
+import numpy as np
+import time
+from resense.framing import _decode_frames
+from resense.sensor import HEXSensor
+from resense.simulator import SimulatedSerial, create_frames
+
+
+def _connect(num_frames: int, corruption_interval: int = None, sample_rate: float = 1000.0) -> HEXSensor:
+    transport = SimulatedSerial(sample_rate, num_frames=num_frames, corruption_interval=corruption_interval,
+                                paced=False)
+    sensor = HEXSensor(None, sample_rate=sample_rate, transport=transport)
+    assert sensor.connect()
+    return sensor
+
+
+def _expected_values(num_frames: int, corruption_interval: int = None) -> np.ndarray:
+    values = _decode_frames(create_frames(num_frames))
+    if corruption_interval is not None:
+        values = values[np.arange(num_frames) % corruption_interval != corruption_interval - 1]
+    return values
+
+
+def test_record_samples():
+    sensor = _connect(3000)
+    recording = sensor.record_samples(3000)
+    assert recording.get_data_point_count() == 3000
+    assert np.array_equal(recording.get_ft_matrix(), _expected_values(3000))
+    assert sensor.get_frame_statistics()['corrupted_frames'] == 0
+    sensor.disconnect()
+
+
+def test_record_samples_skips_corrupted_frames():
+    sensor = _connect(2050, corruption_interval=100)
+    recording = sensor.record_samples(2030)
+    assert recording.get_data_point_count() == 2030
+    assert np.array_equal(recording.get_ft_matrix(), _expected_values(2050, 100))
+    statistics = sensor.get_frame_statistics()
+    assert statistics['corrupted_frames'] == 20
+    assert statistics['resyncs'] == 20
+    # the stream is exhausted: fewer samples than requested are returned
+    assert sensor.record_samples(10) is None
+    sensor.disconnect()
+
+
+def test_record_samples_keeps_surplus_frames_after_resync():
+    # single samples are requested while the synchronizer releases several frames after each resync
+    sensor = _connect(105, corruption_interval=10)
+    values = [sensor.record_samples(1).get_ft_matrix()[0] for _ in range(95)]
+    assert np.array_equal(np.array(values), _expected_values(105, 10))
+    assert sensor.get_frame_statistics()['resyncs'] == 10
+    sensor.disconnect()
+
+
+def test_record_samples_across_resyncs_in_small_blocks():
+    sensor = _connect(1000, corruption_interval=7)
+    blocks = []
+    while True:
+        block = sensor.record_samples(5)
+        if block is None:
+            break
+        blocks.append(block.get_ft_matrix())
+    assert np.array_equal(np.concatenate(blocks), _expected_values(1000, 7))
+    sensor.disconnect()
+
+
+def test_corrupted_frames_keep_their_time_slot():
+    sensor = _connect(40, corruption_interval=10)
+    recording = sensor.record_samples(36)
+    # the first read contains 32 frames: frames 9 and 19 are corrupted and were sampled between valid samples
+    intervals = np.diff(recording.get_array_of_timestamps(relative=False, seconds=False))[0:26]
+    assert np.flatnonzero(intervals != 1000).tolist() == [8, 17]
+    assert intervals[8] == intervals[17] == 2000
+    sensor.disconnect()
+
+
+def test_streaming_into_ring_buffer():
+    sensor = HEXSensor(None, sample_rate=5000.0, transport=SimulatedSerial(5000.0))
+    sensor.connect()
+    assert sensor.start_streaming(buffer_size=1000)
+    blocks = sensor.iter_blocks(min_samples=100, include_buffered=True)
+    block = next(blocks)
+    assert block.get_data_point_count() >= 100
+    latest = sensor.get_latest_samples(50)
+    sensor.stop_streaming()
+    assert latest.get_data_point_count() == 50
+    assert np.all(np.diff(latest.get_array_of_timestamps(relative=False, seconds=False)) > 0)
+    assert sensor.get_stream_error() is None
+    assert sensor.record_samples(10) is not None
+    sensor.disconnect()
+
+
+def test_streaming_keeps_time_base_after_consecutive_corrupted_frames():
+    # frames 90-99, 190-199, ... are corrupted and arrive in small chunks, each run shifts the index by 10 frames
+    transport = SimulatedSerial(5000.0, num_frames=1000, corruption_interval=100, corruption_length=10)
+    sensor = HEXSensor(None, sample_rate=5000.0, transport=transport)
+    sensor.connect()
+    sensor.start_streaming(buffer_size=1000)
+    deadline = time.monotonic() + 10.0
+    while sensor.get_frame_statistics()['frames'] < 900 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sensor.stop_streaming()
+    recording = sensor.get_latest_samples(1000)
+    sensor.disconnect()
+    assert recording.get_data_point_count() == 900
+    assert sensor.get_frame_statistics()['corrupted_frames'] == 90
+    # valid frame 989 is the last one, the time stamps span 989 periods of 200 us
+    timestamps = recording.get_array_of_timestamps(relative=False, seconds=False)
+    assert abs(int(timestamps[-1] - timestamps[0]) - 989 * 200) < 5000
@@ -0,0 +1,30 @@
+import numpy as np
+from resense.sensor import HEXSensor
+from resense.sensor_group import SensorGroup
+from resense.simulator import SimulatedSerial
+
+
+def _create_group(sample_rate: float = 2000.0) -> SensorGroup:
+    sensors = [HEXSensor(None, sample_rate=sample_rate, transport=SimulatedSerial(sample_rate)) for _ in range(2)]
+    group = SensorGroup(sensors)
+    assert group.connect()
+    return group
+
+
+def test_record_samples_aligned():
+    group = _create_group()
+    recording_set = group.record_samples(200)
+    group.disconnect()
+    first, second = recording_set.get_recordings()
+    assert first.get_data_point_count() == second.get_data_point_count() > 150
+    assert np.array_equal(first.get_array_of_timestamps(relative=False), second.get_array_of_timestamps(relative=False))
+    assert first.get_sample_rate() == second.get_sample_rate()
+    statistics = group.get_statistics()
+    assert [entry['samples'] for entry in statistics] == [200, 200]
+
+
+def test_record_samples_unaligned():
+    group = _create_group()
+    recording_set = group.record_samples([100, 150], align=False)
+    group.disconnect()
+    assert [recording.get_data_point_count() for recording in recording_set.get_recordings()] == [100, 150]
@@ -0,0 +1,36 @@
+import numpy as np
+import time
+from resense.framing import _FRAME_DTYPE, _FRAME_SIZE
+from resense.sensor import HEXSensor
+from resense.simulator import SimulatedSerial, create_frames
+
+
+def test_read_larger_than_buffer():
+    transport = SimulatedSerial(20000.0, buffer_size=4096)
+    data = transport.read(3000 * _FRAME_SIZE)
+    assert len(data) == 3000 * _FRAME_SIZE
+    assert np.all(np.frombuffer(data, dtype=_FRAME_DTYPE)['trailer'] == np.frombuffer(b'\r\n\r\n', dtype='<u4'))
+
+
+def test_read_larger_than_buffer_unpaced():
+    transport = SimulatedSerial(num_frames=5000, buffer_size=4096, paced=False)
+    assert transport.read(3000 * _FRAME_SIZE) == create_frames(3000)
+    # the source is exhausted, the remaining frames are returned without blocking
+    assert transport.read(3000 * _FRAME_SIZE) == create_frames(2000, 3000)
+
+
+def test_read_returns_after_timeout():
+    transport = SimulatedSerial(1000.0)
+    transport.timeout = 0.05
+    start_time = time.monotonic()
+    data = transport.read(1000 * _FRAME_SIZE)
+    assert time.monotonic() - start_time < 0.5
+    assert 0 < len(data) < 1000 * _FRAME_SIZE
+
+
+def test_record_samples_larger_than_buffer():
+    sensor = HEXSensor(None, transport=SimulatedSerial(20000.0, buffer_size=4096))
+    sensor.connect()
+    assert sensor.record_samples(3000).get_data_point_count() == 3000
+    assert sensor.get_frame_statistics()['corrupted_frames'] == 0
+    sensor.disconnect()
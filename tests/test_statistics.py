@@ -0,0 +1,31 @@
+import numpy as np
+from resense.recording import BufferedRecording, Variable, Direction
+from resense.statistics import find_peaks
+
+
+def _recording(signal) -> BufferedRecording:
+    values = np.zeros((len(signal), 6))
+    values[:, 0] = signal
+    return BufferedRecording(timestamps=np.arange(len(signal), dtype=np.int64) * 1000, values=values)
+
+
+def _peaks(signal, **kwargs) -> list:
+    return find_peaks(_recording(signal), Variable.FORCE, Direction.X, **kwargs).tolist()
+
+
+def test_find_peaks():
+    assert _peaks([0, 2, 1, 3, 0, 1]) == [1, 3]
+    assert _peaks([0, 2, 1, 3, 0, 1], height=2.5) == [3]
+    assert _peaks([0, 2, 1, 3, 0, 1], min_distance=3) == [3]
+
+
+def test_find_peaks_ignores_shoulders():
+    assert _peaks([1, 3, 3, 5, 2, 1]) == [3]
+    assert _peaks([1, 5, 3, 3, 2, 1]) == [1]
+    assert _peaks([1, 2, 2, 2]) == []
+
+
+def test_find_peaks_reports_middle_of_plateaus():
+    assert _peaks([0, 4, 4, 4, 0]) == [2]
+    assert _peaks([0, 4, 4, 4, 4, 0, 1, 1, 0]) == [2, 6]
+    assert _peaks([0, 4, 4, 3, 3, 5, 5, 5, 1]) == [1, 6]
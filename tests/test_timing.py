@@ -0,0 +1,37 @@
+import numpy as np
+from resense.timing import SampleClock
+
+
+def test_timestamps_follow_the_nominal_rate():
+    clock = SampleClock(1000.0)
+    clock.reset(0)
+    first = clock.timestamp_block(100, 100000)
+    second = clock.timestamp_block(100, 200000)
+    timestamps = np.concatenate((first, second))
+    assert np.all(np.diff(timestamps) == 1000)
+    assert timestamps[-1] == 200000
+
+
+def test_period_is_seeded_from_the_first_two_arrivals():
+    # the first sample arrived long after the clock was reset, the idle time must not inflate the period
+    clock = SampleClock()
+    clock.reset(0)
+    clock.timestamp_block(1024, 2000000)
+    second = clock.timestamp_block(1024, 3024000)
+    assert clock.get_sample_rate() == 1000.0
+    assert np.all(np.diff(second) == 1000)
+    third = clock.timestamp_block(1024, 4048000)
+    assert np.all(np.diff(third) == 1000)
+    assert third[0] - second[-1] == 1000
+
+
+def test_gaps_shift_only_the_following_samples():
+    clock = SampleClock(1000.0)
+    clock.reset(0)
+    timestamps = clock.timestamp_block(5, 10000, gaps=[(2, 1), (5, 2)])
+    assert np.diff(timestamps).tolist() == [1000, 2000, 1000, 1000]
+    # the gap at the end of the block applies to the next block, as well as gaps of empty blocks
+    clock.timestamp_block(0, 10500, gaps=[(0, 1)])
+    following = clock.timestamp_block(1, 14000)
+    assert following[0] - timestamps[-1] == 4000
+
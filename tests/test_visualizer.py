@@ -0,0 +1,91 @@
+import numpy as np
+import os
+import pytest
+import subprocess
+import sys
+from resense.recording import BufferedRecording
+from resense.visualizer import decimate_min_max
+
+pytest.importorskip('matplotlib')
+
+
+def _recording(count: int) -> BufferedRecording:
+    values = np.random.default_rng(0).normal(size=(count, 6))
+    return BufferedRecording(timestamps=np.arange(count, dtype=np.int64) * 1000, values=values)
+
+
+@pytest.mark.parametrize('count, pixels', [(10000, 100), (10007, 100), (999, 10), (301, 100)])
+def test_decimate_min_max_keeps_bucket_extremes(count, pixels):
+    time_points = np.arange(count) / 1000.0
+    values = np.random.default_rng(count).normal(size=(count, 3))
+    decimated_time_points, decimated_values = decimate_min_max(time_points, values, pixels)
+    bucket_size = -(-count // pixels)
+    buckets = -(-count // bucket_size)
+    assert decimated_values.shape == (2 * buckets, 3)
+    for channel in range(0, 3):
+        # the points are kept in their original order
+        assert np.all(np.diff(decimated_time_points[:, channel]) >= 0)
+        for bucket in range(0, buckets):
+            expected = values[bucket * bucket_size:(bucket + 1) * bucket_size, channel]
+            kept = decimated_values[2 * bucket:2 * bucket + 2, channel]
+            assert sorted(kept) == [expected.min(), expected.max()]
+    indices = np.rint(decimated_time_points * 1000.0).astype(np.intp)
+    assert np.array_equal(np.take_along_axis(values, indices, axis=0), decimated_values)
+
+
+def test_decimate_min_max_keeps_short_signals():
+    time_points = np.arange(100) / 1000.0
+    values = np.random.default_rng(0).normal(size=100)
+    decimated_time_points, decimated_values = decimate_min_max(time_points, values, 50)
+    assert np.array_equal(decimated_time_points, time_points)
+    assert np.array_equal(decimated_values, values)
+
+
+def test_decimate_min_max_keeps_single_peak():
+    values = np.zeros(100000)
+    values[54321] = 5.0
+    values[12345] = -3.0
+    _, decimated_values = decimate_min_max(np.arange(100000), values, 200)
+    assert decimated_values.max() == 5.0
+    assert decimated_values.min() == -3.0
+
+
+def test_save_plots_headless(tmp_path):
+    # a fresh interpreter without a display must not load pyplot or any GUI backend
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    code = ('import sys; sys.path.insert(0, {!r}); import numpy as np; '
+            'from resense.recording import BufferedRecording; from resense import visualizer; '
+            'recording = BufferedRecording(timestamps=np.arange(100000) * 1000, values=np.ones((100000, 6))); '
+            'visualizer.save_force_plot(recording, sys.argv[1], name="force"); '
+            'visualizer.save_torque_plot(recording, sys.argv[2]); '
+            'print("matplotlib.pyplot" in sys.modules)').format(source)
+    paths = [str(tmp_path / 'force.png'), str(tmp_path / 'torque.svg')]
+    environment = dict(os.environ)
+    environment.pop('DISPLAY', None)
+    environment.pop('MPLBACKEND', None)
+    output = subprocess.run([sys.executable, '-c', code] + paths, check=True, stdout=subprocess.PIPE,
+                            env=environment).stdout
+    assert output.split() == [b'False']
+    with open(paths[0], 'rb') as file_input:
+        assert file_input.read(8) == b'\x89PNG\r\n\x1a\n'
+    with open(paths[1]) as file_input:
+        assert '<svg' in file_input.read()
+
+
+class _Sensor:
+
+    def __init__(self, recording: BufferedRecording):
+        self._recording = recording
+
+    def get_latest_samples(self, count: int) -> BufferedRecording:
+        return self._recording.get_sub_recording(max(0, self._recording.get_data_point_count() - count))
+
+
+def test_live_plot_save_headless(tmp_path):
+    from resense.visualizer import LivePlot
+    file_path = str(tmp_path / 'live.png')
+    live_plot = LivePlot(_Sensor(_recording(20000)), window=5.0, pixels=100)
+    live_plot.save(file_path)
+    live_plot.update()
+    assert live_plot.get_frame_count() == 2
+    assert os.path.getsize(file_path) > 0